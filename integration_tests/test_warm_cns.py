@@ -0,0 +1,85 @@
+"""Compare CNS jobs run in a warm CNS process with fresh CNS runs."""
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from haddock.libs.libontology import Format, PDBFile, Persistent
+from haddock.modules.refinement.emref import \
+    DEFAULT_CONFIG as DEFAULT_EMREF_CONFIG
+from haddock.modules.refinement.emref import HaddockModule as EmrefModule
+from haddock.modules.refinement.mdref import \
+    DEFAULT_CONFIG as DEFAULT_MDREF_CONFIG
+from haddock.modules.refinement.mdref import HaddockModule as MdrefModule
+from integration_tests import CNS_EXEC, GOLDEN_DATA, has_cns
+
+
+class MockPreviousIO:
+    """A complex, a single molecule, then the complex again."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def retrieve_models(self, crossdock: bool = False):
+        for fname in ("2oob.pdb", "2oob_A.psf", "2oob_B.psf", "prot.pdb", "prot.psf"):  # noqa: E501
+            shutil.copy(Path(GOLDEN_DATA, fname), Path(self.path, fname))
+
+        def model(pdb, *psfs):
+            model = PDBFile(
+                file_name=pdb,
+                path=self.path,
+                topology=tuple(
+                    Persistent(
+                        file_name=psf,
+                        path=self.path,
+                        file_type=Format.TOPOLOGY,
+                        )
+                    for psf in psfs
+                    ),
+                )
+            model.seed = 42  # type: ignore
+            return model
+
+        return [
+            model("2oob.pdb", "2oob_A.psf", "2oob_B.psf"),
+            model("prot.pdb", "prot.psf"),
+            model("2oob.pdb", "2oob_A.psf", "2oob_B.psf"),
+            ]
+
+    def output(self):
+        return None
+
+
+def run_models(module_class, config, mode):
+    """Run a refinement module and give the lines of its models."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        module = module_class(order=0, path=Path(tmpdir), initial_params=config)
+        module.previous_io = MockPreviousIO(path=module.path)
+        module.params["cns_exec"] = CNS_EXEC
+        module.params["mode"] = mode
+        module.params["ncores"] = 1
+        module.run()
+        return [
+            [
+                line
+                for line in Path(module.path, f"{module.name}_{i}.pdb").read_text().splitlines()  # noqa: E501
+                if "DATE:" not in line
+                ]
+            for i in (1, 2, 3)
+            ]
+
+
+@has_cns
+@pytest.mark.parametrize(
+    "module_class,config",
+    [
+        (EmrefModule, DEFAULT_EMREF_CONFIG),
+        (MdrefModule, DEFAULT_MDREF_CONFIG),
+        ],
+    )
+def test_warm_cns_process_as_fresh_cns(module_class, config):
+    """Test jobs sharing a warm CNS process give the same models."""
+    fresh = run_models(module_class, config, "local")
+    warm = run_models(module_class, config, "warm")
+    assert warm == fresh
@@ -27,7 +27,7 @@ from haddock.core.typing import (
     Optional,
 )
 from haddock.gear.extend_run import EXTEND_RUN_DEFAULT, add_extend_run
-from haddock.gear.restart_run import add_restart_arg
+from haddock.gear.restart_run import add_restart_arg, add_resume_arg
 from haddock.libs.libcli import add_version_arg, arg_file_exist
 from haddock.libs.liblog import add_loglevel_arg
 
@@ -45,6 +45,7 @@ ap.add_argument(
     )
 
 add_restart_arg(ap)
+add_resume_arg(ap)
 add_extend_run(ap)
 
 ap.add_argument(
@@ -81,6 +82,7 @@ def maincli() -> None:
 def main(
     workflow: FilePath,
     restart: Optional[int] = None,
+    resume: bool = False,
     extend_run: Optional[FilePath] = EXTEND_RUN_DEFAULT,
     setup_only: bool = False,
     log_level: LogLevel = "INFO",
@@ -97,6 +99,10 @@ def main(
         The step to restart the run from (inclusive).
         Defaults to None, which ignores this option.
 
+    resume : bool
+        Whether to keep the models already generated by the `restart`
+        step and run only the missing ones. Defaults to False.
+
     extend_run : str or Path
         The path created with `haddock3-copy` to start the run from.
         Defaults to None, which ignores this option.
@@ -151,6 +157,7 @@ def main(
             workflow,
             restart_from=restart,
             extend_run=extend_run,
+            resume=resume,
         )
 
     # here we the io.StringIO handler log information, and reset the log
@@ -188,6 +195,7 @@ def main(
         workflow = WorkflowManager_(
             workflow_params=params,
             start=restart_step,
+            resume=resume,
             **other_params,
         )
 
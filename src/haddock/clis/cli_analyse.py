@@ -29,7 +29,7 @@ from pathlib import Path
 from haddock import log
 from haddock.clis.cli_unpack import main as haddock3_unpack
 from haddock.clis.cli_clean import main as haddock3_clean
-from haddock.core.defaults import INTERACTIVE_RE_SUFFIX
+from haddock.core.defaults import INTERACTIVE_RE_SUFFIX, MODULE_IO_FILE
 from haddock.core.typing import (
     Any,
     ArgumentParser,
@@ -43,6 +43,7 @@ from haddock.core.typing import (
 )
 from haddock.gear.yaml2cfg import read_from_yaml_config
 from haddock.gear.clean_steps import _unpack_gz
+from haddock.libs.libalign import ALIGNMENT_CACHE_FILE
 from haddock.libs.libcli import _ParamsToDict
 from haddock.libs.libio import archive_files_ext
 from haddock.libs.libontology import ModuleIO
@@ -252,7 +253,7 @@ def run_capri_analysis(step: str, run_dir: FilePath, capri_dict: ParamMap, is_cl
     """
     # retrieve json file with all information
     io = ModuleIO()
-    filename = Path("..", f"{step}/io.json")
+    filename = Path("..", step, MODULE_IO_FILE)
     io.load(filename)
     # unpack the files if they are compressed
     if is_cleaned:
@@ -274,6 +275,8 @@ def run_capri_analysis(step: str, run_dir: FilePath, capri_dict: ParamMap, is_cl
     caprieval_module.params["ncores"] = ncores
     # update model info
     caprieval_module.previous_io = io
+    # reuse the alignments of the step
+    caprieval_module.alignment_cache = Path("..", step, ALIGNMENT_CACHE_FILE)
     # run capri module
     caprieval_module._run()
     # compress files if they should be compressed
@@ -6,24 +6,34 @@ This was developed for use of lbimpi but it might be useful in some specific
 
 For more information please refer to the README.md in the examples folder.
 
+Rank 0 acts as a dispatcher sending one task at a time to each of the
+other ranks as soon as they are idle, and gathering back the results,
+failures and resource usage of each task. If an output path is given,
+they are pickled there in the original task order.
+
 Usage::
 
     haddock3-mpitask -h
     haddock3-mpitask tasks.pkl
+    haddock3-mpitask tasks.pkl --output results.pkl
 """
 
 import argparse
 import pickle
 import sys
+from functools import partial
 
+from haddock import log
 from haddock.core.typing import (
-    AnyT,
+    Any,
     ArgumentParser,
     Callable,
     FilePath,
     Namespace,
+    Optional,
+    SupportsRunT,
 )
-from haddock.libs.libsubprocess import CNSJob
+from haddock.libs.libtelemetry import TaskStats, run_measured
 
 
 # Note! ########################################################################################
@@ -54,9 +64,113 @@ def get_mpi():
     return MPI, COMM
 
 
-def split_tasks(task_l: list[AnyT], n: int) -> list[list[AnyT]]:
-    """Split tasks into equal lenght chunks."""
-    return [task_l[_i::n] for _i in range(n)]
+TASK_TAG = 1
+"""MPI tag of the messages sending tasks to the worker ranks."""
+
+RESULT_TAG = 2
+"""MPI tag of the messages sending results back to the dispatcher."""
+
+
+def run_task(task: SupportsRunT) -> tuple[Any, Optional[str]]:
+    """Run a task and return its result and error message, if any."""
+    try:
+        return task.run(), None
+    except Exception as err:
+        return None, f"{type(err).__name__}: {err}"
+
+
+def run_measured_task(
+        task: SupportsRunT,
+        idx: int,
+        ) -> tuple[Any, Optional[str], TaskStats]:
+    """Run a task and return its result, error message and stats."""
+    (result, error), stats = run_measured(task, idx, partial(run_task, task))
+    if error:
+        stats.status = "failed"
+    return result, error, stats
+
+
+def dispatch_tasks(
+        tasks: list[SupportsRunT],
+        comm: Any,
+        ) -> tuple[list[Any], dict[int, str], list[TaskStats]]:
+    """
+    Send tasks on demand to the worker ranks and gather their results.
+
+    Parameters
+    ----------
+    tasks : list
+        The tasks to execute. Tasks must have method `run()`.
+
+    comm : mpi4py.MPI.Comm
+        The MPI communicator. This rank (0) only dispatches tasks.
+
+    Returns
+    -------
+    tuple
+        The list of results in the original task order, a dictionary
+        with the error messages of the failed tasks, by task index, and
+        the :py:class:`haddock.libs.libtelemetry.TaskStats` of the tasks.
+    """
+    MPI, _ = get_mpi()
+    results: list[Any] = [None] * len(tasks)
+    failures: dict[int, str] = {}
+    stats: list[TaskStats] = []
+
+    # no other ranks, run everything here
+    if comm.size == 1:
+        for idx, task in enumerate(tasks):
+            results[idx], error, task_stats = run_measured_task(task, idx)
+            stats.append(task_stats)
+            if error:
+                failures[idx] = error
+        return results, failures, stats
+
+    task_iter = enumerate(tasks)
+    active = 0
+    # feed every worker with a first task
+    for rank in range(1, comm.size):
+        item = next(task_iter, None)
+        comm.send(item, dest=rank, tag=TASK_TAG)
+        if item is not None:
+            active += 1
+
+    status = MPI.Status()
+    while active:
+        idx, result, error, task_stats = comm.recv(
+            source=MPI.ANY_SOURCE,
+            tag=RESULT_TAG,
+            status=status,
+            )
+        results[idx] = result
+        stats.append(task_stats)
+        if error:
+            failures[idx] = error
+
+        next_task = next(task_iter, None)
+        comm.send(next_task, dest=status.Get_source(), tag=TASK_TAG)
+        if next_task is None:
+            active -= 1
+
+    return results, failures, stats
+
+
+def run_tasks_on_demand(comm: Any) -> None:
+    """
+    Request and execute tasks from the dispatcher until told to stop.
+
+    Parameters
+    ----------
+    comm : mpi4py.MPI.Comm
+        The MPI communicator.
+    """
+    while True:
+        item = comm.recv(source=0, tag=TASK_TAG)
+        if item is None:
+            break
+        idx, task = item
+        result, error, stats = run_measured_task(task, idx)
+        comm.send((idx, result, error, stats), dest=0, tag=RESULT_TAG)
 
 
 # ========================================================================#
@@ -72,6 +186,14 @@ ap.add_argument(
     help="The input pickled tasks path",
 )
 
+ap.add_argument(
+    "-o",
+    "--output",
+    dest="output",
+    default=None,
+    help="Path where to pickle the results, failures and stats of the tasks",
+)
+
 
 def _ap() -> ArgumentParser:
     return ap
@@ -96,27 +218,25 @@ def maincli() -> None:
 # ========================================================================#
 
 
-def main(pickled_tasks: FilePath) -> None:
+def main(pickled_tasks: FilePath, output: Optional[FilePath] = None) -> None:
     """Execute the tasks."""
     MPI, COMM = get_mpi()
-    if COMM.rank == 0:
-        with open(pickled_tasks, "rb") as pkl:
-            tasks = pickle.load(pkl)
-        mpi_jobs = split_tasks(tasks, COMM.size)
-    else:
-        mpi_jobs = None
-
-    jobs: list[CNSJob] = COMM.scatter(mpi_jobs, root=0)
-
-    results: list[FilePath] = []
-    for job in jobs:
-        job.run()
-        # check if the job has an input file
-        if hasattr(job, "input_file"):
-            results.append(job.input_file)
-
-    # COMM.Barrier()
-    # results = MPI.COMM_WORLD.gather(results, root=0)
+    # only the dispatcher reads the tasks, the other ranks receive them
+    # one at a time over MPI
+    if COMM.rank != 0:
+        run_tasks_on_demand(COMM)
+        return
+
+    with open(pickled_tasks, "rb") as pkl:
+        tasks = pickle.load(pkl)
+
+    results, failures, stats = dispatch_tasks(tasks, COMM)
+    for idx, error in failures.items():
+        log.warning(f"Exception in task {idx} execution: {error}")
+
+    if output:
+        with open(output, "wb") as pkl:
+            pickle.dump((results, failures, stats), pkl)
 
 
 if __name__ == "__main__":
@@ -17,6 +17,7 @@ import numpy as np
 import pandas as pd
 
 from haddock import log
+from haddock.core.defaults import MODULE_IO_FILE
 from haddock.core.typing import Any, FilePath
 from haddock.libs import libcli
 from haddock.libs.libontology import ModuleIO, PDBFile
@@ -290,10 +291,10 @@ def main(run_dir: FilePath, offline: bool = False) -> None:
                 data_dict[key][-1] = f"../{sel_step[n]}/{data_dict[key][-1]}"
 
         delta = len(sel_step) - n - 1  # how many steps have we gone back?
-        # loading the .json file
-        json_path = Path(run_dir, sel_step[n], "io.json")
+        # loading the io file
+        io_path = Path(run_dir, sel_step[n], MODULE_IO_FILE)
         io = ModuleIO()
-        io.load(json_path)
+        io.load(io_path)
         # list all the values in the data_dict
         ls_values = [x for val in data_dict.values() for x in val]
         # getting and sorting the ranks for the current step folder
@@ -0,0 +1,198 @@
+"""
+HADDOCK3 worker daemon for the `cluster` execution mode.
+
+Connects to a run coordinator executing a workflow with `mode = "cluster"`
+and runs the tasks it sends. Start one daemon per machine, with as many
+worker processes as cores to use there. The run directory must be
+available at the same path on the coordinator and on the workers, for
+example on a shared file system.
+
+The authentication key must be the same as the `HADDOCK3_CLUSTER_KEY`
+environment variable of the run. It is given with `--authkey` or in the
+same environment variable.
+
+By default, workers keep reconnecting to the coordinator to serve the
+next steps of the workflow until stopped with Ctrl+C.
+
+Usage::
+
+    haddock3-worker -h
+    haddock3-worker coordinator.host:37700 --ncores 16
+    haddock3-worker coordinator.host:37700 --authkey <key> --max-idle 600
+"""
+
+import argparse
+import os
+import sys
+from multiprocessing import Process
+
+from haddock import log
+from haddock.core.typing import ArgumentParser, Callable, Namespace, Optional
+from haddock.libs.libcluster import AUTHKEY_ENV, DEFAULT_PORT, run_worker
+from haddock.libs.libutil import parse_ncores
+
+
+def parse_address(address: str) -> tuple[str, int]:
+    """
+    Parse a `host[:port]` address.
+
+    Examples
+    --------
+    >>> parse_address("node01:5000")
+    ('node01', 5000)
+
+    >>> parse_address("node01")
+    ('node01', 37700)
+    """
+    host, _, port = address.rpartition(":")
+    if not host:
+        return port, DEFAULT_PORT
+    return host, int(port)
+
+
+# ========================================================================#
+# helper functions to enhance flexibility and modularity of the CLIs
+
+ap = argparse.ArgumentParser(
+    prog="haddock3-worker",
+    description=__doc__,
+    formatter_class=argparse.RawDescriptionHelpFormatter,
+)
+
+ap.add_argument(
+    "address",
+    help=f"The coordinator address as host[:port]. Default port: {DEFAULT_PORT}",
+    type=parse_address,
+)
+
+ap.add_argument(
+    "--authkey",
+    help=f"The run authentication key. Default: ${AUTHKEY_ENV}",
+    default=None,
+)
+
+ap.add_argument(
+    "-n",
+    "--ncores",
+    help="Number of worker processes. Default: all available CPUs.",
+    default=None,
+    type=int,
+)
+
+ap.add_argument(
+    "--once",
+    help="Exit after serving a single step of the workflow.",
+    action="store_true",
+)
+
+ap.add_argument(
+    "--retry-interval",
+    dest="retry_interval",
+    help="Seconds between connection attempts. Default: 5.",
+    default=5.0,
+    type=float,
+)
+
+ap.add_argument(
+    "--max-idle",
+    dest="max_idle",
+    help=(
+        "Exit when the coordinator cannot be reached for this many seconds. "
+        "Default: never."
+    ),
+    default=None,
+    type=float,
+)
+
+
+def _ap() -> ArgumentParser:
+    return ap
+
+
+def load_args(ap: ArgumentParser) -> Namespace:
+    """Load argument parser args."""
+    return ap.parse_args()
+
+
+def cli(ap: ArgumentParser, main: Callable[..., None]) -> None:
+    """Command-line interface entry point."""
+    cmd = load_args(ap)
+    main(**vars(cmd))
+
+
+def maincli() -> None:
+    """Execute main client."""
+    cli(ap, main)
+
+
+# ========================================================================#
+
+
+def main(
+    address: tuple[str, int],
+    authkey: Optional[str] = None,
+    ncores: Optional[int] = None,
+    once: bool = False,
+    retry_interval: float = 5.0,
+    max_idle: Optional[float] = None,
+) -> None:
+    """
+    Start the worker processes.
+
+    Parameters
+    ----------
+    address : tuple
+        The (host, port) address of the coordinator.
+
+    authkey : str, optional
+        The run authentication key. If not given, it is read from the
+        `HADDOCK3_CLUSTER_KEY` environment variable.
+
+    ncores : int, optional
+        The number of worker processes. Defaults to all available CPUs.
+
+    once : bool
+        Exit after serving a single step of the workflow.
+
+    retry_interval : float
+        Seconds between connection attempts.
+
+    max_idle : float, optional
+        Exit when the coordinator cannot be reached for this many
+        seconds.
+    """
+    authkey = authkey or os.environ.get(AUTHKEY_ENV)
+    if not authkey:
+        sys.exit(f"Give the run authentication key with --authkey or ${AUTHKEY_ENV}")
+
+    nprocs = parse_ncores(ncores, max_cpus=True)
+    log.info(
+        f"Starting {nprocs} workers for the coordinator at "
+        f"{address[0]}:{address[1]}"
+    )
+    workers = [
+        Process(
+            target=run_worker,
+            args=(address, authkey.encode()),
+            kwargs={
+                "once": once,
+                "retry_interval": retry_interval,
+                "max_idle": max_idle,
+            },
+        )
+        for _ in range(nprocs)
+    ]
+    for w in workers:
+        w.start()
+
+    try:
+        for w in workers:
+            w.join()
+    except KeyboardInterrupt:
+        log.info("Stopping the workers...")
+        for w in workers:
+            w.terminate()
+
+
+if __name__ == "__main__":
+    sys.exit(maincli())  # type: ignore
@@ -4,7 +4,7 @@ import shutil
 from pathlib import Path
 
 from haddock import log
-from haddock.core.defaults import INTERACTIVE_RE_SUFFIX
+from haddock.core.defaults import INTERACTIVE_RE_SUFFIX, MODULE_IO_FILE
 from haddock.core.typing import Union
 from haddock.fcc import cluster_fcc
 from haddock.gear.config import load as read_config
@@ -18,7 +18,7 @@ from haddock.libs.libclust import (
     )
 from haddock.libs.libfcc import read_matrix
 from haddock.libs.libinteractive import look_for_capri, rewrite_capri_tables
-from haddock.libs.libontology import ModuleIO
+from haddock.libs.libontology import ModuleIO, find_io_file
 from haddock.modules.analysis.clustfcc.clustfcc import (
     get_cluster_centers,
     iterate_clustering,
@@ -113,11 +113,11 @@ def reclustfcc(
 
     # create an io object
     io = ModuleIO()
-    filename = Path(clustfcc_dir, "io.json")
-    io.load(filename)
+    filename = find_io_file(Path(clustfcc_dir, MODULE_IO_FILE))
+    io.load(filename)  # type: ignore
     models = io.input
-    # copying io.json to the new directory
-    shutil.copy(filename, Path(outdir, "io.json"))
+    # copying the io file to the new directory
+    shutil.copy(filename, Path(outdir, filename.name))  # type: ignore
 
     # load the original clustering parameters via json
     clustfcc_params = read_config(Path(clustfcc_dir, "params.cfg"))
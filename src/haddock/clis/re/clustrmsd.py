@@ -3,7 +3,7 @@ from pathlib import Path
 import numpy as np
 
 from haddock import log
-from haddock.core.defaults import INTERACTIVE_RE_SUFFIX
+from haddock.core.defaults import INTERACTIVE_RE_SUFFIX, MODULE_IO_FILE
 from haddock.core.typing import Union, Optional
 from haddock.gear.config import load as read_config
 from haddock.gear.config import save as save_config
@@ -113,7 +113,7 @@ def reclustrmsd(
 
     # create an io object
     io = ModuleIO()
-    filename = Path(clustrmsd_dir, "io.json")
+    filename = Path(clustrmsd_dir, MODULE_IO_FILE)
     io.load(filename)
     models = io.input
 
@@ -242,7 +242,7 @@ def reclustrmsd(
                 )
             log.info(f"Plotting matrix in {html_matrixpath}")
 
-    # save the io.json file
+    # save the io file
     io.save(outdir)
 
     # save the updated parameters in a json file
@@ -32,9 +32,12 @@ MODULE_PATH_NAME = "step_"
 Module input and generated data will be stored in folder starting by
 this prefix"""
 
-MODULE_IO_FILE = "io.json"
+MODULE_IO_FILE = "io.db"
 """Default name for exchange module information file"""
 
+LEGACY_MODULE_IO_SUFFIX = ".json"
+"""Suffix of the exchange module information files of older runs"""
+
 MAX_NUM_MODULES = 10000
 """Temptative number of max allowed number of modules to execute"""
 
@@ -94,7 +94,7 @@ def read_num_molecules_from_folder(folder: FilePath) -> int:
     Read the number of molecules from the first step folder.
 
     1. Find the lower indexed step folder in `folder`.
-    2. Read the `io.json` file.
+    2. Read the `io.db` file, or the `io.json` file of older runs.
     3. Count the number of items in the "output" key.
     4. The above is the number of molecules.
 
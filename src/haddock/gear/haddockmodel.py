@@ -1,54 +1,107 @@
 """Represent an Haddock model."""
 
+import numpy as np
 
-from haddock.core.typing import FilePath
+from haddock.core.typing import FilePath, Iterable
+from haddock.libs.libontology import PDBFile, find_present
+
+
+ENERGY_TERMS = (
+    'total',
+    'bonds',
+    'angles',
+    'improper',
+    'dihe',
+    'vdw',
+    'elec',
+    'air',
+    'cdih',
+    'coup',
+    'rdcs',
+    'vean',
+    'dani',
+    'xpcs',
+    'rg',
+    )
+"""Terms of the `REMARK energies` line written by CNS, in order."""
+
+
+def read_remarks(pdb_f: FilePath) -> list[str]:
+    """
+    Read the REMARK lines of the PDB header.
+
+    CNS writes its REMARKs before the coordinates, so the file is only
+    read until the first coordinate record.
+    """
+    remarks: list[str] = []
+    with open(pdb_f) as fh:
+        for line in fh:
+            if line.startswith('REMARK'):
+                remarks.append(line.rstrip())
+            elif line.startswith(('ATOM  ', 'HETATM', 'MODEL ')):
+                break
+    return remarks
+
+
+def parse_energies(remarks: Iterable[str]) -> dict[str, float]:
+    """Parse the energies written by CNS in the REMARK lines."""
+    energy_dic: dict[str, float] = {}
+    for line in remarks:
+        # TODO: use regex to do this
+        if 'energies' in line:
+            energy_values = map(float, line.split(':')[-1].split(','))
+            energy_dic.update(zip(ENERGY_TERMS, energy_values))
+        if 'buried surface area' in line:
+            energy_dic['bsa'] = float(line.split(':')[-1])
+        if 'Desolvation energy' in line:
+            energy_dic['desolv'] = float(line.split(':')[-1])
+        if 'Symmetry energy' in line:
+            energy_dic['sym'] = float(line.split(':')[-1])
+    return energy_dic
+
+
+def parse_interface_scores(
+        remarks: Iterable[str],
+        ) -> dict[str, dict[str, float]]:
+    """
+    Parse the per interface scores written by CNS in the REMARK lines.
+
+    Returns
+    -------
+    interfaces_scores : dict[str, dict[str, float]]
+        Scores of each interface, keyed by `<chain1>_<chain2>`.
+    """
+    header = None
+    interfaces_scores: dict[str, dict[str, float]] = {}
+    for line in remarks:
+        if line.startswith('REMARK Interface'):
+            s_ = line.strip().split()[2:]
+            # Extract header
+            if not header:
+                header = s_
+                continue
+            # Extract data
+            chain1 = s_[header.index('Chain1')]
+            chain2 = s_[header.index('Chain2')]
+            # Combine chains together
+            interfaces_scores[f"{chain1}_{chain2}"] = {
+                key: float(s_[header.index(key)])
+                for key in ('HADDOCKscore', 'Evdw', 'Eelec', 'Edesol', 'BSA')
+                }
+    return interfaces_scores
 
 
 class HaddockModel:
     """Represent HADDOCK model."""
 
     def __init__(self, pdb_f: FilePath) -> None:
-        self.energies = self._load_energies(pdb_f)
+        remarks = read_remarks(pdb_f)
+        self.energies = parse_energies(remarks)
+        self.interface_scores = parse_interface_scores(remarks)
 
     @staticmethod
     def _load_energies(pdb_f: FilePath) -> dict[str, float]:
-        energy_dic: dict[str, float] = {}
-        with open(pdb_f) as fh:
-            for line in fh.readlines():
-                if line.startswith('REMARK'):
-                    # TODO: use regex to do this
-                    if 'energies' in line:
-                        energy_values = map(
-                            float,
-                            line.rstrip().split(':')[-1].split(',')
-                            )
-                        total, bonds, angles, improper, dihe, vdw, elec, air, cdih, coup, rdcs, vean, dani, xpcs, rg = energy_values  # noqa: E501
-                        energy_dic['total'] = total
-                        energy_dic['bonds'] = bonds
-                        energy_dic['angles'] = angles
-                        energy_dic['improper'] = improper
-                        energy_dic['dihe'] = dihe
-                        energy_dic['vdw'] = vdw
-                        energy_dic['elec'] = elec
-                        energy_dic['air'] = air
-                        energy_dic['cdih'] = cdih
-                        energy_dic['coup'] = coup
-                        energy_dic['rdcs'] = rdcs
-                        energy_dic['vean'] = vean
-                        energy_dic['dani'] = dani
-                        energy_dic['xpcs'] = xpcs
-                        energy_dic['rg'] = rg
-                    if 'buried surface area' in line:
-                        bsa = float(line.rstrip().split(':')[-1])
-                        energy_dic['bsa'] = bsa
-                    if 'Desolvation energy' in line:
-                        desolv = float(line.rstrip().split(':')[-1])
-                        energy_dic['desolv'] = desolv
-                    if 'Symmetry energy' in line:
-                        sym = float(line.rstrip().split(':')[-1])
-                        energy_dic['sym'] = sym
-
-        return energy_dic
+        return parse_energies(read_remarks(pdb_f))
 
     def calc_haddock_score(self, **weights: float) -> float:
         """Calculate the haddock score based on the weights and energies."""
@@ -61,3 +114,52 @@ class HaddockModel:
         # the haddock score is simply the sum of the weighted terms
         haddock_score = sum(weighted_terms)
         return haddock_score
+
+
+def score_models(
+        models: Iterable[PDBFile],
+        **weights: float,
+        ) -> dict[str, dict[str, dict[str, float]]]:
+    """
+    Read the energies of the generated models and score them.
+
+    Each model file is read once, up to its coordinates. The HADDOCK
+    scores of all the models are computed together from the matrix of
+    their energies. Sets the `unw_energies` and `score` of the models
+    that exist on disk.
+
+    Parameters
+    ----------
+    models : iterable of :py:class:`haddock.libs.libontology.PDBFile`
+        The models to score.
+
+    weights : float
+        The weights of the energy terms, as `w_<term>=<weight>`.
+
+    Returns
+    -------
+    dict
+        The per interface scores of each model, keyed by file name, see
+        :py:func:`parse_interface_scores`.
+    """
+    models = list(models)
+    found = find_present(models)
+    present = [model for model in models if id(model) in found]
+    haddock_models = [HaddockModel(model.file_name) for model in present]
+    components = [key.split('_')[1] for key in weights]
+    energies = np.array(
+        [[hm.energies[c] for c in components] for hm in haddock_models],
+        dtype=float,
+        ).reshape(len(present), len(components))
+
+    # adds the weighted terms in order, as HaddockModel.calc_haddock_score
+    scores = np.zeros(len(present))
+    for column, weight in zip(energies.T, weights.values()):
+        scores += column * weight
+
+    interface_scores: dict[str, dict[str, dict[str, float]]] = {}
+    for model, haddock_model, score in zip(present, haddock_models, scores):
+        model.unw_energies = haddock_model.energies
+        model.score = float(score)
+        interface_scores[model.file_name] = haddock_model.interface_scores
+    return interface_scores
@@ -5,6 +5,7 @@ https://github.com/haddocking/haddock25/blob/main/tools/check-error-messages.sh
 """
 
 import gzip
+import re
 from io import BufferedReader
 from pathlib import Path
 
@@ -61,6 +62,12 @@ KNOWN_ERRORS = {
     }
 
 
+KNOWN_ERRORS_REGEX = re.compile(
+    b"|".join(re.escape(error.encode()) for error in KNOWN_ERRORS)
+    )
+"""Matches any of the :py:data:`KNOWN_ERRORS` in the CNS output bytes."""
+
+
 def find_cns_errors(cns_out_fpath: FilePath) -> Optional[KnownCNSError]:
     """Detect if a known CNS error is in a cns.cnserr file.
 
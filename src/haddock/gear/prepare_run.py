@@ -69,6 +69,7 @@ from haddock.gear.yaml2cfg import (
     find_incompatible_parameters,
     )
 from haddock.gear.zerofill import zero_fill
+from haddock.libs.libcatalog import CATALOG_FILE, RunCatalog
 from haddock.libs.libfunc import not_none
 from haddock.libs.libio import make_writeable_recursive
 from haddock.libs.libutil import (
@@ -215,6 +216,7 @@ def setup_run(
     workflow_path: FilePath,
     restart_from: Optional[int] = None,
     extend_run: Optional[FilePath] = None,
+    resume: bool = False,
 ) -> tuple[ParamDict, ParamDict]:
     """
     Set up an HADDOCK3 run.
@@ -238,7 +240,8 @@ def setup_run(
 
     Performed when ``--restart``:
 
-    #. remove folders after --restart number
+    #. remove folders after --restart number, keeping the folder of
+       the restart step with ``--resume``
     #. remove also folders from `data/` dir after the ``--restart`` num
     #. renumber step folders according to the number of modules
 
@@ -267,12 +270,19 @@ def setup_run(
         The path created with `haddock3-copy` to start the run from.
         Defaults to None, which ignores this option.
 
+    resume : bool
+        Whether to keep the folder of the `restart_from` step, so that
+        only its missing models are generated. Requires `restart_from`.
+
     Returns
     -------
     tuple of two dicts
         A dictionary with the parameters for the haddock3 modules.
         A dictionary with the general run parameters.
     """
+    if resume and restart_from is None:
+        raise ConfigurationError("`--resume` requires the `--restart` option.")
+
     # read the user config file from path
     config_files = read_config(workflow_path)
 
@@ -330,9 +340,14 @@ def setup_run(
         check_mandatory_argments_are_present(general_params)
 
     if restarting_from:
-        remove_folders_after_number(general_params[RUNDIR], restart_from)
+        remove_folders_after_number(
+            general_params[RUNDIR],
+            restart_from + 1 if resume else restart_from,
+            )
         _data_dir = Path(general_params[RUNDIR], "data")
         remove_folders_after_number(_data_dir, restart_from)
+        if Path(_data_dir, CATALOG_FILE).exists():
+            RunCatalog(Path(_data_dir, CATALOG_FILE)).remove_steps(restart_from)
 
     if restarting_from or starting_from_copy:
         # get run files in folder
@@ -10,6 +10,10 @@ from haddock.modules import get_module_steps_folders
 _help_cli = """Restart the run from a given step. Previous folders from
 the selected step onward will be deleted."""
 
+_help_resume = """With `--restart`, keep the models already generated by the
+restart step and run only the missing ones. Use it to finish a step that
+was interrupted."""
+
 
 _arg_non_neg_int = partial(
     non_negative_int,
@@ -28,6 +32,15 @@ def add_restart_arg(parser: ArgumentParser) -> None:
         )
 
 
+def add_resume_arg(parser: ArgumentParser) -> None:
+    """Add `--resume` option to argument parser."""
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=_help_resume,
+        )
+
+
 def remove_folders_after_number(run_dir: Path, num: int) -> None:
     """
     Remove calculation folder after (included) a given number.
@@ -7,20 +7,26 @@ Main functions
 * :py:func:`calc_rmsd`
 * :py:func:`centroid`
 * :py:func:`kabsch`
+* :py:func:`superpose_rmsd`
 * :py:func:`load_coords`
 * :py:func:`pdb2fastadic`
 * :py:func:`get_atoms`
 * :py:func:`get_align`
 * :py:func:`align_struct`
 * :py:func:`align_seq`
+* :py:class:`AlignmentCache`
 * :py:func:`make_range`
 * :py:func:`dump_as_izone`
 """
 
+import hashlib
 import os
+import pickle
 import shlex
+import sqlite3
 import subprocess
-from functools import partial
+from contextlib import closing
+from functools import lru_cache, partial
 from pathlib import Path
 
 import numpy as np
@@ -29,20 +35,18 @@ from Bio.Align import substitution_matrices
 from Bio.Seq import Seq
 
 from haddock import log
-from haddock.core.typing import AtomsDict, FilePath, Literal, NDFloat, Optional
+from haddock.core.typing import (
+    AtomsDict,
+    FilePath,
+    Literal,
+    NDArray,
+    NDFloat,
+    Optional,
+    Union,
+    )
 from haddock.libs.libio import pdb_path_exists
 from haddock.libs.libontology import PDBFile, PDBPath
-from haddock.libs.libpdb import (
-    slc_chainid,
-    slc_element,
-    slc_name,
-    slc_resname,
-    slc_resseq,
-    slc_x,
-    slc_y,
-    slc_z,
-    split_by_chain,
-    )
+from haddock.libs.libpdb import read_structure, split_by_chain
 
 
 RES_TO_BE_IGNORED = ["SHA", "WAT"]
@@ -380,16 +384,16 @@ def calc_rmsd(V: NDFloat, W: NDFloat) -> float:
 
     Parameters
     ----------
-    V : np.array dtype=float, shape=(n_atoms,3)
-    W : np.array dtype=float, shape=(n_atoms,3)
+    V : np.array dtype=float, shape=(n_atoms,3) or (n_models,n_atoms,3)
+    W : np.array dtype=float, shape=(n_atoms,3) or (n_models,n_atoms,3)
 
     Returns
     -------
-    rmsd : float
+    rmsd : float, or np.array of shape (n_models,) for stacked models
     """
-    diff = np.array(V) - np.array(W)
-    N = len(V)
-    rmsd = np.sqrt((diff * diff).sum() / N)
+    diff = np.asarray(V) - np.asarray(W)
+    N = diff.shape[-2]
+    rmsd = np.sqrt((diff * diff).sum(axis=(-2, -1)) / N)
     return rmsd
 
 
@@ -397,27 +401,27 @@ def kabsch(P: NDFloat, Q: NDFloat) -> NDFloat:
     """
     Find the rotation matrix using Kabsch algorithm.
 
+    The rotations of stacked models are found together.
+
     Parameters
     ----------
-    P : np.array dtype=float, shape=(n_atoms,3)
-    Q : np.array dtype=float, shape=(n_atoms,3)
+    P : np.array dtype=float, shape=(n_atoms,3) or (n_models,n_atoms,3)
+    Q : np.array dtype=float, shape=(n_atoms,3) or (n_models,n_atoms,3)
 
     Returns
     -------
-    U : np.array dtype=float, shape=(3,3)
+    U : np.array dtype=float, shape=(3,3) or (n_models,3,3)
     """
     # Covariance matrix
-    P = np.array(P)
-    Q = np.array(Q)
-    C = np.dot(np.transpose(P), Q)
+    P = np.asarray(P)
+    Q = np.asarray(Q)
+    C = np.swapaxes(P, -2, -1) @ Q
     # use SVD
     V, S, W = np.linalg.svd(C)
     d = (np.linalg.det(V) * np.linalg.det(W)) < 0.0
-    if d:
-        S[-1] = -S[-1]
-        V[:, -1] = -V[:, -1]
+    V[..., -1] = np.where(d[..., np.newaxis], -V[..., -1], V[..., -1])
     # Create Rotation matrix U
-    U = np.dot(V, W)
+    U = V @ W
     return U
 
 
@@ -427,17 +431,63 @@ def centroid(X: NDFloat) -> NDFloat:
 
     Parameters
     ----------
-    X : np.array dtype=float, shape=(n_atoms,3)
+    X : np.array dtype=float, shape=(n_atoms,3) or (n_models,n_atoms,3)
 
     Returns
     -------
-    C : np.array dtype=float, shape=(3,)
+    C : np.array dtype=float, shape=(3,) or (n_models,3)
     """
-    X = np.array(X)
-    C = X.mean(axis=0)
+    X = np.asarray(X)
+    C = X.mean(axis=-2)
     return C
 
 
+def superpose_rmsd(
+        P: NDFloat,
+        Q: NDFloat,
+        fit: Optional[Union[slice, NDArray]] = None,
+        measure: Optional[Union[slice, NDArray]] = None,
+        ) -> NDFloat:
+    """
+    Superpose models on a reference and calculate their RMSD.
+
+    The models are moved to the centroid of their `fit` atoms and
+    rotated to minimize the RMSD of those atoms to the reference, then
+    the RMSD is calculated over the `measure` atoms. Models stacked in
+    a single array are superposed at once.
+
+    Parameters
+    ----------
+    P : np.array dtype=float, shape=(n_atoms,3) or (n_models,n_atoms,3)
+        The coordinates of the models.
+
+    Q : np.array dtype=float, shape=(n_atoms,3) or (n_models,n_atoms,3)
+        The coordinates of the reference, in the same atom order.
+
+    fit : slice or np.array, optional
+        The atoms used for the superposition, as a slice, indices or a
+        boolean mask. Defaults to all the atoms.
+
+    measure : slice or np.array, optional
+        The atoms used for the RMSD. Defaults to all the atoms.
+
+    Returns
+    -------
+    rmsd : float, or np.array of shape (n_models,) for stacked models
+    """
+    P = np.asarray(P)
+    Q = np.asarray(Q)
+    all_atoms = slice(None)
+    fit = all_atoms if fit is None else fit
+    measure = all_atoms if measure is None else measure
+
+    P = P - centroid(P[..., fit, :])[..., np.newaxis, :]
+    Q = Q - centroid(Q[..., fit, :])[..., np.newaxis, :]
+    U = kabsch(P[..., fit, :], Q[..., fit, :])
+    P = P @ U
+    return calc_rmsd(P[..., measure, :], Q[..., measure, :])
+
+
 def load_coords(
     pdb_f,
     atoms,
@@ -479,72 +529,68 @@ def load_coords(
     if isinstance(pdb_f, PDBFile):
         pdb_f = pdb_f.rel_path
     # Read file
-    with open(pdb_f, "r") as fh:
-        for line in fh.readlines():
-            # Skip non ATOM records lines
-            if not line.startswith("ATOM"):
+    structure = read_structure(pdb_f)
+    is_atom = structure.atoms["record"] == "ATOM"
+    records = structure.atoms[is_atom]
+    xyz = structure.xyz[is_atom]
+    for i, (atom_name, resname, chain, resnum) in enumerate(zip(
+            records["name"].tolist(),
+            records["resname"].tolist(),
+            records["chain"].tolist(),
+            records["resseq"].astype(np.int64).tolist(),
+            )):
+        # Skip entries to be ignored
+        if resname in RES_TO_BE_IGNORED:
+            continue
+        else:
+            if atom_name not in atoms[resname]:
                 continue
-            # Extract PDB line data
-            atom_name = line[slc_name].strip()
-            resname = line[slc_resname].strip()
-            # Skip entries to be ignored
-            if resname in RES_TO_BE_IGNORED:
+        coords = xyz[i]
+        # Remap chain name
+        if model2ref_chain_dict:
+            # Skip chain matching if not present in reference structure
+            if chain not in model2ref_chain_dict.keys():
                 continue
-            else:
-                if atom_name not in atoms[resname]:
-                    continue
-            # Continue parsing of the PDB line
-            chain = line[slc_chainid]
-            resnum = int(line[slc_resseq])
-            x = float(line[slc_x])
-            y = float(line[slc_y])
-            z = float(line[slc_z])
-            coords = np.asarray([x, y, z])
-            # Remap chain name
-            if model2ref_chain_dict:
-                # Skip chain matching if not present in reference structure
-                if chain not in model2ref_chain_dict.keys():
+            chain = model2ref_chain_dict[chain]
+
+            if numbering_dic:
+                try:
+                    resnum = numbering_dic[chain][resnum]
+                except KeyError:
+                    # this residue is not matched, and so it should
+                    #  not be considered
+                    # self.log(
+                    #     f"WARNING: {chain}.{resnum}.{atom_name}"
+                    #     " was not matched!"
+                    #     )
                     continue
-                chain = model2ref_chain_dict[chain]
-
-                if numbering_dic:
-                    try:
-                        resnum = numbering_dic[chain][resnum]
-                    except KeyError:
-                        # this residue is not matched, and so it should
-                        #  not be considered
-                        # self.log(
-                        #     f"WARNING: {chain}.{resnum}.{atom_name}"
-                        #     " was not matched!"
-                        #     )
-                        continue
-
-            # Create identifier tuple
-            if add_resname is True:
-                identifier = (chain, resnum, atom_name, resname)
-            else:
-                identifier = (chain, resnum, atom_name)
-            # Create empty chain entries
-            if chain not in chain_dic.keys():
-                if filter_resdic:
-                    if chain in filter_resdic.keys():
-                        chain_dic[chain] = []
-                else:
-                    chain_dic[chain] = []
 
-            # Check if must eventually filter this entry
+        # Create identifier tuple
+        if add_resname is True:
+            identifier = (chain, resnum, atom_name, resname)
+        else:
+            identifier = (chain, resnum, atom_name)
+        # Create empty chain entries
+        if chain not in chain_dic.keys():
             if filter_resdic:
-                # Only retrieve coordinates from the filter_resdic
                 if chain in filter_resdic.keys():
-                    if resnum in filter_resdic[chain]:
-                        coord_dic[identifier] = coords
-                        chain_dic[chain].append(idx)
-                        idx += 1
+                    chain_dic[chain] = []
             else:
-                # retrieve everything
-                coord_dic[identifier] = coords
-                chain_dic[chain].append(idx)
-                idx += 1
+                chain_dic[chain] = []
+
+        # Check if must eventually filter this entry
+        if filter_resdic:
+            # Only retrieve coordinates from the filter_resdic
+            if chain in filter_resdic.keys():
+                if resnum in filter_resdic[chain]:
+                    coord_dic[identifier] = coords
+                    chain_dic[chain].append(idx)
+                    idx += 1
+        else:
+            # retrieve everything
+            coord_dic[identifier] = coords
+            chain_dic[chain].append(idx)
+            idx += 1
 
     # Obtain chain ranges
     chain_ranges: ChainsRange = {}
@@ -605,33 +651,33 @@ def get_atoms(pdb: PDBPath, full: bool = False) -> AtomsDict:
     if not exists:
         raise Exception(msg)
 
-    with open(pdb) as fh:
-        for line in fh.readlines():
-            if line.startswith(("ATOM", "HETATM")):
-                resname = line[slc_resname].strip()
-                atom_name = line[slc_name].strip()
-                element = line[slc_element].strip()
-                if all(
-                    [
-                        resname not in PROT_RES,
-                        resname not in DNA_RES,
-                        resname not in RNA_RES,
-                        resname not in RES_TO_BE_IGNORED,
-                    ]
-                ):
-                    # its neither DNA/RNA nor protein, use the heavy atoms
-                    # WARNING: Atoms that belong to unknown residues must
-                    #  be bound to a residue name;
-                    #   For example: residue NEP, also contains
-                    #  CB and CG atoms, if we do not bind it to the
-                    #  residue name, the next functions will include
-                    #  CG and CG atoms in the calculations for all
-                    #  other residue names
-                    if element != "H":
-                        if resname not in atom_dic:
-                            atom_dic[resname] = []
-                        if atom_name not in atom_dic[resname]:
-                            atom_dic[resname].append(atom_name)
+    structure = read_structure(pdb).atoms
+    for resname, atom_name, element in dict.fromkeys(zip(
+            structure["resname"].tolist(),
+            structure["name"].tolist(),
+            structure["element"].tolist(),
+            )):
+        if all(
+            [
+                resname not in PROT_RES,
+                resname not in DNA_RES,
+                resname not in RNA_RES,
+                resname not in RES_TO_BE_IGNORED,
+            ]
+        ):
+            # its neither DNA/RNA nor protein, use the heavy atoms
+            # WARNING: Atoms that belong to unknown residues must
+            #  be bound to a residue name;
+            #   For example: residue NEP, also contains
+            #  CB and CG atoms, if we do not bind it to the
+            #  residue name, the next functions will include
+            #  CG and CG atoms in the calculations for all
+            #  other residue names
+            if element != "H":
+                if resname not in atom_dic:
+                    atom_dic[resname] = []
+                if atom_name not in atom_dic[resname]:
+                    atom_dic[resname].append(atom_name)
     return atom_dic
 
 
@@ -742,26 +788,29 @@ def pdb2fastadic(pdb_f: PDBPath) -> dict[str, dict[int, str]]:
     if isinstance(pdb_f, PDBFile):
         pdb_f = pdb_f.rel_path
 
-    with open(pdb_f) as fh:
-        for line in fh.readlines():
-            if line.startswith("ATOM"):
-                res_num = int(line[slc_resseq])
-                res_name = line[slc_resname].strip()
-                chain = line[slc_chainid]
-                if res_name in RES_TO_BE_IGNORED:
-                    continue
-                try:
-                    one_letter = res_codes[res_name]
-                except KeyError:
-                    one_letter = "X"
-                if chain not in seq_dic:
-                    seq_dic[chain] = {}
-                seq_dic[chain][res_num] = one_letter
+    structure = read_structure(pdb_f).atoms
+    records = structure[structure["record"] == "ATOM"]
+    for chain, res_num, res_name in zip(
+            records["chain"].tolist(),
+            records["resseq"].astype(np.int64).tolist(),
+            records["resname"].tolist(),
+            ):
+        if res_name in RES_TO_BE_IGNORED:
+            continue
+        try:
+            one_letter = res_codes[res_name]
+        except KeyError:
+            one_letter = "X"
+        if chain not in seq_dic:
+            seq_dic[chain] = {}
+        seq_dic[chain][res_num] = one_letter
     return seq_dic
 
 
 def get_align(
-    method: str, lovoalign_exec: FilePath
+    method: str,
+    lovoalign_exec: FilePath,
+    cache_file: Optional[FilePath] = None,
 ) -> partial[dict[str, dict[int, int]]]:
     """
     Get the alignment function.
@@ -774,6 +823,10 @@ def get_align(
     lovoalign_exec : str
         Path to the lovoalign executable.
 
+    cache_file : str or pathlib.Path, optional
+        Where to keep the sequence alignments, see
+        :py:class:`AlignmentCache`.
+
     Returns
     -------
     align_func : functools.partial
@@ -783,7 +836,7 @@ def get_align(
     if method == "structure":
         align_func = partial(align_strct, lovoalign_exec=lovoalign_exec)
     elif method == "sequence":
-        align_func = partial(align_seq)
+        align_func = partial(align_seq, cache_file=cache_file)
     else:
         available_alns = ("sequence", "structure")
         raise ValueError(
@@ -945,8 +998,8 @@ def write_alignment(top_aln, output_path, ref_ch):
 
     Parameters
     ----------
-    top_aln : Bio.Align.PairwiseAlignments
-        alignment object
+    top_aln : Bio.Align.PairwiseAlignments or str
+        alignment object, or its text
 
     ref_ch : str
         reference chain
@@ -958,6 +1011,13 @@ def write_alignment(top_aln, output_path, ref_ch):
     return aln_fname
 
 
+@lru_cache(maxsize=1)
+def _blosum62_aligner() -> Align.PairwiseAligner:
+    aligner = Align.PairwiseAligner()
+    aligner.substitution_matrix = substitution_matrices.load("BLOSUM62")
+    return aligner
+
+
 def sequence_alignment(seq_ref, seq_model):
     """
     Perform a sequence alignment.
@@ -984,9 +1044,7 @@ def sequence_alignment(seq_ref, seq_model):
     aln_mod_seg : tuple
         aligned model segment
     """
-    aligner = Align.PairwiseAligner()
-    aligner.substitution_matrix = substitution_matrices.load("BLOSUM62")
-    alns = aligner.align(seq_ref, seq_model)
+    alns = _blosum62_aligner().align(seq_ref, seq_model)
     top_aln = alns[0]
 
     aln_denom = min(len(seq_ref), len(seq_model))
@@ -1082,10 +1140,93 @@ class SeqAlign:
                     self.align_dic[ref_ch].update({_model_res: _ref_res})
 
 
-def align_seq(reference, model, output_path):
+ALIGNMENT_CACHE_FILE = "alignments.db"
+"""Name of the file keeping the sequence alignments of a step."""
+
+ALIGNMENT_CACHE_VERSION = 1
+"""Version of the cached alignments, part of every key."""
+
+_alignments: dict[tuple, tuple[dict, dict, dict, dict]] = {}
+
+
+class AlignmentCache:
+    """Sequence alignments of the models of a step."""
+
+    def __init__(self, path: Optional[FilePath] = None) -> None:
+        """
+        Sequence alignments of the models of a step.
+
+        The alignment of a model to the reference depends only on their
+        chain sequences and residue numbering, which the models of a run
+        usually share. Alignments are kept in memory by each process,
+        and in an SQLite database shared by the processes, so that the
+        models of a step are aligned once.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path, optional
+            The alignments database. If not given, alignments are kept
+            only in memory.
+        """
+        self.path = None if path is None else Path(path).resolve()
+
+    @staticmethod
+    def key(
+        seqdic_ref: dict[str, dict[int, str]],
+        seqdic_model: dict[str, dict[int, str]],
+    ) -> str:
+        """Identify an alignment by the sequences of the structures."""
+        seqs = repr((ALIGNMENT_CACHE_VERSION, seqdic_ref, seqdic_model))
+        return hashlib.sha256(seqs.encode()).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        # the workers of a step write at the same time
+        db = sqlite3.connect(self.path, timeout=60)  # type: ignore
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS alignments "
+            "(key TEXT PRIMARY KEY, value BLOB)"
+            )
+        return db
+
+    def get(self, key: str) -> Optional[tuple[dict, dict, dict, dict]]:
+        """
+        Give a cached alignment.
+
+        Returns
+        -------
+        tuple or None
+            The `align_dic`, `model2ref_chain_dict`,
+            `ref2model_chain_dict` and the text of the alignment of each
+            reference chain, `None` if it is not cached.
+        """
+        mem_key = (self.path, key)
+        if mem_key not in _alignments and self.path and self.path.exists():
+            with closing(self._connect()) as db:
+                row = db.execute(
+                    "SELECT value FROM alignments WHERE key = ?", (key,)
+                    ).fetchone()
+            if row is not None:
+                _alignments[mem_key] = pickle.loads(row[0])
+        return _alignments.get(mem_key)
+
+    def put(self, key: str, alignment: tuple[dict, dict, dict, dict]) -> None:
+        """Keep an alignment, see :py:meth:`get`."""
+        _alignments[(self.path, key)] = alignment
+        if self.path:
+            with closing(self._connect()) as db, db:
+                db.execute(
+                    "INSERT OR IGNORE INTO alignments VALUES (?, ?)",
+                    (key, pickle.dumps(alignment)),
+                    )
+
+
+def align_seq(reference, model, output_path, cache_file=None):
     """
     Sequence align and get the numbering relationship.
 
+    Alignments are reused for models with the same sequences, see
+    :py:class:`AlignmentCache`.
+
     Parameters
     ----------
     reference : PosixPath or :py:class:`haddock.libs.libontology.PDBFile`
@@ -1094,6 +1235,9 @@ def align_seq(reference, model, output_path):
 
     output_path : Path
 
+    cache_file : str or pathlib.Path, optional
+        The alignments database of the step.
+
     Returns
     -------
     align_dic : dict
@@ -1104,6 +1248,20 @@ def align_seq(reference, model, output_path):
     SeqAln.seqdic_ref = pdb2fastadic(reference)
     SeqAln.seqdic_model = pdb2fastadic(model)
 
+    cache = AlignmentCache(cache_file)
+    key = cache.key(SeqAln.seqdic_ref, SeqAln.seqdic_model)
+    cached = cache.get(key)
+    if cached is not None:
+        # write the same files as the alignment
+        align_dic, model2ref_chain_dict, ref2model_chain_dict, texts = cached
+        for ref_ch, text in texts.items():
+            write_alignment(text, output_path, ref_ch)
+        izone_fname = Path(output_path, "blosum62.izone")
+        dump_as_izone(izone_fname, align_dic, ref2model_chain_dict)
+        return align_dic, model2ref_chain_dict
+
+    aln_texts: dict[str, str] = {}
+
     # assign sequences
     for ref_ch in SeqAln.seqdic_ref.keys():
         ref_seq = Seq("".join(SeqAln.seqdic_ref[ref_ch].values()))
@@ -1154,6 +1312,7 @@ def align_seq(reference, model, output_path):
 
             # writing the alignment
             write_alignment(top_alns[max_idx], output_path, ref_ch)
+            aln_texts[ref_ch] = str(top_alns[max_idx])
 
             # postprocess alignment
             SeqAln.postprocess_alignment(ref_ch, mod_ch, matches)
@@ -1186,6 +1345,7 @@ def align_seq(reference, model, output_path):
             SeqAln.top_alns.append(top_aln)
             # write alignment
             write_alignment(top_aln, output_path, ref_ch)
+            aln_texts[ref_ch] = str(top_aln)
             # postprocess alignment
             SeqAln.postprocess_alignment(ref_ch, ref_ch, matches)
             matches += 1
@@ -1194,6 +1354,15 @@ def align_seq(reference, model, output_path):
     log.debug(f"Saving .izone to {izone_fname.name}")
     dump_as_izone(izone_fname, SeqAln.align_dic, SeqAln.ref2model_chain_dict)
 
+    cache.put(
+        key,
+        (
+            SeqAln.align_dic,
+            SeqAln.model2ref_chain_dict,
+            SeqAln.ref2model_chain_dict,
+            aln_texts,
+        ),
+    )
     return SeqAln.align_dic, SeqAln.model2ref_chain_dict
 
 
@@ -0,0 +1,210 @@
+"""Module in charge of running subprocess tasks from an asyncio event loop."""
+
+import asyncio
+import shlex
+import time
+from os import cpu_count
+from pathlib import Path
+
+from haddock import log
+from haddock.core.exceptions import SetupError
+from haddock.core.typing import (
+    Any,
+    Callable,
+    FilePath,
+    Iterable,
+    Optional,
+    Sized,
+    SupportsRunT,
+    Union,
+    )
+from haddock.libs.libsubprocess import BaseJob, CNSJob
+from haddock.libs.libtelemetry import (
+    TaskStats,
+    report_tasks,
+    task_input,
+    worker_name,
+    )
+
+
+async def run_cns_job(job: CNSJob) -> bytes:
+    """
+    Run a CNS job as an asyncio subprocess.
+
+    The output is saved and checked with
+    :py:meth:`haddock.libs.libsubprocess.CNSJob.process_output` in a
+    thread, so file compression does not block the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    if isinstance(job.input_file, str):
+        proc = await asyncio.create_subprocess_exec(
+            job.cns_exec,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=job.envvars,
+        )
+        out, error = await proc.communicate(input=job.input_file.encode())
+    else:
+        with open(Path(job.input_file)) as inp:
+            proc = await asyncio.create_subprocess_exec(
+                job.cns_exec,
+                stdin=inp,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env=job.envvars,
+            )
+            out, error = await proc.communicate()
+
+    return await loop.run_in_executor(None, job.process_output, out, error)
+
+
+async def run_job(job: BaseJob) -> None:
+    """Run a :py:class:`haddock.libs.libsubprocess.BaseJob` subprocess."""
+    job.make_cmd()
+    with open(job.output, "w") as outf:
+        proc = await asyncio.create_subprocess_exec(
+            *shlex.split(job.cmd),
+            stdout=outf,
+        )
+        await proc.wait()
+
+
+class AsyncScheduler:
+    """Schedules subprocess tasks in a single asyncio event loop."""
+
+    def __init__(
+        self,
+        tasks: Iterable[SupportsRunT],
+        ncores: Optional[Union[int, str]] = None,
+        max_cpus: bool = False,
+        callback: Optional[Callable[[int, Any], None]] = None,
+        stats_file: Optional[FilePath] = None,
+    ) -> None:
+        """
+        Run tasks concurrently without one Python process per task.
+
+        :py:class:`haddock.libs.libsubprocess.CNSJob`, `Job` and
+        `JobInputFirst` tasks are executed directly as asyncio
+        subprocesses. Any other task is run in a thread of the event
+        loop's default executor. At most `ncores` tasks run at the same
+        time, and the next task is only taken from `tasks` when one of
+        them finishes, so `tasks` can be a generator.
+
+        Parameters
+        ----------
+        tasks : iterable
+            The tasks to execute. Tasks must have method `run()`.
+
+        ncores : None or int
+            The maximum number of concurrent tasks. Unlike the
+            :py:class:`haddock.libs.libparallel.Scheduler`, this number
+            is not truncated to the available CPUs, so I/O-bound steps
+            can be oversubscribed. If `None` is given, uses the number
+            of CPUs allowed according to `max_cpus`.
+
+        max_cpus : bool
+            If `ncores` is `None`, use all CPUs when `True`, or all
+            CPUs minus one when `False`.
+
+        callback : callable, optional
+            A function receiving `(index, result)` for every task as
+            soon as it finishes. When given, results are not kept in
+            `results`.
+
+        stats_file : str or pathlib.Path, optional
+            Where to save the resources used by each task, see
+            :py:func:`haddock.libs.libtelemetry.report_tasks`. As the
+            subprocesses run concurrently in the same process, only the
+            wall time of each task is measured.
+        """
+        self.tasks = tasks
+        self.callback = callback
+        self.stats_file = stats_file
+        self.stats: list[TaskStats] = []
+        # the number of tasks of a generator is known once consumed
+        self.num_tasks = len(tasks) if isinstance(tasks, Sized) else None
+        self.max_cpus = max_cpus
+        self.concurrency = ncores  # type: ignore
+        self.results: list[Any] = []
+
+        log.info(f"Running up to {self.concurrency} concurrent tasks")
+        if self.num_tasks is not None:
+            log.debug(f"{self.num_tasks} tasks ready.")
+
+    @property
+    def concurrency(self) -> int:
+        """Maximum number of concurrent tasks."""
+        return self._concurrency
+
+    @concurrency.setter
+    def concurrency(self, n: Optional[Union[int, str]]) -> None:
+        if n is None:
+            ncpus = cpu_count() or 1
+            self._concurrency = ncpus if self.max_cpus else max(ncpus - 1, 1)
+            return
+
+        try:
+            n = int(n)
+        except (TypeError, ValueError) as err:
+            _msg = f"`n` must be `int` or `int`-convertable `str`: {n!r} given."
+            raise SetupError(_msg) from err
+
+        if n < 1:
+            _msg = f"`n` is not positive, this is not possible: {n!r}"
+            raise SetupError(_msg)
+
+        self._concurrency = n
+
+    async def _run_task(self, idx: int, task: SupportsRunT) -> Any:
+        stats = TaskStats(idx, task_input(task), worker_name())
+        self.stats.append(stats)
+        start = time.perf_counter()
+        try:
+            # cached jobs go through `CNSJob.run` in the executor
+            if isinstance(task, CNSJob) and task.cache_dir is None:
+                return await run_cns_job(task)
+            elif isinstance(task, BaseJob):
+                return await run_job(task)
+            else:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(None, task.run)
+        except Exception as e:
+            log.warning(f"Exception in task execution: {e}")
+            stats.status = "failed"
+            return None
+        finally:
+            stats.wall_time = time.perf_counter() - start
+
+    async def _consume(
+        self,
+        tasks: Iterable[tuple[int, SupportsRunT]],
+        results: dict[int, Any],
+    ) -> None:
+        # the iterator is shared by all consumers of the event loop
+        for idx, task in tasks:
+            result = await self._run_task(idx, task)
+            if self.callback:
+                self.callback(idx, result)
+            else:
+                results[idx] = result
+
+    async def _run_all(self) -> dict[int, Any]:
+        results: dict[int, Any] = {}
+        tasks = enumerate(self.tasks)
+        await asyncio.gather(
+            *(self._consume(tasks, results) for _ in range(self.concurrency))
+        )
+        return results
+
+    def run(self) -> None:
+        """Run tasks concurrently."""
+        # KeyboardInterrupt cancels the pending tasks, asyncio kills
+        # the running subprocesses when the event loop is closed
+        results = asyncio.run(self._run_all())
+        self.num_tasks = len(self.stats)
+        if not self.callback:
+            self.results = [results.get(i) for i in range(self.num_tasks)]
+        log.info(f"{self.num_tasks} tasks finished")
+        if self.stats_file:
+            report_tasks(self.stats, self.stats_file)
@@ -0,0 +1,284 @@
+"""
+Run-wide catalog of the models generated by each step.
+
+Every module records its output models in the `data/catalog.db` SQLite
+database of the run directory when exporting them, see
+:py:meth:`haddock.modules.BaseHaddockModule.export_io_models`. The
+catalog keeps the scores, energies, md5, cluster information and
+provenance of the models of all the steps in indexed tables, so they can
+be queried without reading the files of each step.
+"""
+
+import json
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+from haddock.core.typing import Any, FilePath, Iterable, Optional
+from haddock.libs.libontology import PDBFile
+
+
+CATALOG_FILE = "catalog.db"
+"""Name of the catalog file in the `data` folder of the run directory."""
+
+CATALOG_VERSION = 1
+"""Version of the catalog tables."""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    step_index INTEGER NOT NULL,
+    step TEXT NOT NULL,
+    module TEXT NOT NULL,
+    path TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    parent TEXT,
+    ori_name TEXT,
+    md5 TEXT,
+    score REAL,
+    clt_id,
+    clt_rank INTEGER,
+    clt_model_rank INTEGER,
+    energies TEXT
+    );
+CREATE INDEX IF NOT EXISTS models_score ON models (step_index, score);
+CREATE INDEX IF NOT EXISTS models_path ON models (path, step_index);
+CREATE INDEX IF NOT EXISTS models_cluster
+    ON models (step_index, clt_id, clt_model_rank);
+"""
+
+_STEP_RANK = """
+    (SELECT COUNT(*) FROM models AS other
+     WHERE other.step_index = models.step_index
+     AND other.score < models.score) + 1 AS step_rank
+"""
+
+
+def flatten_models(elements: Iterable[Any]) -> list[PDBFile]:
+    """Give the PDB files of ModuleIO elements, unpacking dictionaries."""
+    models: list[PDBFile] = []
+    for element in elements:
+        values = element.values() if isinstance(element, dict) else [element]
+        models.extend(v for v in values if isinstance(v, PDBFile))
+    return models
+
+
+class RunCatalog:
+    """Catalog of the models of a run."""
+
+    def __init__(self, path: FilePath) -> None:
+        """
+        Catalog of the models of a run.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            The catalog database, created if it does not exist.
+        """
+        self.path = Path(path)
+
+    def _connect(self) -> sqlite3.Connection:
+        # steps of parallel runs may write at the same time
+        db = sqlite3.connect(self.path, timeout=60)
+        db.row_factory = sqlite3.Row
+        version = db.execute("PRAGMA user_version").fetchone()[0]
+        if version > CATALOG_VERSION:
+            db.close()
+            _msg = (
+                f"{self.path} was created by a newer version of haddock3 "
+                f"(version {version}, supported {CATALOG_VERSION})."
+                )
+            raise ValueError(_msg)
+        if version < CATALOG_VERSION:
+            db.executescript(_SCHEMA)
+            db.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+        return db
+
+    def _query(self, sql: str, params: tuple = ()) -> list[dict[str, Any]]:
+        with closing(self._connect()) as db:
+            rows = db.execute(sql, params).fetchall()
+
+        records: list[dict[str, Any]] = []
+        for row in rows:
+            record = dict(row)
+            if record.get("energies") is not None:
+                record["energies"] = json.loads(record["energies"])
+            records.append(record)
+        return records
+
+    def add_step(
+            self,
+            step_index: int,
+            step: str,
+            module: str,
+            models: Iterable[Any],
+            inputs: Iterable[Any] = (),
+            ) -> int:
+        """
+        Record the output models of a step.
+
+        Previous records of the same step are replaced.
+
+        Parameters
+        ----------
+        step_index : int
+            The index of the step in the workflow.
+
+        step : str
+            The name of the step folder.
+
+        module : str
+            The name of the module.
+
+        models : iterable
+            The output of the step, as in `ModuleIO.output`.
+
+        inputs : iterable
+            The input of the step, as in `ModuleIO.input`. The `parent`
+            of each model is the input it was made from, found by its
+            `ori_name` unless the model itself is an input.
+
+        Returns
+        -------
+        int
+            The number of models recorded.
+        """
+        input_models = flatten_models(inputs)
+        input_paths = {str(m.rel_path) for m in input_models}
+        by_name = {m.file_name: str(m.rel_path) for m in input_models}
+
+        rows = []
+        for model in flatten_models(models):
+            path = str(model.rel_path)
+            if path in input_paths:
+                parent: Optional[str] = path
+            else:
+                parent = by_name.get(model.ori_name)  # type: ignore
+            score = model.score if model.score == model.score else None
+            energies = (
+                json.dumps(model.unw_energies)
+                if model.unw_energies is not None
+                else None
+                )
+            rows.append((
+                step_index,
+                step,
+                module,
+                path,
+                model.file_name,
+                parent,
+                model.ori_name,
+                model.md5,
+                score,
+                model.clt_id,
+                model.clt_rank,
+                model.clt_model_rank,
+                energies,
+                ))
+
+        with closing(self._connect()) as db, db:
+            db.execute("DELETE FROM models WHERE step_index = ?", (step_index,))
+            db.executemany(
+                f"INSERT INTO models VALUES ({', '.join('?' * 13)})",
+                rows,
+                )
+        return len(rows)
+
+    def remove_steps(self, start: int) -> None:
+        """Remove the records of the steps from index `start` onwards."""
+        with closing(self._connect()) as db, db:
+            db.execute("DELETE FROM models WHERE step_index >= ?", (start,))
+
+    def steps(self) -> list[dict[str, Any]]:
+        """Give the index, name, module and number of models of the steps."""
+        return self._query(
+            "SELECT step_index, step, module, COUNT(*) AS models "
+            "FROM models GROUP BY step_index ORDER BY step_index"
+            )
+
+    def models(self, step_index: Optional[int] = None) -> list[dict[str, Any]]:
+        """
+        Give the models of all the steps, or of a single step.
+
+        The models are sorted by step and score. `step_rank` is the rank
+        of the model score within its step.
+        """
+        where, params = "", ()
+        if step_index is not None:
+            where, params = "WHERE step_index = ?", (step_index,)
+        return self._query(
+            "SELECT *, RANK() OVER ("
+            " PARTITION BY step_index ORDER BY score IS NULL, score"
+            f") AS step_rank FROM models {where} "
+            "ORDER BY step_index, step_rank",
+            params,
+            )
+
+    def top_models_per_cluster(
+            self,
+            top: int = 10,
+            step_index: Optional[int] = None,
+            ) -> list[dict[str, Any]]:
+        """
+        Give the best models of each cluster.
+
+        Parameters
+        ----------
+        top : int
+            The number of models to give per cluster.
+
+        step_index : int, optional
+            The step to query. Defaults to all the steps with clusters.
+
+        Returns
+        -------
+        list of dict
+            The models sorted by step, cluster rank and rank within the
+            cluster, given in `rank_in_cluster`.
+        """
+        where, params = "", ()
+        if step_index is not None:
+            where, params = "AND step_index = ?", (step_index,)
+        return self._query(
+            "SELECT * FROM ("
+            " SELECT *, ROW_NUMBER() OVER ("
+            "  PARTITION BY step_index, clt_id"
+            "  ORDER BY clt_model_rank IS NULL, clt_model_rank, score"
+            " ) AS rank_in_cluster"
+            f" FROM models WHERE clt_id IS NOT NULL {where}"
+            ") WHERE rank_in_cluster <= ? "
+            "ORDER BY step_index, clt_rank, clt_id, rank_in_cluster",
+            params + (top,),
+            )
+
+    def traceback(self, step_index: int, path: str) -> list[dict[str, Any]]:
+        """
+        Trace a model back to the first step.
+
+        Parameters
+        ----------
+        step_index : int
+            The step of the model.
+
+        path : str
+            The model as its `rel_path`, `../<step>/<file name>`.
+
+        Returns
+        -------
+        list of dict
+            The model and its ancestors, from the given step backwards,
+            with their `step_rank`.
+        """
+        return self._query(
+            "WITH RECURSIVE chain (step_index, path, parent) AS ("
+            " SELECT step_index, path, parent FROM models"
+            " WHERE step_index = ? AND path = ?"
+            " UNION ALL"
+            " SELECT models.step_index, models.path, models.parent"
+            " FROM models JOIN chain"
+            " ON models.step_index = chain.step_index - 1"
+            " AND models.path = chain.parent"
+            ") "
+            f"SELECT models.*, {_STEP_RANK} FROM chain JOIN models "
+            "USING (step_index, path) ORDER BY step_index DESC",
+            (step_index, path),
+            )
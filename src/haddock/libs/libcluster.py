@@ -0,0 +1,398 @@
+"""
+Module in charge of running tasks on worker daemons connected over TCP.
+
+The run coordinator listens on a TCP address and `haddock3-worker`
+daemons, started on any machine sharing the run directory, connect to it
+to pull tasks one at a time and send back their results. Messages are
+pickled and the connections are authenticated with a shared key.
+"""
+
+import os
+import queue
+import secrets
+import threading
+import time
+from contextlib import suppress
+from functools import partial
+from multiprocessing import AuthenticationError, Process
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+
+from haddock import log
+from haddock.core.exceptions import JobRunningError, SetupError
+from haddock.core.typing import (
+    Any,
+    Callable,
+    FilePath,
+    Iterable,
+    Optional,
+    SupportsRunT,
+    Union,
+    )
+from haddock.libs.libio import working_directory
+from haddock.libs.libtelemetry import TaskStats, report_tasks, run_measured
+
+
+DEFAULT_PORT = 37700
+"""Default TCP port where the coordinator waits for the workers."""
+
+AUTHKEY_ENV = "HADDOCK3_CLUSTER_KEY"
+"""Environment variable holding the authentication key of the workers."""
+
+DEFAULT_MAX_IDLE = 600.0
+"""Default seconds the coordinator waits while no worker is connected."""
+
+
+def run_task(task: SupportsRunT) -> tuple[Any, Optional[str]]:
+    """Run a task and return its result and error message, if any."""
+    try:
+        return task.run(), None
+    except Exception as err:
+        return None, f"{type(err).__name__}: {err}"
+
+
+def serve_tasks(conn: Connection) -> int:
+    """
+    Run the tasks received from the coordinator until told to stop.
+
+    Parameters
+    ----------
+    conn : multiprocessing.connection.Connection
+        The connection to the coordinator.
+
+    Returns
+    -------
+    int
+        The number of tasks executed.
+    """
+    ntasks = 0
+    while True:
+        try:
+            item = conn.recv()
+        except EOFError:
+            break
+        if item is None:
+            break
+
+        cwd, task = item
+        # paths in the tasks are relative to the coordinator's directory
+        with working_directory(cwd):
+            (result, error), stats = run_measured(
+                task,
+                -1,
+                partial(run_task, task),
+            )
+        conn.send((result, error, stats))
+        ntasks += 1
+    return ntasks
+
+
+def run_worker(
+    address: tuple[str, int],
+    authkey: bytes,
+    once: bool = False,
+    retry_interval: float = 5.0,
+    max_idle: Optional[float] = None,
+) -> None:
+    """
+    Connect to a coordinator and execute its tasks.
+
+    Parameters
+    ----------
+    address : tuple
+        The (host, port) address of the coordinator.
+
+    authkey : bytes
+        The authentication key shared with the coordinator.
+
+    once : bool
+        If `True`, return once the coordinator closes the connection.
+        Otherwise, reconnect to serve the next steps of the run.
+
+    retry_interval : float
+        Seconds to wait before trying to connect again.
+
+    max_idle : float, optional
+        Return if the coordinator could not be reached for this many
+        seconds. If `None`, try forever.
+    """
+    last_seen = time.time()
+    while True:
+        try:
+            conn = Client(address, authkey=authkey)
+        except (EOFError, OSError):
+            # no coordinator listening, or it closed while connecting
+            if max_idle is not None and time.time() - last_seen > max_idle:
+                log.info(f"No coordinator at {address} for {max_idle}s, exiting")
+                return
+            time.sleep(retry_interval)
+            continue
+
+        with conn:
+            try:
+                ntasks = serve_tasks(conn)
+                log.debug(f"Worker executed {ntasks} tasks")
+            except (EOFError, OSError) as err:
+                log.warning(f"Connection to the coordinator lost: {err}")
+        last_seen = time.time()
+
+        if once:
+            return
+
+
+class ClusterScheduler:
+    """Schedules tasks to worker daemons connected over TCP."""
+
+    def __init__(
+        self,
+        tasks: Iterable[SupportsRunT],
+        host: str = "localhost",
+        port: int = DEFAULT_PORT,
+        authkey: Optional[Union[str, bytes]] = None,
+        local_workers: int = 0,
+        callback: Optional[Callable[[int, Any], None]] = None,
+        stats_file: Optional[FilePath] = None,
+        max_idle: float = DEFAULT_MAX_IDLE,
+    ) -> None:
+        """
+        Send tasks on demand to the connected workers.
+
+        Each connected worker receives a new task as soon as it returns
+        the result of the previous one. If a worker disconnects, its
+        running task is sent to another worker. Workers must see the run
+        directory at the same path as the coordinator, for example on a
+        shared file system. Results are returned in the original task
+        order.
+
+        Parameters
+        ----------
+        tasks : iterable
+            The tasks to execute. Tasks must have method `run()` and be
+            picklable. They are kept in a list to resend the tasks of
+            lost workers.
+
+        host : str
+            The interface where to listen for workers. Use `0.0.0.0` to
+            accept workers from other machines.
+
+        port : int
+            The TCP port where to listen for workers. If `0`, a free
+            port is chosen, which is only useful with `local_workers`.
+
+        authkey : str or bytes, optional
+            The key the workers must present to connect. If not given,
+            it is read from the `HADDOCK3_CLUSTER_KEY` environment
+            variable. A random key is used if only `local_workers` take
+            part.
+
+        local_workers : int
+            The number of worker processes to start on this machine.
+            Remote workers can join them at any time.
+
+        callback : callable, optional
+            A function receiving `(index, result)` for every task as
+            soon as it finishes. When given, results are not kept in
+            `results`.
+
+        stats_file : str or pathlib.Path, optional
+            Where to save the resources used by each task, see
+            :py:func:`haddock.libs.libtelemetry.report_tasks`. The
+            stats are measured by the workers.
+
+        max_idle : float
+            Seconds to wait while no worker is connected, before giving
+            up with a :py:class:`haddock.core.exceptions.JobRunningError`.
+        """
+        self.tasks = list(tasks)
+        self.num_tasks = len(self.tasks)
+        self.host = host
+        self.port = port
+        self.local_workers = local_workers
+        self.callback = callback
+        self.stats_file = stats_file
+        self.max_idle = max_idle
+        self.stats: list[TaskStats] = []
+        self.authkey = authkey  # type: ignore
+        self.cwd = Path.cwd()
+        self.results: list[Any] = []
+
+        self._pending: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        self._num_done = 0
+        self._failures: dict[int, str] = {}
+        self._retries: dict[int, int] = {}
+        self._num_workers = 0
+        self._idle_since = time.time()
+
+        log.debug(f"{self.num_tasks} tasks ready.")
+
+    @property
+    def authkey(self) -> bytes:
+        """Key authenticating the workers."""
+        return self._authkey
+
+    @authkey.setter
+    def authkey(self, key: Optional[Union[str, bytes]]) -> None:
+        key = key or os.environ.get(AUTHKEY_ENV)
+        if not key:
+            if not self.local_workers:
+                _msg = (
+                    "An authentication key is needed for remote workers: "
+                    f"set the {AUTHKEY_ENV} environment variable."
+                )
+                raise SetupError(_msg)
+            key = secrets.token_hex(16)
+        self._authkey = key.encode() if isinstance(key, str) else key
+
+    def run(self) -> None:
+        """Run tasks on the connected workers."""
+        self.results = [None] * self.num_tasks
+        if not self.num_tasks:
+            return
+
+        for idx in range(self.num_tasks):
+            self._pending.put(idx)
+
+        self._idle_since = time.time()
+        with Listener((self.host, self.port), authkey=self.authkey) as listener:
+            address = listener.address
+            log.info(f"Waiting for workers at {address[0]}:{address[1]}")
+            acceptor = threading.Thread(
+                target=self._accept,
+                args=(listener,),
+                daemon=True,
+            )
+            acceptor.start()
+
+            # local workers stop when the listener closes
+            workers = [
+                Process(
+                    target=run_worker,
+                    args=(address, self.authkey),
+                    kwargs={"once": True, "max_idle": 0},
+                )
+                for _ in range(self.local_workers)
+            ]
+            for w in workers:
+                w.start()
+
+            try:
+                self._wait_for_tasks(address)
+            except (KeyboardInterrupt, JobRunningError):
+                for w in workers:
+                    w.terminate()
+                raise
+            finally:
+                self._finished.set()
+                # unblock the pending `accept` call, the connection is
+                # dropped when the listener closes if nobody accepts it
+                threading.Thread(
+                    target=self._wake,
+                    args=(address,),
+                    daemon=True,
+                ).start()
+                acceptor.join()
+
+        for w in workers:
+            w.join()
+
+        for idx, error in self._failures.items():
+            log.warning(f"Exception in task {idx} execution: {error}")
+        log.info(f"{self.num_tasks} tasks finished")
+        if self.stats_file:
+            report_tasks(self.stats, self.stats_file)
+
+    def _wait_for_tasks(self, address: tuple[str, int]) -> None:
+        """Wait for all the tasks, failing if no worker is connected."""
+        while not self._finished.wait(timeout=1.0):
+            with self._lock:
+                idle = not self._num_workers
+                idle_time = time.time() - self._idle_since
+            if idle and idle_time > self.max_idle:
+                _msg = (
+                    f"No worker connected for {self.max_idle:.0f}s, "
+                    f"{self.num_tasks - self._num_done} of {self.num_tasks} "
+                    "tasks were not executed. Start haddock3-worker daemons "
+                    f"connecting to {address[0]}:{address[1]}."
+                )
+                raise JobRunningError(_msg)
+
+    def _accept(self, listener: Listener) -> None:
+        """Accept workers and serve each one from its own thread."""
+        while not self._finished.is_set():
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, EOFError) as err:
+                log.warning(f"Worker connection refused: {err}")
+                continue
+            except OSError:
+                break
+            threading.Thread(
+                target=self._serve,
+                args=(conn,),
+                daemon=True,
+            ).start()
+
+    def _wake(self, address: tuple[str, int]) -> None:
+        """Connect to the listener without serving tasks."""
+        with suppress(EOFError, OSError):
+            Client(address, authkey=self.authkey).close()
+
+    def _serve(self, conn: Connection) -> None:
+        """Send tasks to a worker until all tasks are done."""
+        with self._lock:
+            self._num_workers += 1
+        try:
+            self._serve_worker(conn)
+        finally:
+            with self._lock:
+                self._num_workers -= 1
+                if not self._num_workers:
+                    self._idle_since = time.time()
+
+    def _serve_worker(self, conn: Connection) -> None:
+        with conn:
+            while not self._finished.is_set():
+                try:
+                    idx = self._pending.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+
+                try:
+                    conn.send((str(self.cwd), self.tasks[idx]))
+                    result, error, stats = conn.recv()
+                except (EOFError, OSError) as err:
+                    log.warning(f"Worker lost ({err}), task {idx} is requeued")
+                    with self._lock:
+                        self._retries[idx] = self._retries.get(idx, 0) + 1
+                    self._pending.put(idx)
+                    return
+
+                self._store(idx, result, error, stats)
+
+            with suppress(OSError):
+                conn.send(None)
+
+    def _store(
+        self,
+        idx: int,
+        result: Any,
+        error: Optional[str],
+        stats: TaskStats,
+    ) -> None:
+        """Save the result of a task."""
+        with self._lock:
+            stats.task_id = idx
+            stats.retries = self._retries.get(idx, 0)
+            self.stats.append(stats)
+            if error:
+                stats.status = "failed"
+                self._failures[idx] = error
+            if self.callback is not None:
+                self.callback(idx, result)
+            else:
+                self.results[idx] = result
+            self._num_done += 1
+            if self._num_done == self.num_tasks:
+                self._finished.set()
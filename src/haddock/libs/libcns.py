@@ -2,7 +2,7 @@
 
 import itertools
 import math
-from functools import partial
+from functools import lru_cache, partial
 from os import linesep
 from pathlib import Path
 
@@ -13,6 +13,7 @@ from haddock.libs import libpdb
 from haddock.libs.libfunc import false, true
 from haddock.libs.libmath import RandomNumberGenerator
 from haddock.libs.libontology import PDBFile
+from haddock.libs.libsubprocess import CNS_TOPPAR_LOADED, CNSJob
 from haddock.libs.libutil import transform_to_list
 
 
@@ -128,6 +129,28 @@ def load_workflow_params(
     return param_header
 
 
+def load_step_params(params: dict[str, Any]) -> str:
+    """
+    Write the values at the header section, reusing previous renderings.
+
+    The parameters of a step are the same for all its models, so the
+    header is rendered once per step instead of once per model. See
+    :func:`load_workflow_params`.
+    """
+    # the type is part of the key because `1 == 1.0 == True`
+    key = tuple((k, type(v), v) for k, v in params.items())
+    try:
+        hash(key)
+    except TypeError:
+        return load_workflow_params(**params)
+    return _load_step_params(key)
+
+
+@lru_cache(maxsize=32)
+def _load_step_params(key: tuple[tuple[str, type, Any], ...]) -> str:
+    return load_workflow_params(**{k: v for k, _, v in key})
+
+
 def write_eval_line(param: Any, value: Any, eval_line: str = "eval (${}={})") -> str:
     """Write the CNS eval line depending on the type of `value`."""
     eval_line += linesep
@@ -288,8 +311,9 @@ def prepare_cns_input(
     """
     # TODO: Refactor this function into smaller functions or classes
     # read the default parameters
-    default_params = load_workflow_params(**defaults)
+    default_params = load_step_params(defaults)
     default_params += write_eval_line("ambig_fname", ambig_fname)
+    default_params += write_eval_line(CNS_TOPPAR_LOADED, False)
 
     # write the PDBs
     pdb_list = [pdb.rel_path for pdb in transform_to_list(input_element)]
@@ -395,3 +419,71 @@ def prepare_expected_pdb(
         pdb.topology = model_obj.topology
         pdb.seed = model_obj.seed
     return pdb
+
+
+def prepare_cns_job(
+    model_number: int,
+    input_element: Union[PDBFile, list[PDBFile]],
+    step_path: FilePath,
+    recipe_str: str,
+    defaults: Any,
+    identifier: str,
+    envvars: Optional[dict[str, str]] = None,
+    **kwargs: Any,
+) -> CNSJob:
+    """
+    Prepare the CNS input of a model and the job to run it.
+
+    Parameters are the same as for :py:func:`prepare_cns_input`, plus the
+    `envvars` of the :py:class:`haddock.libs.libsubprocess.CNSJob`. The
+    output and error files are named after `identifier` and
+    `model_number`.
+    """
+    cns_input = prepare_cns_input(
+        model_number,
+        input_element,
+        step_path,
+        recipe_str,
+        defaults,
+        identifier,
+        **kwargs,
+    )
+    out_file = f"{identifier}_{model_number}.out"
+    err_fname = f"{identifier}_{model_number}.cnserr"
+    return CNSJob(cns_input, out_file, err_fname, envvars=envvars)
+
+
+def deferred_cns_job(
+    model_number: int,
+    input_element: Union[PDBFile, list[PDBFile]],
+    step_path: FilePath,
+    recipe_str: str,
+    defaults: Any,
+    identifier: str,
+    seed: Optional[int] = None,
+    **kwargs: Any,
+) -> partial[CNSJob]:
+    """
+    Create a callable preparing the CNS job of a model when called.
+
+    Allows creating the job once its input model exists on disk, for
+    example in the process that is going to run it. The random seed is
+    drawn here if not given, so the CNS input does not depend on the
+    process rendering it.
+
+    Parameters are the same as for :py:func:`prepare_cns_job`.
+    """
+    if seed is None:
+        seed = RND.randint(100, 99999)
+
+    return partial(
+        prepare_cns_job,
+        model_number,
+        input_element,
+        step_path,
+        recipe_str,
+        defaults,
+        identifier,
+        seed=seed,
+        **kwargs,
+    )
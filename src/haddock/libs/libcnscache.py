@@ -0,0 +1,296 @@
+"""
+Content-addressed cache of CNS jobs.
+
+A CNS job is identified by its input script where the files it reads
+are replaced by the hash of their content, by the files it reads through
+the `MODULE` and `TOPPAR` logical names, by the CNS executable, by the
+haddock3 version and by how its output is compressed. The files
+produced by a job are kept in the cache under that key, and hardlinked
+to the step folder the next time the same job is executed, for example
+when a run is restarted or extended, or when the same molecules are
+processed in another run.
+Files are copied into the cache, where they are read-only, so the
+files of the step that produced them stay writable. The read-only
+links of restored files are removed before a job writing to the same
+names runs, instead of writing through to the cache.
+
+The cache is enabled with the `cns_cache_dir` parameter.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+from haddock import log, version
+from haddock.core.typing import FilePath, Iterable, Optional, ParamDict
+
+
+CACHE_VERSION = 2
+"""Version of the cache layout, part of every key."""
+
+STDOUT_FILE = "_stdout"
+"""Name of the file keeping the returned CNS output in a cache entry."""
+
+LOGICAL_NAMES = ("MODULE", "TOPPAR")
+"""Environment variables CNS scripts use as logical names of folders."""
+
+_quoted_regex = re.compile(r'"([^"\n]+)"')
+_logical_regex = re.compile(
+    rf"\b({'|'.join(LOGICAL_NAMES)}):([\w./+-]*)",
+    re.IGNORECASE,
+    )
+
+
+@lru_cache(maxsize=4096)
+def _file_digest(path: str, mtime_ns: int, size: int) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as fin:
+        for chunk in iter(lambda: fin.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def file_digest(path: FilePath) -> str:
+    """
+    Hash the content of a file.
+
+    The hash is cached by path, modification time and size, so the
+    parameter and topology files shared by all the jobs of a step are
+    read only once.
+    """
+    stat = os.stat(path)
+    return _file_digest(str(Path(path).resolve()), stat.st_mtime_ns, stat.st_size)
+
+
+def quoted_files(script: str) -> set[str]:
+    """Give the quoted strings of a CNS script that name existing files."""
+    return {name for name in _quoted_regex.findall(script) if Path(name).is_file()}
+
+
+@lru_cache(maxsize=1024)
+def _logical_references(path: str, mtime_ns: int, size: int) -> tuple:
+    with open(path, errors="replace") as fin:
+        return tuple(_logical_regex.findall(fin.read()))
+
+
+def logical_files(script: str, envvars: ParamDict) -> dict[str, str]:
+    """
+    Find the files a CNS script reads through logical names.
+
+    References such as `@MODULE:read_param.cns` or
+    `"TOPPAR:protein-allhdg5-4.param"` are resolved with `envvars`, and
+    the CNS files found are searched for further references. A reference
+    that is not a file, for example the beginning of a file name built
+    in the script, matches all the files starting with it.
+
+    Returns
+    -------
+    dict
+        The path of each file found, by `<logical name>:<file name>`.
+    """
+    found: dict[str, str] = {}
+    references = list(_logical_regex.findall(script))
+    while references:
+        name, relpath = references.pop()
+        root = envvars.get(name.upper())
+        relpath = relpath.lstrip("/")
+        if not root or not relpath:
+            continue
+        path = Path(root, relpath)
+        if path.is_file():
+            candidates = [path]
+        elif path.parent.is_dir():
+            candidates = sorted(path.parent.glob(f"{path.name}*"))
+        else:
+            candidates = []
+        for candidate in candidates:
+            logical = f"{name.upper()}:{candidate.relative_to(root)}"
+            if logical in found or not candidate.is_file():
+                continue
+            found[logical] = str(candidate)
+            if candidate.suffix == ".cns":
+                stat = candidate.stat()
+                references.extend(
+                    _logical_references(
+                        str(candidate),
+                        stat.st_mtime_ns,
+                        stat.st_size,
+                        )
+                    )
+    return found
+
+
+class CNSJobCache:
+    """Cache of the files produced by CNS jobs."""
+
+    def __init__(self, path: FilePath) -> None:
+        """
+        Cache of the files produced by CNS jobs.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            The cache folder, shared by any number of runs.
+        """
+        self.path = Path(path)
+
+    def key(
+            self,
+            script: str,
+            cns_exec: FilePath,
+            *flags: bool,
+            envvars: Optional[ParamDict] = None,
+            ) -> str:
+        """
+        Identify a CNS job.
+
+        Parameters
+        ----------
+        script : str
+            The CNS input script. Paths of the files it reads are
+            relative to the current working directory.
+
+        cns_exec : str or pathlib.Path
+            The CNS executable.
+
+        flags : bool
+            The compression flags of the job.
+
+        envvars : dict, optional
+            The environment variables of the job, defining the folders
+            of the logical names, see :py:func:`logical_files`.
+        """
+        inputs = quoted_files(script)
+        normalized = _quoted_regex.sub(
+            lambda m: (
+                f'"{file_digest(m.group(1))}"'
+                if m.group(1) in inputs
+                else m.group(0)
+                ),
+            script,
+            )
+        envvars = envvars or {}
+        sha = hashlib.sha256()
+        sha.update(f"{CACHE_VERSION} {version} {file_digest(cns_exec)} {flags}".encode())  # noqa: E501
+        for name in LOGICAL_NAMES:
+            sha.update(f"{name}={envvars.get(name, '')}".encode())
+        for logical, path in sorted(logical_files(script, envvars).items()):
+            sha.update(f"{logical} {file_digest(path)}".encode())
+        sha.update(normalized.encode())
+        return sha.hexdigest()
+
+    def entry(self, key: str) -> Path:
+        """Give the folder of a cache entry."""
+        return Path(self.path, key[:2], key)
+
+    def restore(self, key: str) -> Optional[bytes]:
+        """
+        Link the files of a cached job to the current working directory.
+
+        Returns
+        -------
+        bytes or None
+            The output returned by the job, `None` if the job is not in
+            the cache.
+        """
+        entry = self.entry(key)
+        if not entry.is_dir():
+            return None
+
+        for cached in entry.iterdir():
+            if cached.name != STDOUT_FILE:
+                link_file(cached, Path(cached.name))
+        log.debug(f"CNS job restored from cache {entry}")
+        return Path(entry, STDOUT_FILE).read_bytes()
+
+    def store(self, key: str, files: Iterable[FilePath], stdout: bytes) -> None:
+        """
+        Save the files produced by a job.
+
+        Parameters
+        ----------
+        key : str
+            The job key, see :py:meth:`key`.
+
+        files : iterable
+            The files produced by the job.
+
+        stdout : bytes
+            The output returned by the job.
+        """
+        entry = self.entry(key)
+        if entry.is_dir():
+            return
+
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        # assemble the entry aside, concurrent jobs may store the same key
+        tmp = Path(tempfile.mkdtemp(dir=entry.parent, prefix=".tmp-"))
+        try:
+            for fname in files:
+                cached = Path(tmp, Path(fname).name)
+                shutil.copy2(fname, cached)
+                os.chmod(cached, 0o444)
+            Path(tmp, STDOUT_FILE).write_bytes(stdout)
+            os.rename(tmp, entry)
+        except OSError:
+            # another job stored it first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def link_file(source: Path, dest: Path) -> None:
+    """Hardlink `source` to `dest`, copying it across file systems."""
+    dest.unlink(missing_ok=True)
+    try:
+        os.link(source, dest)
+    except OSError:
+        shutil.copy2(source, dest)
+
+
+def unlink_cached(files: Iterable[Path]) -> None:
+    """Remove the read-only files linked from the cache."""
+    for fpath in files:
+        if fpath.stat().st_mode & 0o222 == 0:
+            fpath.unlink()
+
+
+def produced_files(
+        script: str,
+        existing: set[str],
+        extra: Iterable[FilePath] = (),
+        ) -> list[Path]:
+    """
+    Find the files written by a CNS job in the working directory.
+
+    Parameters
+    ----------
+    script : str
+        The CNS input script.
+
+    existing : set of str
+        The quoted files of the script that existed before the job, see
+        :py:func:`quoted_files`.
+
+    extra : iterable
+        Other files the job may have written, such as its output file.
+
+    Returns
+    -------
+    list of pathlib.Path
+        The files that exist, including their gzipped versions.
+    """
+    candidates = [
+        Path(name)
+        for name in _quoted_regex.findall(script)
+        if name not in existing and Path(name).parent == Path(".")
+        ]
+    candidates.extend(Path(fname) for fname in extra)
+    found: dict[Path, None] = {}
+    for candidate in candidates:
+        for fpath in (candidate, Path(f"{candidate}.gz")):
+            if fpath.is_file():
+                found[fpath] = None
+    return list(found)
@@ -7,9 +7,11 @@ import time
 from pathlib import Path
 
 from haddock import log, modules_defaults_path
-from haddock.core.typing import Any, Container, FilePath, Optional
+from haddock.core.exceptions import JobRunningError
+from haddock.core.typing import Any, Container, FilePath, Iterable, Optional
 from haddock.gear.yaml2cfg import read_from_yaml_config
 from haddock.libs.libsubprocess import CNSJob
+from haddock.libs.libtelemetry import TaskStats, report_tasks
 
 
 STATE_REGEX = r"JobState=(\w*)"
@@ -18,9 +20,11 @@ JOB_STATUS_DIC = {
     "PENDING": "submitted",
     "RUNNING": "running",
     "SUSPENDED": "hold",
+    "CONFIGURING": "running",
     "COMPLETING": "running",
     "COMPLETED": "finished",
     "FAILED": "failed",
+    "CANCELLED": "failed",
     "TIMEOUT": "timed-out",
     }
 
@@ -36,8 +40,19 @@ _tmpcfg = read_from_yaml_config(modules_defaults_path)
 HPCScheduler_CONCAT_DEFAULT: int = _tmpcfg["concat"]  # original value 1
 HPCWorker_QUEUE_LIMIT_DEFAULT: int = _tmpcfg["queue_limit"]  # original value 100 # noqa: E501
 HPCWorker_QUEUE_DEFAULT: str = _tmpcfg["queue"]  # original value ""
+HPCScheduler_JOB_ARRAY_DEFAULT: bool = _tmpcfg["job_array"]  # original value False # noqa: E501
+HPCScheduler_BATCH_TYPE_DEFAULT: str = _tmpcfg["batch_type"]  # original value "slurm" # noqa: E501
 del _tmpcfg
 
+SQUEUE_FAILURE_TIMEOUT = 1800.0
+"""Seconds `squeue` may keep failing before a job array is given up."""
+
+HPCScheduler_MIN_POLL_INTERVAL = 2
+"""Seconds between two status checks right after a job finished."""
+
+HPCScheduler_MAX_POLL_INTERVAL = 60
+"""Maximum seconds between two status checks when nothing changes."""
+
 
 class HPCWorker:
     """Defines the HPC Job."""
@@ -49,6 +64,7 @@ class HPCWorker:
             job_id: Optional[int] = None,
             workfload_manager: str = 'slurm',
             queue: Optional[str] = None,
+            start_index: int = 0,
             ) -> None:
         """
         Define the HPC job.
@@ -59,6 +75,10 @@ class HPCWorker:
 
         num : int
             The number of the worker.
+
+        start_index : int
+            The index of the first task of this worker in the list of
+            tasks of the scheduler.
         """
         self.tasks = tasks
         log.debug(f"HPCWorker ready with {len(self.tasks)}")
@@ -72,6 +92,9 @@ class HPCWorker:
         module_name = \
             Path(tasks[0].envvars['MODDIR']).resolve().stem.split('_')[-1]
         self.job_fname = Path(self.moddir, f'{module_name}_{num}.job')
+        self.done_fname = self.job_fname.with_suffix('.done')
+        self.stats_fname = self.job_fname.with_suffix('.tasks')
+        self.start_index = start_index
         self.workload_manager = workfload_manager
         self.queue = queue
 
@@ -93,14 +116,64 @@ class HPCWorker:
             )
 
         job_file_contents += f"cd {self.moddir}{os.linesep}"
-        for job in self.tasks:
-            cmd = (
+        job_file_contents += self.job_commands()
+
+        self.job_fname.write_text(job_file_contents)
+
+    def job_commands(self) -> str:
+        """
+        Create the command lines running the tasks of this worker.
+
+        The start and end times and the exit status of each task are
+        appended to `stats_fname`, see :py:meth:`read_task_stats`. The
+        last command writes the `done_fname` sentinel file, so the
+        completion of the job can be noticed without querying the
+        workload manager.
+        """
+        stats_fname = self.stats_fname.resolve()
+        cmds = ""
+        for idx, job in enumerate(self.tasks, start=self.start_index):
+            cmds += f"start=$(date +%s.%N){os.linesep}"
+            cmds += (
                 f"{job.cns_exec} < {job.input_file} > {job.output_file}"
                 f"{os.linesep}"
                 )
-            job_file_contents += cmd
+            cmds += f"rc=$?{os.linesep}"
+            cmds += (
+                f'echo "{idx} {job.input_file} $start $(date +%s.%N) $rc"'
+                f" >> {stats_fname}{os.linesep}"
+                )
+        cmds += f"touch {self.done_fname.resolve()}{os.linesep}"
+        return cmds
 
-        self.job_fname.write_text(job_file_contents)
+    def read_task_stats(self) -> list[TaskStats]:
+        """
+        Read the stats of the tasks run by the job.
+
+        Only the wall time and the exit status of the tasks are known,
+        tasks that did not run are not reported.
+        """
+        stats: list[TaskStats] = []
+        if not self.stats_fname.exists():
+            return stats
+
+        for line in self.stats_fname.read_text().splitlines():
+            try:
+                idx, input_file, start, end, returncode = line.split()
+                stats.append(TaskStats(
+                    int(idx),
+                    input_file,
+                    worker=self.job_fname.stem,
+                    wall_time=float(end) - float(start),
+                    status="ok" if returncode == "0" else "failed",
+                    ))
+            except ValueError:
+                log.debug(f"Wrong line in {self.stats_fname}: {line!r}")
+        return stats
+
+    def is_done(self) -> bool:
+        """Check whether the job wrote its completion sentinel file."""
+        return self.done_fname.exists()
 
     def run(self) -> None:
         """Execute the tasks."""
@@ -112,6 +185,10 @@ class HPCWorker:
 
     def update_status(self) -> str:
         """Retrieve the status of this worker."""
+        if self.is_done():
+            self.job_status = "finished"
+            return self.job_status
+
         cmd = f"scontrol show jobid -dd {self.job_id}"
         p = subprocess.run(shlex.split(cmd), capture_output=True)
         out = p.stdout.decode("utf-8")
@@ -134,19 +211,196 @@ class HPCWorker:
             _ = subprocess.run(shlex.split(cmd), capture_output=True)
 
 
+class HPCArrayWorker:
+    """Defines a Slurm job array running several HPC workers."""
+
+    def __init__(
+            self,
+            workers: list[HPCWorker],
+            queue_limit: int = HPCWorker_QUEUE_LIMIT_DEFAULT,
+            job_id: Optional[int] = None,
+            queue: Optional[str] = None,
+            squeue_timeout: float = SQUEUE_FAILURE_TIMEOUT,
+            ) -> None:
+        """
+        Define the HPC job array.
+
+        Each element of the array runs the tasks of one
+        :py:class:`HPCWorker`. At most `queue_limit` elements run at the
+        same time, the others start as soon as a slot is freed.
+
+        Parameters
+        ----------
+        workers : list of :py:class:`HPCWorker`
+            The workers defining the array elements.
+
+        queue_limit : int
+            The maximum number of simultaneously running array elements.
+
+        squeue_timeout : float
+            Seconds `squeue` may keep failing before
+            :py:meth:`update_status` gives up on the array.
+        """
+        self.workers = workers
+        self.num_elements = len(workers)
+        self.queue_limit = queue_limit
+        self.job_id = job_id
+        self.job_status = "unknown"
+        self.finished_elements = 0
+        self.queue = queue
+        self.squeue_timeout = squeue_timeout
+        self._squeue_failing_since: Optional[float] = None
+
+        self.moddir = workers[0].moddir
+        self.toppar = workers[0].toppar
+        self.cns_folder = workers[0].cns_folder
+        module_name = self.moddir.resolve().stem.split('_')[-1]
+        self.job_fname = Path(self.moddir, f'{module_name}_array.job')
+        log.debug(f"HPCArrayWorker ready with {self.num_elements} elements")
+
+    def prepare_job_file(self) -> None:
+        """Prepare the job array file."""
+        job_file_contents = create_slurm_header(
+            job_name='haddock3',
+            queue=self.queue,
+            ncores=1,
+            work_dir=self.moddir,
+            stdout_path=self.job_fname.with_suffix('.%a.out'),
+            stderr_path=self.job_fname.with_suffix('.%a.err'),
+            array=f"1-{self.num_elements}%{self.queue_limit}",
+            )
+
+        job_file_contents += create_CNS_export_envvars(
+            MODDIR=self.moddir,
+            MODULE=self.cns_folder,
+            TOPPAR=self.toppar,
+            )
+
+        job_file_contents += f"cd {self.moddir}{os.linesep}"
+        job_file_contents += f"case $SLURM_ARRAY_TASK_ID in{os.linesep}"
+        for worker in self.workers:
+            job_file_contents += f"{worker.job_num})" + os.linesep
+            job_file_contents += worker.job_commands()
+            job_file_contents += f";;{os.linesep}"
+        job_file_contents += f"esac{os.linesep}"
+
+        self.job_fname.write_text(job_file_contents)
+
+    def run(self) -> None:
+        """Submit the job array."""
+        self.prepare_job_file()
+        cmd = f"sbatch {self.job_fname}"
+        p = subprocess.run(shlex.split(cmd), capture_output=True)
+        if p.returncode != 0:
+            raise JobRunningError(
+                f"Could not submit the job array {self.job_fname}, sbatch "
+                f"exited with code {p.returncode}: "
+                f"{p.stderr.decode('utf-8').strip()}"
+                )
+        self.job_id = int(p.stdout.decode("utf-8").split()[-1])
+        self.job_status = "submitted"
+
+    def update_status(self) -> str:
+        """
+        Retrieve the status of the array and count finished elements.
+
+        Once no element is queued anymore, the array is finished if all
+        the elements wrote their completion sentinel file, and failed
+        otherwise. An array that ended long ago is not known by Slurm
+        anymore and is considered terminated as well.
+
+        If `squeue` fails for another reason, for example because the
+        Slurm controller is not responding, the previous status is kept
+        and the query is repeated at the next update, during at most
+        `squeue_timeout` seconds.
+
+        Raises
+        ------
+        JobRunningError
+            If `squeue` keeps failing for longer than `squeue_timeout`.
+        """
+        cmd = f"squeue -h -r -j {self.job_id} -o %T"
+        p = subprocess.run(shlex.split(cmd), capture_output=True)
+        if p.returncode != 0:
+            err = p.stderr.decode("utf-8").strip()
+            if "Invalid job id" in err:
+                return self._terminate()
+
+            now = time.time()
+            if self._squeue_failing_since is None:
+                self._squeue_failing_since = now
+            elif now - self._squeue_failing_since > self.squeue_timeout:
+                raise JobRunningError(
+                    f"squeue failed for job array {self.job_id} during "
+                    f"more than {self.squeue_timeout:.0f}s: {err}"
+                    )
+            log.warning(
+                f"squeue failed for job array {self.job_id}, keeping the "
+                f"{self.job_status!r} status: {err}"
+                )
+            return self.job_status
+
+        self._squeue_failing_since = None
+        # elements that ended recently may still be listed by `squeue`
+        states = [
+            state for state in p.stdout.decode("utf-8").split()
+            if JOB_STATUS_DIC.get(state) not in TERMINATED_STATUS
+            ]
+        if not states:
+            return self._terminate()
+
+        self.finished_elements = self.num_elements - len(states)
+        if any(JOB_STATUS_DIC.get(s) == "running" for s in states):
+            self.job_status = "running"
+        else:
+            self.job_status = "submitted"
+
+        return self.job_status
+
+    def _terminate(self) -> str:
+        """Set the status of an array with no element left in the queue."""
+        self.finished_elements = self.num_elements
+        done = sum(worker.is_done() for worker in self.workers)
+        if done == self.num_elements:
+            self.job_status = "finished"
+        else:
+            self.job_status = "failed"
+            log.warning(
+                f"{self.num_elements - done} of {self.num_elements} "
+                f"elements of job array {self.job_id} did not complete"
+                )
+        return self.job_status
+
+    def cancel(self) -> None:
+        """Cancel the remaining array elements."""
+        if self.update_status() not in TERMINATED_STATUS:
+            log.info(f"Canceling {self.job_fname.name} - {self.job_id}")
+            cmd = f"scancel {self.job_id}"
+            _ = subprocess.run(shlex.split(cmd), capture_output=True)
+
+
 class HPCScheduler:
     """Schedules tasks to run in HPC."""
 
     def __init__(
             self,
-            task_list: list[CNSJob],
+            task_list: Iterable[CNSJob],
             target_queue: str = HPCWorker_QUEUE_DEFAULT,
             queue_limit: int = HPCWorker_QUEUE_LIMIT_DEFAULT,
             concat: int = HPCScheduler_CONCAT_DEFAULT,
+            job_array: bool = HPCScheduler_JOB_ARRAY_DEFAULT,
+            stats_file: Optional[FilePath] = None,
+            batch_type: str = HPCScheduler_BATCH_TYPE_DEFAULT,
             ) -> None:
+        # all job files are written before submitting
+        task_list = list(task_list)
         self.num_tasks = len(task_list)
+        self.stats_file = stats_file
+        self.stats: list[TaskStats] = []
         self.queue_limit = queue_limit
         self.concat = concat
+        self.job_array = job_array
+        self.array_worker: Optional[HPCArrayWorker] = None
 
         # split tasks according to concat level
         if concat > 1:
@@ -159,7 +413,8 @@ class HPCScheduler:
             ]
 
         self.worker_list = [
-            HPCWorker(t, j) for j, t in enumerate(job_list, start=1)
+            HPCWorker(t, j, start_index=(j - 1) * concat)
+            for j, t in enumerate(job_list, start=1)
             ]
 
         # set the queue
@@ -168,12 +423,38 @@ class HPCScheduler:
             for worker in self.worker_list:
                 worker.queue = target_queue
 
+        if job_array and batch_type != "slurm":
+            log.warning(
+                f"Job arrays are only supported for slurm, the {batch_type} "
+                "jobs are submitted one by one"
+                )
+        elif job_array and self.worker_list:
+            self.array_worker = HPCArrayWorker(
+                self.worker_list,
+                queue_limit=queue_limit,
+                queue=target_queue or None,
+                )
+
         log.debug(f"{self.num_tasks} HPC tasks ready.")
 
     def run(self) -> None:
         """Run tasks in the Queue."""
+        if self.array_worker is not None:
+            self.run_array()
+        else:
+            self.run_batches()
+
+        self.stats = [
+            task_stats
+            for worker in self.worker_list
+            for task_stats in worker.read_task_stats()
+            ]
+        if self.stats_file:
+            report_tasks(self.stats, self.stats_file)
+
+    def run_batches(self) -> None:
+        """Run tasks in batches of `queue_limit` jobs."""
         # split by maximum number of submission so we do it in batches
-        adaptive_l: list[float] = []
         batch = [
             self.worker_list[i:i + self.queue_limit]
             for i in range(0, len(self.worker_list), self.queue_limit)
@@ -187,47 +468,27 @@ class HPCScheduler:
                     worker.run()
 
                 # check if those finished
-                completed: bool = False
-                while not completed:
-                    # Initiate count of terminated jobs
-                    terminated_count: int = 0
-                    # Loop over workers
-                    for worker in worker_list:
-                        worker.update_status()
-                        # Log status if not finished
-                        if worker.job_status != "finished":
-                            log.info(
-                                f">> {worker.job_fname.name}"
-                                f" {worker.job_status}"
-                                )
-                        # Increment number of terminated works
-                        if worker.job_status in TERMINATED_STATUS:
-                            terminated_count += 1
-
-                    # Check if all terminated
-                    if terminated_count == len(worker_list):
-                        # Set while loop condition
-                        completed = True
-                        end = time.time()
-                        elapsed = end - start
-                        adaptive_l.append(elapsed)
-                    else:
-                        if not adaptive_l:
-                            # This is the first run, use pre-defined waits
-                            if len(worker_list) < 10:
-                                sleep_timer = 10
-                            elif len(worker_list) < 50:
-                                sleep_timer = 30
-                            else:
-                                sleep_timer = 60
-                        else:
-                            # We already know how long it took, use the average
-                            sleep_timer = round(
-                                sum(adaptive_l) / len(adaptive_l)
-                                )
-                        log.info(f">> Waiting... ({sleep_timer:.2f}s)")
-                        time.sleep(sleep_timer)
-
+                poller = AdaptivePoller()
+                while True:
+                    newly_terminated = update_workers_status(worker_list)
+                    running = [
+                        w for w in worker_list
+                        if w.job_status not in TERMINATED_STATUS
+                        ]
+                    if not running:
+                        break
+
+                    for worker in running:
+                        log.debug(
+                            f">> {worker.job_fname.name} {worker.job_status}"
+                            )
+                    log.info(
+                        f">> {len(worker_list) - len(running)}/"
+                        f"{len(worker_list)} jobs finished"
+                        )
+                    poller.wait(changed=bool(newly_terminated))
+
+                elapsed = time.time() - start
                 per = (float(batch_num) / float(total_batches)) * 100
                 log.info(
                     f">> Batch {batch_num}/{total_batches} took "
@@ -237,15 +498,176 @@ class HPCScheduler:
             self.terminate()
             raise err
 
+    def run_array(self) -> None:
+        """Run tasks as a single job array."""
+        assert self.array_worker is not None
+        array = self.array_worker
+        try:
+            start = time.time()
+            array.run()
+            log.info(
+                f"> Submitted job array {array.job_id} with "
+                f"{array.num_elements} elements"
+                )
+            poller = AdaptivePoller()
+            finished = 0
+            while array.update_status() not in TERMINATED_STATUS:
+                per = array.finished_elements / array.num_elements * 100
+                log.info(
+                    f">> {array.finished_elements}/{array.num_elements} "
+                    f"array elements finished, {per:.2f}% complete"
+                    )
+                poller.wait(changed=array.finished_elements > finished)
+                finished = array.finished_elements
+
+            elapsed = time.time() - start
+            log.info(f">> Job array took {elapsed:.2f}s to finish")
+
+        except KeyboardInterrupt as err:
+            self.terminate()
+            raise err
+
     def terminate(self) -> None:
         """Terminate all jobs in the queue in a controlled way."""
         log.info("Terminate signal received, removing jobs from the queue...")
-        for worker in self.worker_list:
-            worker.cancel()
+        if self.array_worker is not None:
+            self.array_worker.cancel()
+        else:
+            for worker in self.worker_list:
+                worker.cancel()
 
         log.info("The jobs in the queue were terminated in a controlled way")
 
 
+class AdaptivePoller:
+    """Wait between status checks, backing off while nothing changes."""
+
+    def __init__(
+            self,
+            min_interval: float = HPCScheduler_MIN_POLL_INTERVAL,
+            max_interval: float = HPCScheduler_MAX_POLL_INTERVAL,
+            ) -> None:
+        """
+        Adaptive waiting time between status checks.
+
+        The waiting time starts at `min_interval` and doubles every time
+        nothing changed since the last check, up to `max_interval`. As
+        soon as something changes, it goes back to `min_interval`.
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+
+    def next_interval(self, changed: bool = False) -> float:
+        """Compute the next waiting time."""
+        if changed:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
+        return self.interval
+
+    def wait(self, changed: bool = False) -> None:
+        """Sleep until the next status check."""
+        sleep_timer = self.next_interval(changed)
+        log.debug(f">> Waiting... ({sleep_timer:.2f}s)")
+        time.sleep(sleep_timer)
+
+
+def get_slurm_jobs_status(
+        job_ids: list[int],
+        previous: Optional[dict[int, str]] = None,
+        ) -> dict[int, str]:
+    """
+    Retrieve the status of several Slurm jobs with a single `squeue` call.
+
+    Parameters
+    ----------
+    job_ids : list of int
+        The ids of the jobs.
+
+    previous : dict, optional
+        The current status of the jobs, kept if `squeue` fails, for
+        example because the Slurm controller is not responding. The
+        jobs are queried again at the next update.
+
+    Returns
+    -------
+    dict
+        The HADDOCK3 status of each job, as in :py:data:`JOB_STATUS_DIC`.
+        Jobs not known by the Slurm controller anymore are considered
+        finished.
+    """
+    previous = previous or {}
+    statuses = {job_id: previous.get(job_id, "unknown") for job_id in job_ids}
+    if not job_ids:
+        return statuses
+
+    ids = ",".join(map(str, job_ids))
+    cmd = f"squeue -h -j {ids} -o '%i %T'"
+    p = subprocess.run(shlex.split(cmd), capture_output=True)
+    if p.returncode != 0:
+        err = p.stderr.decode("utf-8").strip()
+        if "Invalid job id" not in err:
+            log.warning(f"squeue failed, keeping the jobs status: {err}")
+        elif len(job_ids) > 1:
+            # `squeue -j` fails altogether if one of the jobs left the
+            # controller, find which one
+            for job_id in job_ids:
+                statuses.update(get_slurm_jobs_status([job_id], previous))
+        else:
+            statuses[job_ids[0]] = "finished"
+        return statuses
+
+    statuses = dict.fromkeys(job_ids, "finished")
+    for line in p.stdout.decode("utf-8").splitlines():
+        try:
+            job_id, state = line.split()
+            if int(job_id) in statuses:
+                statuses[int(job_id)] = JOB_STATUS_DIC.get(state, "unknown")
+        except ValueError:
+            continue
+    return statuses
+
+
+def update_workers_status(workers: list[HPCWorker]) -> list[HPCWorker]:
+    """
+    Update the status of several workers at once.
+
+    Workers whose completion sentinel file exists are finished. The
+    status of the others is retrieved with a single `squeue` call.
+
+    Parameters
+    ----------
+    workers : list of :py:class:`HPCWorker`
+        The workers to update.
+
+    Returns
+    -------
+    list of :py:class:`HPCWorker`
+        The workers that terminated since the last update.
+    """
+    pending = [w for w in workers if w.job_status not in TERMINATED_STATUS]
+    newly_terminated: list[HPCWorker] = []
+    to_query: list[HPCWorker] = []
+    for worker in pending:
+        if worker.is_done():
+            worker.job_status = "finished"
+            newly_terminated.append(worker)
+        else:
+            to_query.append(worker)
+
+    statuses = get_slurm_jobs_status(
+        [w.job_id for w in to_query],  # type: ignore
+        previous={w.job_id: w.job_status for w in to_query},  # type: ignore
+        )
+    for worker in to_query:
+        worker.job_status = statuses[worker.job_id]  # type: ignore
+        if worker.job_status in TERMINATED_STATUS:
+            newly_terminated.append(worker)
+
+    return newly_terminated
+
+
 def create_slurm_header(
         job_name: FilePath = 'haddock3_slurm_job',
         work_dir: FilePath = '.',
@@ -253,6 +675,7 @@ def create_slurm_header(
         stderr_path: FilePath = 'haddock3_job.err',
         queue: Optional[str] = None,
         ncores: int = 48,
+        array: Optional[str] = None,
         ) -> str:
     """
     Create HADDOCK3 Slurm Batch job file.
@@ -269,6 +692,9 @@ def create_slurm_header(
     time : int
         Time in minutes before job reach TIMEOUT status.
 
+    array : str, optional
+        The indexes of a job array, for example `1-100%10`.
+
     **job_params
         According to `job_setup`.
 
@@ -285,6 +711,8 @@ def create_slurm_header(
     header += f"#SBATCH --tasks-per-node={str(ncores)}{os.linesep}"
     header += f"#SBATCH --output={stdout_path}{os.linesep}"
     header += f"#SBATCH --error={stderr_path}{os.linesep}"
+    if array:
+        header += f"#SBATCH --array={array}{os.linesep}"
     # commenting the workdir option (not supported by all versions of slurm)
     # header += f"#SBATCH --workdir={work_dir}{os.linesep}"
     return header
@@ -4,23 +4,37 @@ import shlex
 import subprocess
 import sys
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Iterable, Optional, Union
 
 from haddock import log
+from haddock.libs.libtelemetry import TaskStats, report_tasks
 
 
 class MPIScheduler:
     """Schedules tasks to be executed via MPI."""
 
-    def __init__(self, tasks: list[Any], ncores: Optional[int] = None) -> None:
-        self.tasks = tasks
+    def __init__(
+            self,
+            tasks: Iterable[Any],
+            ncores: Optional[int] = None,
+            stats_file: Optional[Union[str, Path]] = None,
+            ) -> None:
+        # all tasks are pickled at once for the runner
+        self.tasks = list(tasks)
         self.cwd = Path.cwd()
         self.ncores = ncores
+        self.stats_file = stats_file
+        self.results: list[Any] = []
+        self.stats: list[TaskStats] = []
 
     def run(self) -> None:
         """Send it to the haddock3-mpitask runner."""
         pkl_tasks = self._pickle_tasks()
-        cmd = f"mpirun -np {self.ncores} haddock3-mpitask {pkl_tasks}"
+        pkl_results = Path(self.cwd, "mpi_results.pkl")
+        cmd = (
+            f"mpirun -np {self.ncores} haddock3-mpitask {pkl_tasks} "
+            f"--output {pkl_results}"
+            )
         log.debug(f"MPI cmd is {cmd}")
 
         log.info(
@@ -38,6 +52,25 @@ class MPIScheduler:
             log.error(err)
             sys.exit()
 
+        self.results = self._load_results(pkl_results)
+        if self.stats_file:
+            report_tasks(self.stats, self.stats_file)
+
+    def _load_results(self, fpath: Path) -> list[Any]:
+        """Load the results gathered by the haddock3-mpitask runner."""
+        if not fpath.exists():
+            log.warning(f"MPI results not found at {fpath}")
+            return [None] * len(self.tasks)
+
+        with open(fpath, "rb") as input_handler:
+            results, failures, self.stats = pickle.load(input_handler)
+        fpath.unlink()
+
+        for error in failures.values():
+            log.warning(f"Exception in task execution: {error}")
+        log.info(f"{len(self.tasks)} tasks finished")
+        return results
+
     def _pickle_tasks(self) -> Path:
         """Pickle the tasks."""
         fpath = Path(self.cwd, "mpi.pkl")
@@ -2,6 +2,10 @@
 
 import datetime
 import itertools
+import os
+import pickle
+import sqlite3
+from contextlib import closing
 from enum import Enum
 from os import linesep
 from pathlib import Path
@@ -9,13 +13,25 @@ from pathlib import Path
 
 import jsonpickle
 
-from haddock.core.defaults import MODULE_IO_FILE
-from haddock.core.typing import FilePath, Literal, Optional, TypeVar, Union
+from haddock.core.defaults import LEGACY_MODULE_IO_SUFFIX, MODULE_IO_FILE
+from haddock.core.typing import (
+    FilePath,
+    Iterable,
+    Literal,
+    Optional,
+    TypeVar,
+    Union,
+    )
 from typing import List, Any
 
 
 NaN = float("nan")
 
+MODULE_IO_VERSION = 1
+"""Version of the ModuleIO files written by :py:meth:`ModuleIO.save`."""
+
+_SQLITE_HEADER = b"SQLite format 3\x00"
+
 
 class Format(Enum):
     """Input and Output possible formats."""
@@ -118,6 +134,90 @@ class TopologyFile(Persistent):
         super().__init__(file_name, Format.TOPOLOGY, path)
 
 
+def _list_folder(folder: Path) -> set[str]:
+    """Give the names in a folder, without broken symbolic links."""
+    try:
+        with os.scandir(folder) as entries:
+            return {
+                entry.name
+                for entry in entries
+                if not entry.is_symlink() or os.path.exists(entry.path)
+                }
+    except (FileNotFoundError, NotADirectoryError):
+        return set()
+
+
+def find_present(persistents: Iterable[Persistent]) -> set[int]:
+    """
+    Find which persistent files exist on disk.
+
+    Same as calling :py:meth:`Persistent.is_present` on each file, but
+    each folder is listed only once instead of checking every file.
+
+    Returns
+    -------
+    set of int
+        The `id` of the files that exist.
+    """
+    listings: dict[Path, set[str]] = {}
+    present: set[int] = set()
+    for persistent in persistents:
+        folder = persistent.rel_path.parent
+        if folder not in listings:
+            listings[folder] = _list_folder(folder)
+        if persistent.rel_path.name in listings[folder]:
+            present.add(id(persistent))
+    return present
+
+
+def find_io_file(filename: FilePath) -> Optional[Path]:
+    """
+    Find a ModuleIO file, or its legacy JSON version.
+
+    Runs made by older versions saved the ModuleIO files with
+    `jsonpickle`, as `io.json` instead of `io.db`.
+
+    Returns
+    -------
+    pathlib.Path or None
+        The file found, `None` if none exists.
+    """
+    fpath = Path(filename)
+    for candidate in (fpath, fpath.with_suffix(LEGACY_MODULE_IO_SUFFIX)):
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def _pack_rows(side: str, elements: List[Any]) -> list[tuple]:
+    """Convert the elements of a ModuleIO side to database rows."""
+    rows: list[tuple] = []
+    for position, element in enumerate(elements):
+        if isinstance(element, dict) and element:
+            rows.extend(
+                (side, position, pickle.dumps(key), pickle.dumps(value))
+                for key, value in element.items()
+                )
+        else:
+            rows.append((side, position, None, pickle.dumps(element)))
+    return rows
+
+
+def _unpack_rows(rows: list[tuple]) -> List[Any]:
+    """Convert database rows, sorted by position, to ModuleIO elements."""
+    elements: List[Any] = []
+    for _, group in itertools.groupby(rows, key=lambda row: row[0]):
+        rows_at = list(group)
+        if rows_at[0][1] is None:
+            elements.append(pickle.loads(rows_at[0][2]))
+        else:
+            elements.append({
+                pickle.loads(key): pickle.loads(value)
+                for _, key, value in rows_at
+                })
+    return elements
+
+
 class ModuleIO:
     """Intercommunicating modules and exchange input/output information."""
 
@@ -125,6 +225,32 @@ class ModuleIO:
         self.input: List[Any] = []
         self.output: List[Any] = []
 
+    @property
+    def input(self) -> List[Any]:
+        """Files given to the module."""
+        if self._input_rows is not None:
+            self._input = _unpack_rows(self._input_rows)
+            self._input_rows = None
+        return self._input
+
+    @input.setter
+    def input(self, elements: List[Any]) -> None:
+        self._input = elements
+        self._input_rows: Optional[list[tuple]] = None
+
+    @property
+    def output(self) -> List[Any]:
+        """Files generated by the module."""
+        if self._output_rows is not None:
+            self._output = _unpack_rows(self._output_rows)
+            self._output_rows = None
+        return self._output
+
+    @output.setter
+    def output(self, elements: List[Any]) -> None:
+        self._output = elements
+        self._output_rows: Optional[list[tuple]] = None
+
     def add(self, persistent, mode="i"):
         """Add a given filename as input or output."""
         if mode == "i":
@@ -139,20 +265,74 @@ class ModuleIO:
                 self.output.append(persistent)
 
     def save(self, path: FilePath = ".", filename: FilePath = MODULE_IO_FILE) -> Path:
-        """Save Input/Output needed files by this module to disk."""
+        """
+        Save Input/Output needed files by this module to disk.
+
+        The files are saved in a SQLite database with one row per file,
+        pickled. If `filename` ends with `.json`, they are saved with
+        `jsonpickle` instead, as done by older versions.
+        """
         fpath = Path(path, filename)
-        with open(fpath, "w") as output_handler:
-            to_save = {"input": self.input, "output": self.output}
-            jsonpickle.set_encoder_options("json", sort_keys=True, indent=4)
-            output_handler.write(jsonpickle.encode(to_save))  # type: ignore
+        if fpath.suffix == LEGACY_MODULE_IO_SUFFIX:
+            with open(fpath, "w") as output_handler:
+                to_save = {"input": self.input, "output": self.output}
+                jsonpickle.set_encoder_options("json", sort_keys=True, indent=4)
+                output_handler.write(jsonpickle.encode(to_save))  # type: ignore
+            return fpath
+
+        rows = _pack_rows("input", self.input) + _pack_rows("output", self.output)
+        fpath.unlink(missing_ok=True)
+        with closing(sqlite3.connect(fpath)) as db, db:
+            db.execute(f"PRAGMA user_version = {MODULE_IO_VERSION}")
+            db.execute(
+                "CREATE TABLE files ("
+                "side TEXT, position INTEGER, key BLOB, value BLOB)"
+                )
+            db.executemany("INSERT INTO files VALUES (?, ?, ?, ?)", rows)
         return fpath
 
     def load(self, filename: FilePath) -> None:
-        """Load the content of a given IO filename."""
-        with open(filename) as json_file:
-            content = jsonpickle.decode(json_file.read())
-            self.input = content["input"]  # type: ignore
-            self.output = content["output"]  # type: ignore
+        """
+        Load the content of a given IO filename.
+
+        Files saved by older versions with `jsonpickle` are also read,
+        see :py:func:`find_io_file`. The files of the database are only
+        unpickled when `input` or `output` is first accessed, so the next
+        module, which only retrieves the `output` models, never decodes
+        the `input` ones.
+        """
+        fpath = find_io_file(filename)
+        if fpath is None:
+            raise FileNotFoundError(f"ModuleIO file not found: {filename}")
+
+        with open(fpath, "rb") as fin:
+            is_db = fin.read(len(_SQLITE_HEADER)) == _SQLITE_HEADER
+
+        if not is_db:
+            with open(fpath) as json_file:
+                content = jsonpickle.decode(json_file.read())
+                self.input = content["input"]  # type: ignore
+                self.output = content["output"]  # type: ignore
+            return
+
+        with closing(sqlite3.connect(fpath)) as db:
+            version = db.execute("PRAGMA user_version").fetchone()[0]
+            if version > MODULE_IO_VERSION:
+                _msg = (
+                    f"{fpath} was saved with a newer version of haddock3 "
+                    f"(format {version}, supported {MODULE_IO_VERSION})."
+                    )
+                raise ValueError(_msg)
+
+            rows = db.execute(
+                "SELECT side, position, key, value FROM files "
+                "ORDER BY side, position, rowid"
+                ).fetchall()
+
+        self.input = []
+        self.output = []
+        self._input_rows = [row[1:] for row in rows if row[0] == "input"]
+        self._output_rows = [row[1:] for row in rows if row[0] == "output"]
 
     def retrieve_models(
         self, crossdock: bool = False, individualize: bool = False
@@ -191,47 +371,56 @@ class ModuleIO:
 
         return model_list  # type: ignore
 
-    def check_faulty(self) -> float:
-        """Check how many of the output exists."""
-        total = 0.0
-        present = 0.0
+    def _output_files(self) -> list[Persistent]:
+        """Give the output files, unpacking dictionaries."""
+        files: list[Persistent] = []
         for element in self.output:
             if isinstance(element, dict):
-                total += len(element)
-                present += sum(j.is_present() for j in element.values())
+                files.extend(element.values())
             else:
-                total += 1
-                if element.is_present():
-                    present += 1
+                files.append(element)
+        return files
 
+    def check_faulty(self) -> float:
+        """Check how many of the output exists."""
+        output_files = self._output_files()
+        total = float(len(output_files))
         if total == 0:
             _msg = "No expected output was passed to ModuleIO"
             raise Exception(_msg)
 
-        faulty_per = (1 - (present / total)) * 100
+        present = find_present(output_files)
+        faulty_per = (1 - (len(present) / total)) * 100
 
         # added this method here to avoid modifying all calls in the
         # modules' run method. We can think about restructure this part
         # in the future.
-        self.remove_missing()
+        self.remove_missing(present)
 
         return faulty_per
 
-    def remove_missing(self) -> None:
-        """Remove missing structure from `output`."""
+    def remove_missing(self, present: Optional[set[int]] = None) -> None:
+        """
+        Remove missing structure from `output`.
+
+        Parameters
+        ----------
+        present : set of int, optional
+            The `id` of the output files that exist, as given by
+            :py:func:`find_present`. Found if not given.
+        """
+        if present is None:
+            present = find_present(self._output_files())
+
         # can't modify a list/dictionary within a loop
-        idxs: list[int] = []
+        idxs: set[int] = set()
         for idx, element in enumerate(self.output):
             if isinstance(element, dict):
-                to_pop = []
-                for key2 in element:
-                    if not element[key2].is_present():
-                        to_pop.append(key2)
+                to_pop = [key for key in element if id(element[key]) not in present]
                 for pop_me in to_pop:
                     element.pop(pop_me)
-            else:
-                if not element.is_present():
-                    idxs.append(idx)
+            elif id(element) not in present:
+                idxs.add(idx)
 
         self.output = [value for i, value in enumerate(self.output) if i not in idxs]
 
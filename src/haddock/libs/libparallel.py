@@ -1,29 +1,25 @@
 """Module in charge of parallelizing the execution of tasks."""
 
-import math
+import threading
+from functools import partial
 from multiprocessing import Process, Queue
 
 from haddock import log
 from haddock.core.typing import (
-    AnyT,
+    Any,
+    Callable,
     FilePath,
-    Generator,
+    Iterable,
     Optional,
-    Sequence,
+    Sized,
     SupportsRunT,
     Union,
 )
+from haddock.libs.libsubprocess import CNSJob, CNSProcess
+from haddock.libs.libtelemetry import TaskStats, report_tasks, run_measured
 from haddock.libs.libutil import parse_ncores
 
 
-def split_tasks(lst: Sequence[AnyT], n: int) -> Generator[Sequence[AnyT], None, None]:
-    """Split tasks into N-sized chunks."""
-    n = math.ceil(len(lst) / n)
-    for j in range(0, len(lst), n):
-        chunk = lst[j : n + j]
-        yield chunk
-
-
 def get_index_list(nmodels, ncores):
     """
     Optimal distribution of models among cores
@@ -72,84 +68,133 @@ class GenericTask:
         return self.function(*self.args, **self.kwargs)
 
 
-class Worker(Process):
-    """Work on tasks."""
+class QueueWorker(Process):
+    """Work on tasks pulled from a shared queue."""
 
-    def __init__(self, tasks: Sequence[SupportsRunT], results: Queue) -> None:
-        super(Worker, self).__init__()
-        self.tasks = tasks
+    def __init__(self, tasks: Queue, results: Queue) -> None:
+        """
+        Worker consuming tasks on demand.
+
+        Parameters
+        ----------
+        tasks : multiprocessing.Queue
+            Shared queue of `(index, task)` tuples. A `None` item signals
+            there are no more tasks left.
+
+        results : multiprocessing.Queue
+            Queue where `(index, result, stats)` tuples are put as soon
+            as each task finishes, `stats` being the
+            :py:class:`haddock.libs.libtelemetry.TaskStats` of the task.
+        """
+        super(QueueWorker, self).__init__()
+        self.task_queue = tasks
         self.result_queue = results
-        log.debug(f"Worker ready with {len(self.tasks)} tasks")
 
     def run(self) -> None:
-        """Execute tasks."""
-        results = []
-        for task in self.tasks:
-            r = None
-            try:
-                r = task.run()
-            except Exception as e:
-                log.warning(f"Exception in task execution: {e}")
-
-            results.append(r)
-
-        # Put results into the queue
-        self.result_queue.put(results)
+        """Execute tasks until the queue is exhausted."""
+        for idx, task in iter(self.task_queue.get, None):
+            r, stats = run_measured(task, idx, partial(self.run_task, task))
+            self.result_queue.put((idx, r, stats))
 
         # Signal completion by putting a unique identifier into the queue
         self.result_queue.put(f"{self.name}_done")
 
         log.debug(f"{self.name} executed")
 
+    def run_task(self, task: SupportsRunT) -> Any:
+        """Run a single task."""
+        return task.run()
+
+
+class CNSProcessWorker(QueueWorker):
+    """Work on tasks reusing a long-lived CNS process for CNS jobs."""
+
+    def run(self) -> None:
+        """Execute tasks and close the CNS process at the end."""
+        self.cns_process = CNSProcess()
+        try:
+            super().run()
+        finally:
+            self.cns_process.close()
+
+    def run_task(self, task: SupportsRunT) -> Any:
+        """Run CNS jobs in the warm CNS process, other tasks as usual."""
+        if isinstance(task, CNSJob):
+            if task.cns_exec != self.cns_process.cns_exec:
+                self.cns_process.close()
+                self.cns_process.cns_exec = task.cns_exec
+            return task.run(cns_process=self.cns_process)
+        return task.run()
+
 
 class Scheduler:
     """Schedules tasks to run in multiprocessing."""
 
+    worker_class: type[QueueWorker] = QueueWorker
+
     def __init__(
         self,
-        tasks: list[SupportsRunT],
+        tasks: Iterable[SupportsRunT],
         ncores: Optional[int] = None,
         max_cpus: bool = False,
+        callback: Optional[Callable[[int, Any], None]] = None,
+        stats_file: Optional[FilePath] = None,
     ) -> None:
         """
         Schedule tasks to a defined number of processes.
 
+        Tasks are not split in static chunks; instead, they are placed in
+        a shared queue from which each worker pulls the next task as soon
+        as it becomes idle. This balances the load when task runtimes
+        differ a lot. Results are returned in the original task order.
+
+        The queue holds at most two tasks per worker, and is refilled
+        from `tasks` as the workers consume it. If `tasks` is a
+        generator, tasks are therefore only created shortly before they
+        run, and only a few of them are in memory at any time.
+
         Parameters
         ----------
-        tasks : list
-            The list of tasks to execute. Tasks must have method `run()`.
+        tasks : iterable
+            The tasks to execute. Tasks must have method `run()`.
 
         ncores : None or int
             The number of cores to use. If `None` is given uses the
             maximum number of CPUs allowed by
             `libs.libututil.parse_ncores` function.
+
+        callback : callable, optional
+            A function receiving `(index, result)` for every task as
+            soon as it finishes. When given, results are handed over to
+            the callback and are not kept in `results`, so the parent
+            process does not hold every result in memory at once.
+
+        stats_file : str or pathlib.Path, optional
+            Where to save the resources used by each task, see
+            :py:func:`haddock.libs.libtelemetry.report_tasks`. The
+            stats are always available in `stats`.
         """
         self.max_cpus = max_cpus
-        self.num_tasks = len(tasks)
+        self.callback = callback
+        self.stats_file = stats_file
+        self.stats: list[TaskStats] = []
+        self.tasks = tasks
+        # the number of tasks of a generator is known once consumed
+        self.num_tasks = len(tasks) if isinstance(tasks, Sized) else None
         self.num_processes = ncores  # first parses num_cores
+        self.task_queue: Queue = Queue(maxsize=2 * max(self.num_processes, 1))
         self.queue: Queue = Queue()
         self.results: list = []
+        self._feed_error: Optional[BaseException] = None
 
-        # Sort the tasks by input_file name and its length, so we know that 2 comes before 10
-        ### Q? Whys is this necessary?
-        # Only CNSJobs can be sorted like this
-        if all(hasattr(t, "input_file") for t in tasks):
-            task_name_dic: dict[int, tuple[FilePath, int]] = {}
-            for i, t in enumerate(tasks):
-                task_name_dic[i] = (t.input_file, len(str(t.input_file)))  # type: ignore
-
-            sorted_task_list: list[SupportsRunT] = []
-            for e in sorted(task_name_dic.items(), key=lambda x: (x[0], x[1])):
-                idx = e[0]
-                sorted_task_list.append(tasks[idx])
-        else:
-            sorted_task_list = tasks
-
-        job_list = split_tasks(sorted_task_list, self.num_processes)
-        self.worker_list = [Worker(jobs, self.queue) for jobs in job_list]
+        self.worker_list = [
+            self.worker_class(self.task_queue, self.queue)
+            for _ in range(self.num_processes)
+            ]
 
         log.info(f"Using {self.num_processes} cores")
-        log.debug(f"{self.num_tasks} tasks ready.")
+        if self.num_tasks is not None:
+            log.debug(f"{self.num_tasks} tasks ready.")
 
     @property
     def num_processes(self) -> int:
@@ -172,8 +217,11 @@ class Scheduler:
             for w in self.worker_list:
                 w.start()
 
+            feeder = threading.Thread(target=self._feed, daemon=True)
+            feeder.start()
+
             # Collect results until all workers have signaled completion
-            all_results = []
+            results: dict[int, Any] = {}
             num_workers = len(self.worker_list)
             completed_workers = 0
 
@@ -182,14 +230,26 @@ class Scheduler:
                 if isinstance(result, str) and result.endswith("_done"):
                     completed_workers += 1
                 else:
-                    all_results.append(result)
-
+                    idx, r, stats = result
+                    self.stats.append(stats)
+                    if self.callback:
+                        self.callback(idx, r)
+                    else:
+                        results[idx] = r
+
+            feeder.join()
             for w in self.worker_list:
                 w.join()
 
-            self.results = [item for sublist in all_results for item in sublist]
+            if self._feed_error is not None:
+                raise self._feed_error
+
+            if not self.callback:
+                self.results = [results.get(i) for i in range(self.num_tasks)]
 
             log.info(f"{self.num_tasks} tasks finished")
+            if self.stats_file:
+                report_tasks(self.stats, self.stats_file)
 
         except KeyboardInterrupt as err:
             # Q: why have a keyboard interrupt here?
@@ -200,9 +260,37 @@ class Scheduler:
             # whichever has to catch it
             raise err
 
+    def _feed(self) -> None:
+        """Put the tasks in the queue as the workers consume them."""
+        num_tasks = 0
+        try:
+            for idx_task in enumerate(self.tasks):
+                self.task_queue.put(idx_task)
+                num_tasks += 1
+        except Exception as err:
+            # raised in the main thread once the workers stop
+            self._feed_error = err
+        finally:
+            self.num_tasks = num_tasks
+            # One stop signal per worker
+            for _ in self.worker_list:
+                self.task_queue.put(None)
+
     def terminate(self) -> None:
         """Terminate tasks in a controlled way."""
         for worker in self.worker_list:
             worker.terminate()
 
         log.info("The workers terminated in a controlled way")
+
+
+class CNSProcessScheduler(Scheduler):
+    """
+    Schedules tasks keeping one warm CNS process per worker.
+
+    Instead of starting a new CNS binary for every job, each worker
+    feeds its CNS jobs to a long-lived
+    :py:class:`haddock.libs.libsubprocess.CNSProcess`.
+    """
+
+    worker_class = CNSProcessWorker
@@ -1,8 +1,9 @@
 """Parse molecular structures in PDB format."""
 import os
-from functools import partial
+from functools import lru_cache, partial
 from pathlib import Path
 
+import numpy as np
 from pdbtools.pdb_segxchain import run as place_seg_on_chain
 from pdbtools.pdb_splitchain import run as split_chain
 from pdbtools.pdb_splitmodel import run as split_model
@@ -197,40 +198,178 @@ def sanitize(
     return new_pdb_file
 
 
+ATOM_DTYPE = np.dtype([
+    ("record", "U6"),
+    ("name", "U4"),
+    ("resname", "U3"),
+    ("chain", "U1"),
+    ("resseq", "U4"),
+    ("segid", "U4"),
+    ("element", "U2"),
+    ])
+"""
+Fields of the ATOM/HETATM records in :py:attr:`PDBStructure.atoms`.
+
+Fields are text stripped of spaces, except `chain`, which is a space for
+records without chainID. `resseq` is kept as text, because residue
+numbers are not always integers, for example in hybrid-36 files.
+"""
+
+
+class PDBStructure:
+    """The coordinate records and REMARKs of a PDB file."""
+
+    def __init__(
+            self,
+            atoms: np.ndarray,
+            coords: list[tuple[str, str, str]],
+            remarks: tuple[str, ...],
+            ) -> None:
+        """
+        Hold the coordinate records and REMARKs of a PDB file.
+
+        Parameters
+        ----------
+        atoms : np.ndarray
+            Read-only structured array of the ATOM and HETATM records,
+            in file order, with :py:data:`ATOM_DTYPE`.
+
+        coords : list of tuple
+            The x, y and z columns of each record, parsed on first
+            access to :py:attr:`xyz`.
+
+        remarks : tuple of str
+            The REMARK lines.
+        """
+        self.atoms = atoms
+        self.remarks = remarks
+        self._coords = coords
+        self._xyz: Optional[np.ndarray] = None
+
+    @property
+    def xyz(self) -> np.ndarray:
+        """
+        Read-only coordinates of the records, of shape (n_atoms, 3).
+
+        Coordinates that are not numbers are `nan`.
+        """
+        if self._xyz is None:
+            try:
+                xyz = np.array(self._coords, dtype=np.float64)
+            except ValueError:
+                xyz = np.array(
+                    [list(map(_to_float, row)) for row in self._coords],
+                    dtype=np.float64,
+                    )
+            xyz = xyz.reshape(len(self._coords), 3)
+            xyz.flags.writeable = False
+            self._xyz = xyz
+        return self._xyz
+
+
+def _to_float(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return float("nan")
+
+
+def read_structure(pdb_file_path: FilePath) -> PDBStructure:
+    """
+    Parse the ATOM, HETATM and REMARK records of a PDB file.
+
+    The file is read in a single pass. The structures of recently read
+    files are cached, and reused while the file is not modified, so the
+    helpers reading the same model one after the other, such as
+    :py:func:`haddock.libs.libalign.get_atoms` and
+    :py:func:`haddock.libs.libalign.load_coords`, read it only once.
+    """
+    stat = os.stat(pdb_file_path)
+    return _parse_structure(
+        os.path.abspath(pdb_file_path),
+        stat.st_mtime_ns,
+        stat.st_size,
+        )
+
+
+@lru_cache(maxsize=64)
+def _parse_structure(path: str, mtime_ns: int, size: int) -> PDBStructure:
+    """
+    Parse a PDB file, see :py:func:`read_structure`.
+
+    `mtime_ns` and `size` are only part of the cache key, so that
+    modified files are read again.
+    """
+    fields: list[tuple[str, ...]] = []
+    coords: list[tuple[str, str, str]] = []
+    remarks: list[str] = []
+    with open(path) as fin:
+        for line in fin:
+            if line.startswith(("ATOM", "HETATM")):
+                fields.append((
+                    line[slc_record].strip(),
+                    line[slc_name].strip(),
+                    line[slc_resname].strip(),
+                    line[slc_chainid],
+                    line[slc_resseq].strip(),
+                    line[slc_segid].strip(),
+                    line[slc_element].strip(),
+                    ))
+                coords.append((line[slc_x], line[slc_y], line[slc_z]))
+            elif line.startswith("REMARK"):
+                remarks.append(line.rstrip())
+
+    atoms = np.empty(len(fields), dtype=ATOM_DTYPE)
+    if fields:
+        for name, column in zip(ATOM_DTYPE.names, zip(*fields)):
+            atoms[name] = column
+    # the same array is given to every caller
+    atoms.flags.writeable = False
+    return PDBStructure(atoms, coords, tuple(remarks))
+
+
+@lru_cache(maxsize=1024)
+def _chainseg(
+        path: str,
+        mtime_ns: int,
+        size: int,
+        ) -> tuple[frozenset[str], frozenset[str]]:
+    """
+    Find the segIDs and chainIDs of a PDB file.
+
+    The results outlive the few structures kept by
+    :py:func:`read_structure`, so the inputs of a step are scanned once
+    however many there are.
+    """
+    atoms = read_structure(path).atoms
+    segids = np.char.strip(atoms["segid"].astype("U1"))
+    chainids = np.char.strip(atoms["chain"])
+
+    unidentified = (segids == "") & (chainids == "")
+    if unidentified.any():
+        atom = atoms[np.argmax(unidentified)]
+        raise ValueError(
+            f"Could not identify chainID or segID in pdb {path}, "
+            f"atom {atom['name']} of residue {atom['resname']} {atom['resseq']}"  # noqa: E501
+            )
+    return (
+        frozenset(segids.tolist()) - {""},
+        frozenset(chainids.tolist()) - {""},
+        )
+
+
 def identify_chainseg(pdb_file_path: FilePath,
                       sort: bool = True) -> tuple[list[str], list[str]]:
     """Return segID OR chainID."""
-    segids: list[str] = []
-    chains: list[str] = []
-    with open(pdb_file_path) as input_handler:
-        for line in input_handler:
-            if line.startswith(("ATOM  ", "HETATM")):
-                try:
-                    segid = line[72:76].strip()[:1]
-                except IndexError:
-                    segid = ""
-                try:
-                    chainid = line[21].strip()
-                except IndexError:
-                    chainid = ""
-
-                if segid:
-                    segids.append(segid)
-                if chainid:
-                    chains.append(chainid)
-                
-                if not segid and not chainid:
-                    raise ValueError(
-                        f"Could not identify chainID or segID in pdb {pdb_file_path}, line {line}"
-                        )
-
+    stat = os.stat(pdb_file_path)
+    segids_set, chains_set = _chainseg(
+        os.path.abspath(pdb_file_path),
+        stat.st_mtime_ns,
+        stat.st_size,
+        )
     if sort:
-        segids = sorted(list(set(segids)))
-        chains = sorted(list(set(chains)))
-    else:
-        segids = list(set(segids))
-        chains = list(set(chains))
-    return segids, chains
+        return sorted(segids_set), sorted(chains_set)
+    return list(segids_set), list(chains_set)
 
 
 def get_new_models(pdb_file_path: FilePath) -> list[Path]:
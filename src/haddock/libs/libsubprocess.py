@@ -1,9 +1,16 @@
 """Run subprocess jobs."""
 
+import gzip
 import os
+import re
 import shlex
+import shutil
 import subprocess
+import tempfile
+import threading
+from collections import deque
 from contextlib import suppress
+from functools import partial
 from pathlib import Path
 
 from haddock.core.defaults import cns_exec as global_cns_exec
@@ -12,11 +19,60 @@ from haddock.core.exceptions import (
     JobRunningError,
     KnownCNSError,
     )
-from haddock.core.typing import Any, FilePath, Optional, ParamDict
-from haddock.gear.known_cns_errors import KNOWN_ERRORS as KNOWN_CNS_ERRORS
+from haddock.core.typing import Any, Callable, FilePath, Optional, ParamDict
+from haddock.gear.known_cns_errors import KNOWN_ERRORS_REGEX
+from haddock.libs.libcnscache import (
+    CNSJobCache,
+    produced_files,
+    quoted_files,
+    unlink_cached,
+    )
 from haddock.libs.libio import gzip_files
 
 
+CNSPROCESS_MAX_JOBS = 100
+"""Number of job scripts a warm CNS process runs before being recycled."""
+
+CNSPROCESS_END_MARKER = "HADDOCK3_CNS_JOB_FINISHED"
+"""Text displayed by a warm CNS process at the end of each job script."""
+
+CNSPROCESS_RESET = os.linesep.join(
+    (
+        "delete selection=( all ) end",
+        "noe reset end",
+        "restraints dihedral reset end",
+        "restraints plane initialize end",
+        "ncs restraints initialize end",
+        "sani reset end",
+        "dani reset end",
+        "vean reset end",
+        "xrdc reset end",
+        "dynamics torsion topology reset end end",
+        "igroup interaction ( all ) ( all ) end end",
+        "flags exclude * include bond angl impr dihe vdw elec end",
+        )
+    )
+"""CNS statements clearing the state left by a job in a warm CNS process.
+
+Molecules, coordinates, every restraint class set by the recipes and
+the flags are reset, but not the parameters, which are read only once
+per process (see :py:data:`CNS_TOPPAR_LOADED`). Atom properties, such
+as harmonic restraints or fixed atoms, go away with the atoms."""
+
+CNS_TOPPAR_LOADED = "haddock3_toppar_loaded"
+"""CNS symbol telling ``read_param.cns`` the parameter files were read."""
+
+CNS_OUTPUT_TAIL = 24000
+"""Bytes at the end of the CNS output searched for errors (300 lines)."""
+
+_final_stop_regex = re.compile(r"^\s*stop\s*\Z", re.IGNORECASE | re.MULTILINE)
+_header_symbol_regex = re.compile(r"^eval \(\$([^=\s]+)=", re.MULTILINE)
+_toppar_unloaded_regex = re.compile(
+    rf"^\s*eval\s*\(\s*\${CNS_TOPPAR_LOADED}\s*=\s*false\s*\)\s*$",
+    re.IGNORECASE | re.MULTILINE,
+    )
+
+
 class BaseJob:
     """Base class for a subprocess job."""
 
@@ -130,6 +186,7 @@ class CNSJob:
         self.error_file = error_file
         self.envvars = envvars
         self.cns_exec = cns_exec
+        self.cache_dir: Optional[FilePath] = None
 
     def __repr__(self) -> str:
         _input_file = self.input_file
@@ -183,6 +240,7 @@ class CNSJob:
         compress_out: bool = True,
         compress_seed: bool = False,
         compress_err: bool = True,
+        cns_process: Optional["CNSProcess"] = None,
     ) -> bytes:
         """
         Run this CNS job script.
@@ -200,7 +258,79 @@ class CNSJob:
         compress_seed : bool
             Compress the *.seed file to '.gz' after the run. Defaults to
             ``False``.
+
+        cns_process : :py:class:`CNSProcess`, optional
+            A running CNS process where to execute this job script
+            instead of starting a new CNS binary. Defaults to ``None``.
+
+        Returns
+        -------
+        bytes
+            The end of the CNS output. Without `cns_process`, the output
+            is streamed to disk and CNS is stopped as soon as a known
+            error shows up, see :py:meth:`monitor_output`.
+
+        Notes
+        -----
+        If `cache_dir` is set, the files of an identical job executed
+        before are taken from the cache instead of running CNS, see
+        :py:mod:`haddock.libs.libcnscache`.
         """
+        run = partial(
+            self._run,
+            compress_inp=compress_inp,
+            compress_out=compress_out,
+            compress_seed=compress_seed,
+            compress_err=compress_err,
+            cns_process=cns_process,
+        )
+        if self.cache_dir is None or self.output_file is None:
+            return run()
+
+        if isinstance(self.input_file, Path):
+            script = self.input_file.read_text()
+        else:
+            script = self.input_file
+
+        extra = [self.output_file]
+        if compress_seed:
+            extra.append(Path(Path(self.output_file).stem).with_suffix(".seed"))
+        # files restored from the cache by a previous job are neither
+        # inputs of this job nor written through to the cache
+        unlink_cached(produced_files(script, set(), extra))
+
+        cache = CNSJobCache(self.cache_dir)
+        flags = (compress_inp, compress_out, compress_seed)
+        key = cache.key(script, self.cns_exec, *flags, envvars=self.envvars)
+        if (out := cache.restore(key)) is not None:
+            if isinstance(self.input_file, Path) and compress_inp:
+                gzip_files(self.input_file, remove_original=True)
+            return out
+
+        existing = quoted_files(script)
+        out = run()
+        # failed jobs are not cached
+        errors = (Path(f"{self.error_file}.gz"), Path(str(self.error_file)))
+        if self.error_file is None or not any(e.exists() for e in errors):
+            cache.store(key, produced_files(script, existing, extra), out)
+        return out
+
+    def _run(
+        self,
+        compress_inp: bool = False,
+        compress_out: bool = True,
+        compress_seed: bool = False,
+        compress_err: bool = True,
+        cns_process: Optional["CNSProcess"] = None,
+    ) -> bytes:
+        if cns_process is not None:
+            return self._run_in_process(
+                cns_process,
+                compress_inp=compress_inp,
+                compress_out=compress_out,
+                compress_seed=compress_seed,
+                compress_err=compress_err,
+                )
 
         if isinstance(self.input_file, str):
             p = subprocess.Popen(
@@ -211,10 +341,16 @@ class CNSJob:
                 close_fds=True,
                 env=self.envvars,
             )
-            out, error = p.communicate(input=self.input_file.encode())
-            p.kill()
+            # write from a thread so CNS never blocks on a full stdout
+            # pipe while we are still sending the script
+            writer = threading.Thread(
+                target=self._write_input,
+                args=(p, self.input_file.encode()),
+                daemon=True,
+            )
+            writer.start()
 
-        elif isinstance(self.input_file, Path) and self.output_file is not None:
+        else:
             with open(self.input_file) as inp:
                 p = subprocess.Popen(
                     self.cns_exec,
@@ -224,11 +360,204 @@ class CNSJob:
                     close_fds=True,
                     env=self.envvars,
                 )
-                out, error = p.communicate()
-                p.kill()
-                # Write out file
-                with open(self.output_file, "wb+") as outf:
-                    outf.write(out)
+
+        return self.monitor_output(
+            p,
+            compress_inp=compress_inp,
+            compress_out=compress_out,
+            compress_seed=compress_seed,
+            compress_err=compress_err,
+        )
+
+    @staticmethod
+    def _write_input(process: subprocess.Popen, inp: bytes) -> None:
+        # the pipe is closed if CNS is killed while reading its input
+        with suppress(BrokenPipeError, OSError, ValueError):
+            process.stdin.write(inp)  # type: ignore
+            process.stdin.close()  # type: ignore
+
+    def monitor_output(
+        self,
+        process: subprocess.Popen,
+        compress_inp: bool = False,
+        compress_out: bool = True,
+        compress_seed: bool = False,
+        compress_err: bool = True,
+    ) -> bytes:
+        """
+        Save and check the output of this CNS job while it runs.
+
+        The standard output is read line by line and written, compressed
+        if requested, to the `output_file` when the job was given an
+        input file, or to a temporary file otherwise. CNS is killed as
+        soon as one of the known CNS errors shows up, see
+        :py:data:`haddock.gear.known_cns_errors.KNOWN_ERRORS_REGEX`.
+        When an error is detected, the output is saved to the
+        `error_file`.
+
+        Parameters
+        ----------
+        process : subprocess.Popen
+            The running CNS process, with piped stdout and stderr.
+
+        Raises
+        ------
+        CNSRunningError
+            If CNS wrote to the standard error.
+
+        Returns
+        -------
+        bytes
+            The last :py:data:`CNS_OUTPUT_TAIL` bytes of the standard
+            output.
+        """
+        stderr: list[bytes] = []
+        reader = threading.Thread(
+            target=lambda: stderr.append(process.stderr.read()),  # type: ignore
+            daemon=True,
+        )
+        reader.start()
+
+        save_out = (
+            isinstance(self.input_file, Path)
+            and self.output_file is not None
+            )
+        out_path = Path(
+            f"{self.output_file}.gz" if compress_out else str(self.output_file)
+            )
+        # without an output file, the output is only kept to report errors
+        spool = None if save_out else tempfile.TemporaryFile()
+        if spool is not None:
+            sink = gzip.GzipFile(fileobj=spool, mode="wb", compresslevel=1)
+        elif compress_out:
+            sink = gzip.open(out_path, "wb")
+        else:
+            sink = open(out_path, "wb")
+
+        tail: deque[bytes] = deque()
+        tail_size = 0
+        known_error = False
+        with sink:
+            for line in iter(process.stdout.readline, b""):  # type: ignore
+                sink.write(line)
+                tail.append(line)
+                tail_size += len(line)
+                while tail_size > CNS_OUTPUT_TAIL and len(tail) > 1:
+                    tail_size -= len(tail.popleft())
+
+                if KNOWN_ERRORS_REGEX.search(line):
+                    # CNS cannot recover from these errors
+                    process.kill()
+                    known_error = True
+                    break
+
+        process.wait()
+        process.stdout.close()  # type: ignore
+        reader.join()
+        error = b"".join(stderr)
+        out = b"".join(tail)
+
+        if save_out:
+            if compress_inp:
+                gzip_files(self.input_file, remove_original=True)
+
+            if compress_seed:
+                with suppress(FileNotFoundError):
+                    gzip_files(
+                        Path(Path(self.output_file).stem).with_suffix(".seed"),  # type: ignore  # noqa: E501
+                        remove_original=True,
+                    )
+
+        try:
+            if error or known_error or self.contains_cns_stdout_error(out):
+                if spool is not None:
+                    spool.seek(0)
+                    source = gzip.GzipFile(fileobj=spool, mode="rb")
+                elif compress_out:
+                    source = gzip.open(out_path, "rb")
+                else:
+                    source = open(out_path, "rb")
+
+                # Write .err file
+                if compress_err:
+                    errf = gzip.open(f"{self.error_file}.gz", "wb")
+                else:
+                    errf = open(self.error_file, "wb")  # type: ignore
+                with source, errf:
+                    shutil.copyfileobj(source, errf)
+
+                if error:
+                    raise CNSRunningError(error)
+        finally:
+            if spool is not None:
+                spool.close()
+
+        # Return the end of STDOUT
+        return out
+
+    def _run_in_process(
+        self,
+        cns_process: "CNSProcess",
+        compress_inp: bool = False,
+        compress_out: bool = True,
+        compress_seed: bool = False,
+        compress_err: bool = True,
+    ) -> bytes:
+        """Run this CNS job script in an already running CNS process."""
+        if isinstance(self.input_file, str):
+            inp = self.input_file.encode()
+        else:
+            inp = Path(self.input_file).read_bytes()
+
+        out, error = cns_process.run(inp, envvars=self.envvars)
+
+        return self.process_output(
+            out,
+            error,
+            compress_inp=compress_inp,
+            compress_out=compress_out,
+            compress_seed=compress_seed,
+            compress_err=compress_err,
+        )
+
+    def process_output(
+        self,
+        out: bytes,
+        error: bytes,
+        compress_inp: bool = False,
+        compress_out: bool = True,
+        compress_seed: bool = False,
+        compress_err: bool = True,
+    ) -> bytes:
+        """
+        Save and check the output of this CNS job once it has finished.
+
+        Writes the standard output to the `output_file` when the job was
+        given an input file, compresses the requested files and writes
+        the `error_file` if an error was detected.
+
+        Parameters
+        ----------
+        out : bytes
+            The standard output of the CNS run.
+
+        error : bytes
+            The standard error of the CNS run.
+
+        Raises
+        ------
+        CNSRunningError
+            If `error` is not empty.
+
+        Returns
+        -------
+        bytes
+            The standard output of the CNS run.
+        """
+        if isinstance(self.input_file, Path) and self.output_file is not None:
+            # Write out file
+            with open(self.output_file, "wb+") as outf:
+                outf.write(out)
 
             if compress_inp:
                 gzip_files(self.input_file, remove_original=True)
@@ -259,17 +588,225 @@ class CNSJob:
 
     @staticmethod
     def contains_cns_stdout_error(out: bytes) -> bool:
-        # Decode end of STDOUT
-        # Search in last 24000 characters (300 lines * 80 characters)
-        sout = out[-24000:].split(bytes(os.linesep, "utf-8"))
-        # Reverse loop on lines (read backward)
-        for bytes_line in reversed(sout):
-            line = bytes_line.decode("utf-8")
-            # This checks for an unknown CNS error
-            # triggered when CNS is about to crash due to internal error
-            if "^^^^^" in line:
-                return True
-            # Check if a known error is found
-            elif any([error in line for error in KNOWN_CNS_ERRORS.keys()]):
-                return True
-        return False
+        # Search in the end of STDOUT
+        sout = out[-CNS_OUTPUT_TAIL:]
+        # This checks for an unknown CNS error
+        # triggered when CNS is about to crash due to internal error
+        if b"^^^^^" in sout:
+            return True
+        # Check if a known error is found
+        return KNOWN_ERRORS_REGEX.search(sout) is not None
+
+
+class DeferredCNSJob(CNSJob):
+    """A CNS job script created when the job first needs it."""
+
+    def __init__(
+        self,
+        make_input: Callable[[], FilePath],
+        output_file: Optional[FilePath] = None,
+        error_file: Optional[FilePath] = None,
+        envvars: Optional[ParamDict] = None,
+        cns_exec: Optional[FilePath] = None,
+    ) -> None:
+        """
+        CNS subprocess whose input is rendered by the process running it.
+
+        Only the arguments needed to create the input travel to the
+        workers, and the input string is not sent back and forth
+        between processes.
+
+        Parameters
+        ----------
+        make_input : callable
+            Creates the CNS input, as a string or as the path to the
+            .inp file, when called without arguments. It is called
+            once, the first time `input_file` is read. Must be
+            picklable, for example a :py:func:`functools.partial`.
+
+        Other parameters are the same as for :py:class:`CNSJob`.
+        """
+        super().__init__(None, output_file, error_file, envvars, cns_exec)  # type: ignore
+        self.make_input = make_input
+
+    @property
+    def input_file(self) -> FilePath:
+        """The CNS input, created on first access."""
+        if self._input_file is None:
+            self._input_file = self.make_input()
+        return self._input_file
+
+    @input_file.setter
+    def input_file(self, input_file: Optional[FilePath]) -> None:
+        self._input_file = input_file
+
+    def __repr__(self) -> str:
+        # do not create the input only to display the job
+        if self._input_file is None:
+            return (
+                f"DeferredCNSJob({self.make_input}, {self.output_file}, "
+                f"envvars={self.envvars}, cns_exec={self.cns_exec})"
+            )
+        return super().__repr__()
+
+
+class CNSProcess:
+    """A long-lived CNS process executing successive job scripts."""
+
+    def __init__(
+        self,
+        cns_exec: Optional[FilePath] = None,
+        max_jobs: int = CNSPROCESS_MAX_JOBS,
+    ) -> None:
+        """
+        Keep a CNS binary alive and feed it job scripts through stdin.
+
+        Each job script has its final ``stop`` statement removed and is
+        followed by a ``display`` of :py:data:`CNSPROCESS_END_MARKER`, so
+        the standard output of each job can be separated from the next.
+        Every job after the first one is preceded by
+        :py:data:`CNSPROCESS_RESET`, so no molecule, restraint or flag
+        carries over from one job to the next, and has its
+        ``eval ($haddock3_toppar_loaded=false)`` header line removed, so
+        the parameter files read by the first job are not read again.
+
+        CNS symbols cannot be deleted. They are all defined again by
+        the next job when it has the same header symbols, the recipe
+        evaluating the others from them. The process is therefore
+        restarted when a job header defines other symbols than the
+        first job, for example when a parameter left empty is not
+        written. It is also restarted when it dies, when the
+        environment variables of a job differ from the current ones,
+        or after `max_jobs` scripts.
+
+        Parameters
+        ----------
+        cns_exec : str or pathlib.Path
+            The path to the CNS executable. Defaults to the global one.
+
+        max_jobs : int
+            Number of job scripts to execute before restarting the CNS
+            process.
+        """
+        self.cns_exec = cns_exec or global_cns_exec
+        self.max_jobs = max_jobs
+        self.envvars: ParamDict = {}
+        self.njobs = 0
+        self.symbols: frozenset[str] = frozenset()
+        self.process: Optional[subprocess.Popen] = None
+
+    def __repr__(self) -> str:
+        return (
+            f"CNSProcess({self.cns_exec}, max_jobs={self.max_jobs}, "
+            f"njobs={self.njobs})"
+        )
+
+    def is_alive(self) -> bool:
+        """Check whether the CNS process is running."""
+        return self.process is not None and self.process.poll() is None
+
+    def start(self, envvars: Optional[ParamDict] = None) -> None:
+        """Start a new CNS process, closing the current one if any."""
+        self.close()
+        self.envvars = dict(envvars or {})
+        self.process = subprocess.Popen(
+            self.cns_exec,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            close_fds=True,
+            env=self.envvars,
+        )
+        self.njobs = 0
+
+    def close(self) -> None:
+        """Close the CNS process."""
+        if self.process is None:
+            return
+        with suppress(OSError, ValueError):
+            if self.process.poll() is None:
+                self.process.stdin.write(f"stop{os.linesep}".encode())  # type: ignore # noqa: E501
+                self.process.stdin.close()  # type: ignore
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+
+    def run(
+        self,
+        inp: bytes,
+        envvars: Optional[ParamDict] = None,
+    ) -> tuple[bytes, bytes]:
+        """
+        Execute a job script.
+
+        Parameters
+        ----------
+        inp : bytes
+            The CNS job script.
+
+        envvars : dict
+            The environment variables needed by the job.
+
+        Returns
+        -------
+        tuple of bytes
+            The standard output of the job and an error message, which
+            is empty if the job finished without the process crashing.
+        """
+        envvars = dict(envvars or {})
+        script = inp.decode()
+        symbols = frozenset(_header_symbol_regex.findall(script))
+        if (
+            not self.is_alive()
+            or envvars != self.envvars
+            or self.njobs >= self.max_jobs
+            or (self.njobs and symbols != self.symbols)
+        ):
+            self.start(envvars)
+        if not self.njobs:
+            self.symbols = symbols
+
+        assert self.process is not None
+        script = _final_stop_regex.sub("", script)
+        if self.njobs:
+            script = _toppar_unloaded_regex.sub("", script)
+            script = CNSPROCESS_RESET + os.linesep + script
+        script += f"{os.linesep}display {CNSPROCESS_END_MARKER}{os.linesep}"
+
+        # write from a thread so the process never blocks on a full
+        # stdout pipe while we are still sending the script
+        writer = threading.Thread(
+            target=self._write,
+            args=(self.process, script.encode()),
+            daemon=True,
+        )
+        writer.start()
+
+        lines: list[bytes] = []
+        marker = CNSPROCESS_END_MARKER.encode()
+        for line in iter(self.process.stdout.readline, b""):  # type: ignore
+            if line.strip() == marker:
+                break
+            lines.append(line)
+        else:
+            # end of file reached before the marker, the process died
+            writer.join()
+            returncode = self.process.wait()
+            self.process = None
+            return (
+                b"".join(lines),
+                f"CNS process exited with code {returncode}".encode(),
+            )
+
+        writer.join()
+        self.njobs += 1
+        return b"".join(lines), b""
+
+    @staticmethod
+    def _write(process: subprocess.Popen, script: bytes) -> None:
+        with suppress(BrokenPipeError, OSError, ValueError):
+            process.stdin.write(script)  # type: ignore
+            process.stdin.flush()  # type: ignore
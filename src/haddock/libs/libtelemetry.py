@@ -0,0 +1,276 @@
+"""
+Per-task resource usage of the execution engines.
+
+The engines measure each task with :py:func:`run_measured` and, when
+created with :py:func:`haddock.modules.get_engine`, write the
+measurements of a step to its `tasks.tsv` file and log a summary, which
+helps to choose `ncores` and `concat` from data.
+"""
+
+import os
+import resource
+import socket
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from haddock import log
+from haddock.core.typing import Any, Callable, FilePath, Optional, SupportsRunT
+from haddock.libs.libsubprocess import CNSJob
+from haddock.libs.libtimer import convert_seconds_to_min_sec
+
+
+TASKS_FILE = "tasks.tsv"
+"""Name of the file where each step saves the resources used by its tasks."""
+
+TASK_FIELDS = (
+    "task_id",
+    "input",
+    "worker",
+    "wall_time",
+    "cpu_time",
+    "peak_rss_mb",
+    "status",
+    "retries",
+    )
+"""Columns of the :py:data:`TASKS_FILE`."""
+
+
+class TaskStats:
+    """Resources used by a task."""
+
+    def __init__(
+            self,
+            task_id: int,
+            input_: str = "",
+            worker: str = "",
+            wall_time: float = float("nan"),
+            cpu_time: float = float("nan"),
+            peak_rss_mb: float = float("nan"),
+            status: str = "ok",
+            retries: int = 0,
+            ) -> None:
+        """
+        Resources used by a task.
+
+        Parameters
+        ----------
+        task_id : int
+            The index of the task in the engine's task list.
+
+        input_ : str
+            The input file of the task, see :py:func:`task_input`.
+
+        worker : str
+            The `host:pid` of the process that executed the task.
+
+        wall_time : float
+            The elapsed time in seconds.
+
+        cpu_time : float
+            The user and system CPU time in seconds of the worker and
+            the subprocesses it waited for during the task.
+
+        peak_rss_mb : float
+            The largest resident set size in MB reached so far by the
+            worker or one of its subprocesses. Because the operating
+            system only reports the high-water mark, this is an upper
+            bound of the memory used by the task itself.
+
+        status : str
+            `ok` or `failed`.
+
+        retries : int
+            The number of times the task was restarted.
+        """
+        self.task_id = task_id
+        self.input = input_
+        self.worker = worker
+        self.wall_time = wall_time
+        self.cpu_time = cpu_time
+        self.peak_rss_mb = peak_rss_mb
+        self.status = status
+        self.retries = retries
+
+    def __repr__(self) -> str:
+        return (
+            f"TaskStats({self.task_id}, {self.input!r}, "
+            f"wall_time={self.wall_time:.2f}, status={self.status!r})"
+            )
+
+    def to_row(self) -> str:
+        """Format the stats as a line of the :py:data:`TASKS_FILE`."""
+        return "\t".join((
+            str(self.task_id),
+            self.input,
+            self.worker,
+            f"{self.wall_time:.3f}",
+            f"{self.cpu_time:.3f}",
+            f"{self.peak_rss_mb:.1f}",
+            self.status,
+            str(self.retries),
+            ))
+
+
+def worker_name() -> str:
+    """Identify the current process as `host:pid`."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def task_input(task: Any) -> str:
+    """
+    Name the input of a task.
+
+    For CNS jobs whose input script is given as a string, the output
+    file name is used instead.
+    """
+    if isinstance(task, CNSJob):
+        if isinstance(task.input_file, Path):
+            return str(task.input_file)
+        return str(task.output_file or "")
+
+    for attr in ("input", "model"):
+        value = getattr(task, attr, None)
+        if value is not None:
+            return str(getattr(value, "file_name", value))
+    return ""
+
+
+def cpu_time() -> float:
+    """Give the CPU seconds used by this process and its subprocesses."""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def peak_rss_mb() -> float:
+    """Give the peak RSS in MB of this process or its subprocesses."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # kilobytes in Linux
+    return max(own, children) / 1024
+
+
+def run_measured(
+        task: SupportsRunT,
+        task_id: int,
+        run: Optional[Callable[[], Any]] = None,
+        ) -> tuple[Any, TaskStats]:
+    """
+    Run a task measuring the resources it uses.
+
+    Exceptions raised by the task are logged and mark the task as
+    failed, its result is then `None`.
+
+    Parameters
+    ----------
+    task : object
+        The task to run. Must have method `run()`.
+
+    task_id : int
+        The index of the task.
+
+    run : callable, optional
+        The function running the task, defaults to `task.run`.
+
+    Returns
+    -------
+    tuple
+        The result of the task and its :py:class:`TaskStats`.
+    """
+    run = run or task.run
+    stats = TaskStats(task_id, task_input(task), worker_name())
+    result = None
+    start_wall = time.perf_counter()
+    start_cpu = cpu_time()
+    try:
+        result = run()
+    except Exception as e:
+        log.warning(f"Exception in task execution: {e}")
+        stats.status = "failed"
+    stats.wall_time = time.perf_counter() - start_wall
+    stats.cpu_time = cpu_time() - start_cpu
+    stats.peak_rss_mb = peak_rss_mb()
+    return result, stats
+
+
+def write_tasks_file(
+        stats: list[TaskStats],
+        path: FilePath = TASKS_FILE,
+        ) -> Path:
+    """
+    Save the stats of the tasks, sorted by task id.
+
+    If the file exists, for example because the module ran several
+    engines, the stats are appended to it.
+    """
+    fpath = Path(path)
+    new_file = not fpath.exists()
+    with open(fpath, "a") as fout:
+        if new_file:
+            fout.write("\t".join(TASK_FIELDS) + os.linesep)
+        for task_stats in sorted(stats, key=lambda s: s.task_id):
+            fout.write(task_stats.to_row() + os.linesep)
+    return fpath
+
+
+def summarize_tasks(stats: list[TaskStats]) -> dict[str, float]:
+    """
+    Summarize the resources used by the tasks.
+
+    The load imbalance is the busy time of the busiest worker divided by
+    the mean busy time of all workers; it is 1 when the work is evenly
+    spread.
+
+    Returns
+    -------
+    dict
+        The number of tasks, failed tasks and workers, the p50, p95 and
+        max wall times, the total CPU time, the max peak RSS and the
+        load imbalance.
+    """
+    busy: dict[str, float] = {}
+    for s in stats:
+        busy[s.worker] = busy.get(s.worker, 0.0) + s.wall_time
+
+    # some engines cannot measure everything, unknown values are NaN
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        wall = np.array([s.wall_time for s in stats], dtype=float)
+        busy_times = np.array(list(busy.values()), dtype=float)
+        return {
+            "tasks": len(stats),
+            "failed": sum(s.status != "ok" for s in stats),
+            "workers": len(busy),
+            "wall_p50": float(np.nanpercentile(wall, 50)),
+            "wall_p95": float(np.nanpercentile(wall, 95)),
+            "wall_max": float(np.nanmax(wall)),
+            "cpu_total": float(np.nansum([s.cpu_time for s in stats])),
+            "peak_rss_mb": float(np.nanmax([s.peak_rss_mb for s in stats])),
+            "imbalance": float(np.nanmax(busy_times) / np.nanmean(busy_times)),
+            }
+
+
+def report_tasks(
+        stats: list[TaskStats],
+        path: FilePath = TASKS_FILE,
+        ) -> None:
+    """Save the stats of the tasks to `path` and log their summary."""
+    if not stats:
+        return
+    write_tasks_file(stats, path)
+
+    summary = summarize_tasks(stats)
+    log.info(
+        f"Task wall times: p50 {summary['wall_p50']:.2f}s, "
+        f"p95 {summary['wall_p95']:.2f}s, max {summary['wall_max']:.2f}s; "
+        f"total CPU {convert_seconds_to_min_sec(summary['cpu_total'])}; "
+        f"peak RSS {summary['peak_rss_mb']:.1f} MB"
+        )
+    log.info(
+        f"{summary['tasks']} tasks ({summary['failed']} failed) on "
+        f"{summary['workers']} workers, load imbalance "
+        f"{summary['imbalance']:.2f}"
+        )
@@ -1,6 +1,7 @@
 """HADDOCK3 workflow logic."""
 import importlib
 import sys
+from functools import partial
 from pathlib import Path
 from time import time
 
@@ -8,18 +9,28 @@ from haddock import log
 from haddock.clis.cli_analyse import main as cli_analyse
 from haddock.clis.cli_traceback import main as cli_traceback
 from haddock.core.exceptions import HaddockError, HaddockTermination, StepError
-from haddock.core.typing import Any, ModuleParams, Optional
+from haddock.core.typing import Any, ModuleParams, Optional, Union
 from haddock.gear.clean_steps import clean_output
 from haddock.gear.config import get_module_name
 from haddock.gear.zerofill import zero_fill
+from haddock.libs.libio import working_directory
+from haddock.libs.libontology import PDBFile
+from haddock.libs.libparallel import Scheduler
+from haddock.libs.libsubprocess import CNSJob
+from haddock.libs.libtelemetry import TASKS_FILE
 from haddock.libs.libtimer import convert_seconds_to_min_sec, log_time
 from haddock.libs.libutil import recursive_dict_update
 from haddock.modules import (
+    BaseHaddockModule,
     modules_category,
     non_mandatory_general_parameters_defaults,
 )
 
 
+FUSABLE_MODULES = ("flexref", "emref", "mdref", "emscoring")
+"""CNS modules producing one model per input model that can be fused."""
+
+
 class WorkflowManager:
     """Read and execute workflows."""
 
@@ -27,10 +38,14 @@ class WorkflowManager:
         self,
         workflow_params: ModuleParams,
         start: Optional[int] = 0,
+        resume: bool = False,
         **other_params: Any,
     ) -> None:
         self.start = 0 if start is None else start
         self.recipe = Workflow(workflow_params, start=0, **other_params)
+        if resume and self.start < len(self.recipe.steps):
+            # keep the models generated by the interrupted step
+            self.recipe.steps[self.start].resume = True
         # terminate is used to synchronize the `clean` option with the
         # `exit` module. If the `exit` module is removed in the future,
         # you can also remove and clean the `terminate` part here.
@@ -38,12 +53,48 @@ class WorkflowManager:
 
     def run(self) -> None:
         """High level workflow composer."""
-        for i, step in enumerate(self.recipe.steps[self.start :], start=self.start):
+        i = self.start
+        while i < len(self.recipe.steps):
+            chain = self.fusable_chain(i)
             try:
-                step.execute()
+                if len(chain) > 1:
+                    FusedSteps(chain).execute()
+                else:
+                    self.recipe.steps[i].execute()
             except HaddockTermination:
                 self._terminated = i  # type: ignore
                 break
+            i += max(len(chain), 1)
+
+    def fusable_chain(self, index: int) -> list["Step"]:
+        """
+        Get the consecutive steps that can be fused starting at `index`.
+
+        Steps can be fused when `fuse_refinement` is enabled, they run in
+        `local` mode and their module is one of :py:data:`FUSABLE_MODULES`.
+        All but the first step must produce a single model per input
+        model (`sampling_factor` of 1). A step being resumed is not
+        fused.
+
+        Returns
+        -------
+        list of :py:class:`Step`
+            The fusable steps, empty if the step at `index` cannot be
+            fused.
+        """
+        chain: list[Step] = []
+        for step in self.recipe.steps[index:]:
+            fusable = (
+                not step.resume
+                and step.module_name in FUSABLE_MODULES
+                and step.config.get("fuse_refinement", False)
+                and step.config.get("mode") == "local"
+                and (not chain or step.config.get("sampling_factor", 1) == 1)
+            )
+            if not fusable:
+                break
+            chain.append(step)
+        return chain
 
     def clean(self, terminated: Optional[int] = None) -> None:
         """
@@ -142,10 +193,12 @@ class Step:
         self.order = order
         self.working_path = Path(zero_fill.fill(self.module_name, self.order))  # type: ignore
         self.module = None
+        # whether to keep the models of a previous, interrupted execution
+        self.resume = False
 
-    def execute(self) -> None:
-        """Execute simulation step."""
-        self.working_path.resolve().mkdir(parents=False, exist_ok=False)
+    def load_module(self) -> BaseHaddockModule:
+        """Create the step folder and the configured module instance."""
+        self.working_path.resolve().mkdir(parents=False, exist_ok=self.resume)
 
         # Import the module given by the mode or default
         module_name = ".".join(
@@ -153,12 +206,18 @@ class Step:
         )
         module_lib = importlib.import_module(module_name)
         self.module = module_lib.HaddockModule(order=self.order, path=self.working_path)
+        self.module.resume = self.resume  # type: ignore
+        self.module.update_params(**self.config)  # type: ignore
+        self.module.save_config(Path(self.working_path, "params.cfg"))  # type: ignore
+        return self.module  # type: ignore
+
+    def execute(self) -> None:
+        """Execute simulation step."""
+        self.load_module()
 
         # Run module
         start = time()
         try:
-            self.module.update_params(**self.config)  # type: ignore
-            self.module.save_config(Path(self.working_path, "params.cfg"))  # type: ignore
             self.module.run()  # type: ignore
         except KeyboardInterrupt:
             log.info("You have halted subprocess execution by hitting Ctrl+c")
@@ -177,3 +236,120 @@ class Step:
 
         elif self.module is not None and self.module.params["clean"]:
             self.module.clean_output()
+
+
+class FusedSteps:
+    """Represents a chain of one-to-one CNS steps executed model by model."""
+
+    def __init__(self, steps: list[Step]) -> None:
+        """
+        Fuse consecutive steps of the workflow.
+
+        Instead of waiting for all the models of a step before starting
+        the next one, each model goes through all the steps in a single
+        task. The step folders, the generated files and the `io.db`
+        files are the same as when executing the steps one after the
+        other, except that when a model fails, the models derived from
+        it in the next steps are reported missing.
+
+        Parameters
+        ----------
+        steps : list of :py:class:`Step`
+            The steps to fuse, in workflow order. Their modules must
+            implement `plan_cns_jobs` and `collect_output`, see
+            :py:data:`FUSABLE_MODULES`.
+        """
+        self.steps = steps
+
+    def execute(self) -> None:
+        """Execute the fused steps."""
+        names = ", ".join(step.module_name for step in self.steps)
+        log.info(f"Running fused steps: {names}")
+        modules = [step.load_module() for step in self.steps]
+
+        start = time()
+        try:
+            # define the outputs and jobs of all the steps beforehand,
+            # the inputs of the next steps are the expected outputs
+            job_factories: list[list[partial[CNSJob]]] = []
+            models: Optional[list[PDBFile]] = None
+            for module in modules:
+                if models is not None:
+                    module._num_of_input_molecules = len(models)
+                module.setup()  # type: ignore
+                with working_directory(module.path):
+                    job_factories.append(module.plan_cns_jobs(models))  # type: ignore
+                models = module.output_models  # type: ignore
+
+            tasks = [
+                FusedModelTask(
+                    [
+                        (module.path.resolve(), factories[i], module.output_models[i])
+                        for module, factories in zip(modules, job_factories)
+                    ]
+                )
+                for i in range(len(job_factories[0]))
+            ]
+
+            log.info(f"Running fused CNS jobs n={len(tasks)}")
+            engine = Scheduler(
+                tasks,
+                ncores=modules[0].params["ncores"],
+                max_cpus=modules[0].params["max_cpus"],
+                stats_file=Path(modules[0].path, TASKS_FILE),
+            )
+            engine.run()
+
+            for i, module in enumerate(modules):
+                if i > 0:
+                    # the io.db of the previous step is now available
+                    module.previous_io = module._load_previous_io()
+                with working_directory(module.path):
+                    module.collect_output()  # type: ignore
+                module.log("finished")
+
+        except KeyboardInterrupt:
+            log.info("You have halted subprocess execution by hitting Ctrl+c")
+            log.info("Exiting...")
+            sys.exit(1)
+
+        end = time()
+        elapsed = convert_seconds_to_min_sec(end - start)
+        log.info(f"Fused steps {names} took {elapsed}")
+
+
+class FusedModelTask:
+    """Runs the CNS jobs of one model through a chain of fused steps."""
+
+    def __init__(
+        self,
+        links: list[tuple[Path, partial[CNSJob], PDBFile]],
+    ) -> None:
+        """
+        Chain CNS jobs of different steps.
+
+        Parameters
+        ----------
+        links : list of tuples
+            For each step, the absolute path of the step folder, the
+            callable creating the CNS job and the model expected from
+            the job. The CNS job of a step is created once the model of
+            the previous step exists.
+        """
+        self.links = links
+
+    def run(self) -> Union[bytes, None]:
+        """Run the chain, stopping at the first missing model."""
+        out = None
+        for path, make_job, expected_pdb in self.links:
+            with working_directory(path):
+                try:
+                    job = make_job()
+                    out = job.run()
+                except Exception as e:
+                    log.warning(f"Exception in fused task execution: {e}")
+                    return None
+
+                if not expected_pdb.is_present():
+                    return None
+        return out
@@ -14,9 +14,11 @@ from haddock.core.defaults import MODULE_IO_FILE, INTERACTIVE_RE_SUFFIX
 from haddock.core.exceptions import ConfigurationError
 from haddock.core.typing import (
     Any,
+    Callable,
     Container,
     FilePath,
     Generator,
+    Iterable,
     Literal,
     Optional,
     ParamDict,
@@ -27,11 +29,16 @@ from haddock.gear.clean_steps import clean_output
 from haddock.gear.known_cns_errors import find_all_cns_errors
 from haddock.gear.parameters import config_mandatory_general_parameters
 from haddock.gear.yaml2cfg import read_from_yaml_config, find_incompatible_parameters
+from haddock.libs.libasync import AsyncScheduler
+from haddock.libs.libcatalog import CATALOG_FILE, RunCatalog
+from haddock.libs.libcluster import ClusterScheduler
 from haddock.libs.libhpc import HPCScheduler
 from haddock.libs.libio import folder_exists, working_directory
 from haddock.libs.libmpi import MPIScheduler
-from haddock.libs.libontology import ModuleIO, PDBFile
-from haddock.libs.libparallel import Scheduler
+from haddock.libs.libontology import ModuleIO, PDBFile, find_io_file
+from haddock.libs.libparallel import CNSProcessScheduler, Scheduler
+from haddock.libs.libsubprocess import CNSJob
+from haddock.libs.libtelemetry import TASKS_FILE
 from haddock.libs.libtimer import log_time
 from haddock.libs.libutil import recursive_dict_update
 
@@ -129,6 +136,8 @@ class BaseHaddockModule(ABC):
         """
         self.order = order
         self.path = path
+        # set when resuming a step interrupted in a previous execution
+        self.resume = False
         self.previous_io = self._load_previous_io()
 
         # instantiate module's parameters
@@ -294,6 +303,7 @@ class BaseHaddockModule(ABC):
         faulty = io.check_faulty()
         # Save outputs
         io.save()
+        self.add_to_catalog(io)
         # Check if number of generated outputs is under the tolerance threshold
         if faulty > faulty_tolerance:
             _msg = (
@@ -308,6 +318,24 @@ class BaseHaddockModule(ABC):
             # Show final error message
             self.finish_with_error(_msg)
 
+    def add_to_catalog(self, io: ModuleIO) -> None:
+        """
+        Record the output models in the run catalog.
+
+        Must be called from the step folder. Nothing is recorded if the
+        run directory has no `data` folder.
+
+        See Also
+        --------
+        :py:class:`haddock.libs.libcatalog.RunCatalog`
+        """
+        step_dir = Path.cwd()
+        catalog_path = Path(step_dir.parent, "data", CATALOG_FILE)
+        if not catalog_path.parent.is_dir():
+            return
+        catalog = RunCatalog(catalog_path)
+        catalog.add_step(self.order, step_dir.name, self.name, io.output, io.input)
+
     def finish_with_error(self, reason: object = "Module has failed.") -> None:
         """Finish with error message."""
         if isinstance(reason, Exception):
@@ -325,9 +353,9 @@ class BaseHaddockModule(ABC):
             return ModuleIO()
 
         io = ModuleIO()
-        previous_io = Path(self.previous_path(), filename)
+        previous_io = find_io_file(Path(self.previous_path(), filename))
 
-        if previous_io.is_file():
+        if previous_io is not None:
             io.load(previous_io)
 
         self._num_of_input_molecules = len(io.output)
@@ -392,13 +420,22 @@ class BaseHaddockModule(ABC):
                 self._params[param] = EmptyPath()
 
 
-EngineMode = Literal["batch", "local", "mpi"]
+EngineMode = Literal["async", "batch", "cluster", "local", "mpi", "warm"]
 
 
 def get_engine(
     mode: str,
     params: dict[Any, Any],
-) -> partial[Union[HPCScheduler, Scheduler, MPIScheduler]]:
+) -> partial[
+    Union[
+        AsyncScheduler,
+        ClusterScheduler,
+        HPCScheduler,
+        Scheduler,
+        MPIScheduler,
+        CNSProcessScheduler,
+    ]
+]:
     """
     Create an engine to run the jobs.
 
@@ -412,6 +449,49 @@ def get_engine(
         `get_engine` will retrieve from `params` only those parameters
         needed and ignore the others.
     """
+    engine = _select_engine(mode, params)
+    # batch jobs run CNS from shell scripts, without `CNSJob.run`
+    if params.get("cns_cache_dir") and mode != "batch":
+        # modules create their engines from the step folder
+        cache_dir = Path(Path.cwd().parent, params["cns_cache_dir"]).expanduser()
+        return partial(_use_cns_cache, engine, cache_dir)  # type: ignore
+    return engine
+
+
+def _use_cns_cache(
+    engine: Callable[..., Any],
+    cache_dir: Path,
+    tasks: Iterable[Any],
+    *args: Any,
+    **kwargs: Any,
+) -> Any:
+    """Create `engine` with the CNS jobs among `tasks` using the cache."""
+
+    def with_cache(task: Any) -> Any:
+        if isinstance(task, CNSJob):
+            task.cache_dir = cache_dir
+        return task
+
+    if isinstance(tasks, list):
+        tasks = [with_cache(task) for task in tasks]
+    else:
+        tasks = map(with_cache, tasks)
+    return engine(tasks, *args, **kwargs)
+
+
+def _select_engine(
+    mode: str,
+    params: dict[Any, Any],
+) -> partial[
+    Union[
+        AsyncScheduler,
+        ClusterScheduler,
+        HPCScheduler,
+        Scheduler,
+        MPIScheduler,
+        CNSProcessScheduler,
+    ]
+]:
     # a bit of a factory pattern here
     # this might end up in another module but for now its fine here
     if mode == "batch":
@@ -420,6 +500,9 @@ def get_engine(
             target_queue=params["queue"],
             queue_limit=params["queue_limit"],
             concat=params["concat"],
+            job_array=params["job_array"],
+            batch_type=params["batch_type"],
+            stats_file=TASKS_FILE,
         )
 
     elif mode == "local":
@@ -427,12 +510,43 @@ def get_engine(
             Scheduler,
             ncores=params["ncores"],
             max_cpus=params["max_cpus"],
+            stats_file=TASKS_FILE,
         )
     elif mode == "mpi":
-        return partial(MPIScheduler, ncores=params["ncores"])  # type: ignore
+        return partial(  # type: ignore
+            MPIScheduler,
+            ncores=params["ncores"],
+            stats_file=TASKS_FILE,
+        )
+
+    elif mode == "warm":
+        return partial(  # type: ignore
+            CNSProcessScheduler,
+            ncores=params["ncores"],
+            max_cpus=params["max_cpus"],
+            stats_file=TASKS_FILE,
+        )
+
+    elif mode == "async":
+        return partial(  # type: ignore
+            AsyncScheduler,
+            ncores=params["ncores"],
+            max_cpus=params["max_cpus"],
+            stats_file=TASKS_FILE,
+        )
+
+    elif mode == "cluster":
+        return partial(  # type: ignore
+            ClusterScheduler,
+            host=params["cluster_host"],
+            port=params["cluster_port"],
+            local_workers=params["cluster_local_workers"],
+            max_idle=params["cluster_max_idle"],
+            stats_file=TASKS_FILE,
+        )
 
     else:
-        available_engines = ("batch", "local", "mpi")
+        available_engines = ("async", "batch", "cluster", "local", "mpi", "warm")
         raise ValueError(
             f"Scheduler `mode` {mode!r} not recognized. "
             f"Available options are {', '.join(available_engines)}"
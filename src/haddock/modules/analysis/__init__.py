@@ -44,9 +44,9 @@ def get_analysis_exec_mode(mode: str) -> str:
     -------
     str
         The execution mode to use for the analysis modules. 
-        If it's "batch", it will be changed to "local".
+        If it's "async", "batch" or "warm", it will be changed to "local".
     """
-    if mode != "batch":
+    if mode not in ("async", "batch", "warm"):
         exec_mode = mode
     else:
         exec_mode = "local"
@@ -29,7 +29,10 @@ from pathlib import Path
 
 from haddock.core.defaults import MODULE_DEFAULT_YAML
 from haddock.core.typing import Any, FilePath, Union
+from haddock.libs.libalign import ALIGNMENT_CACHE_FILE
+from haddock.libs.libcluster import ClusterScheduler
 from haddock.libs.libontology import PDBFile
+from haddock.libs.libmpi import MPIScheduler
 from haddock.libs.libparallel import Scheduler
 from haddock.modules import (
     BaseHaddockModule,
@@ -39,6 +42,7 @@ from haddock.modules import (
 from haddock.modules.analysis import get_analysis_exec_mode
 from haddock.modules.analysis.caprieval.capri import (
     CAPRI,
+    ReferenceContext,
     capri_cluster_analysis,
     dump_weights,
     extract_data_from_capri_class,
@@ -65,6 +69,8 @@ class HaddockModule(BaseHaddockModule):
         **everything: Any,
     ) -> None:
         super().__init__(order, path, init_params)
+        # sequence alignments of the step, reused when analysing it again
+        self.alignment_cache = Path(ALIGNMENT_CACHE_FILE)
 
     @classmethod
     def confirm_installation(cls) -> None:
@@ -109,10 +115,15 @@ class HaddockModule(BaseHaddockModule):
             )
             reference = best_model_fname
 
+        # parse the reference once, the jobs share it
+        ReferenceContext.load(reference, full=self.params["allatoms"]).prepare(
+            self.params
+        )
+
         exec_mode = get_analysis_exec_mode(self.params["mode"])
         Engine = get_engine(exec_mode, self.params)
 
-        _less_io = self.params["mode"] == "local" and not self.params["debug"]
+        _less_io = exec_mode in ("cluster", "local", "mpi") and not self.params["debug"]
 
         # Each model is a job; this is not the most efficient way
         #  but by assigning each model to an individual job
@@ -134,13 +145,16 @@ class HaddockModule(BaseHaddockModule):
                     reference=reference,
                     params=self.params,
                     debug=not _less_io,
+                    alignment_cache=self.alignment_cache,
                 )
             )
 
         engine = Engine(jobs)
         engine.run()
 
-        if _less_io and isinstance(engine, Scheduler):
+        if _less_io and isinstance(
+            engine, (ClusterScheduler, Scheduler, MPIScheduler)
+        ):
             jobs = engine.results
             extract_data_from_capri_class(
                 capri_objects=jobs,
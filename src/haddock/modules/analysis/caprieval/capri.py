@@ -4,6 +4,7 @@ import copy
 import os
 import shutil
 import tempfile
+from contextlib import suppress
 from itertools import combinations
 from pathlib import Path
 
@@ -12,7 +13,7 @@ os.environ["OPENBLAS_NUM_THREADS"] = "1"
 
 import numpy as np
 from pdbtools import pdb_segxchain
-from scipy.spatial.distance import cdist
+from scipy.spatial import cKDTree
 
 from haddock import log
 from haddock.core.defaults import CNS_MODULES
@@ -30,14 +31,12 @@ from haddock.core.typing import (
 )
 from haddock.libs.libalign import (
     ALIGNError,
-    calc_rmsd,
-    centroid,
     check_chains,
     get_align,
     get_atoms,
-    kabsch,
     load_coords,
     make_range,
+    superpose_rmsd,
 )
 from haddock.libs.libio import write_dic_to_file, write_nested_dic_to_file
 from haddock.libs.libontology import PDBFile, PDBPath
@@ -116,6 +115,10 @@ def load_contacts(
 ) -> set[tuple]:
     """Load residue-based contacts.
 
+    Two residues of different chains are in contact if any of their atoms
+    are closer than `cutoff`. The close atoms are found with a k-d tree
+    of each chain, for all the atoms of a chain pair at once.
+
     Parameters
     ----------
     pdb_f : PosixPath or :py:class:`haddock.libs.libontology.PDBFile`
@@ -149,24 +152,164 @@ def load_contacts(
         coord_ids[chain].append(atom[1])  # only the resid is appended
     for chain in coord_arrays.keys():
         coord_arrays[chain] = np.array(coord_arrays[chain])
+    trees = {chain: cKDTree(xyz) for chain, xyz in coord_arrays.items()}
 
     # combinations of chains
     unique_chain_combs = list(combinations(sorted(coord_arrays.keys()), 2))
 
     # calculating contacts
-    con_list: list[tuple] = []
-    for pair in unique_chain_combs:
-        # cycling over each coordinate of the first chain
-        for s in range(coord_arrays[pair[0]].shape[0]):
-            s_xyz = coord_arrays[pair[0]][s].reshape(1, 3)
-            s_cid = coord_ids[pair[0]][s]
-            dist = cdist(s_xyz, coord_arrays[pair[1]])
-            npw = np.where(dist < cutoff)
-            del dist
-            for k in range(npw[0].shape[0]):
-                con = (pair[0], s_cid, pair[1], coord_ids[pair[1]][npw[1][k]])
-                con_list.append(con)
-    return set(con_list)
+    contacts: set[tuple] = set()
+    for first, second in unique_chain_combs:
+        # the tree gives the pairs within the cutoff, included; distances
+        #  are computed again to keep only the ones strictly below it
+        pairs = trees[first].sparse_distance_matrix(
+            trees[second],
+            cutoff * (1 + 1e-9),
+            output_type="ndarray",
+        )
+        first_idx = pairs["i"]
+        second_idx = pairs["j"]
+        diff = coord_arrays[first][first_idx] - coord_arrays[second][second_idx]
+        close = np.sqrt((diff * diff).sum(axis=1)) < cutoff
+        first_resids = np.asarray(coord_ids[first])[first_idx[close]]
+        second_resids = np.asarray(coord_ids[second])[second_idx[close]]
+        contacts.update(
+            (first, first_resid, second, second_resid)
+            for first_resid, second_resid in zip(
+                first_resids.tolist(), second_resids.tolist()
+            )
+        )
+    return contacts
+
+
+def interface_residues(contacts: Iterable[tuple]) -> dict[str, list[int]]:
+    """
+    Give the residues of each chain taking part in the contacts.
+
+    Parameters
+    ----------
+    contacts : iterable
+        The contacts, as given by :py:func:`load_contacts`.
+
+    Returns
+    -------
+    interface_resdic : dict[str, list[int]]
+        Dictionary holding list of interface residues ids for each chains.
+    """
+    interface_resdic: dict[str, list[int]] = {}
+    for contact in contacts:
+        first_chain, first_resid, sec_chain, sec_resid = contact
+
+        if first_chain not in interface_resdic:
+            interface_resdic[first_chain] = []
+        if sec_chain not in interface_resdic:
+            interface_resdic[sec_chain] = []
+
+        if first_resid not in interface_resdic[first_chain]:
+            interface_resdic[first_chain].append(first_resid)
+        if sec_resid not in interface_resdic[sec_chain]:
+            interface_resdic[sec_chain].append(sec_resid)
+
+    return interface_resdic
+
+
+_reference_contexts: dict[tuple, "ReferenceContext"] = {}
+
+
+class ReferenceContext:
+    """Reference structure data shared by the CAPRI jobs."""
+
+    def __init__(self, reference: PDBPath, full: bool = False) -> None:
+        """
+        Read the reference structure data shared by the CAPRI jobs.
+
+        The atoms of the reference are read when the context is created,
+        its contacts, interfaces and coordinates are computed the first
+        time they are needed and kept. The returned objects are shared
+        by all the jobs and must not be modified.
+
+        Use :py:meth:`load` to get the context of a reference. Contexts
+        loaded in the parent process before the workers start are
+        inherited by them, so the reference is read only once per step.
+
+        Parameters
+        ----------
+        reference : PosixPath or :py:class:`haddock.libs.libontology.PDBFile`
+            The reference structure.
+        full : bool
+            Whether to use all the heavy atoms, see `allatoms`.
+        """
+        if isinstance(reference, PDBFile):
+            reference = reference.rel_path
+        self.reference = Path(reference)
+        self.full = full
+        self.atoms = get_atoms(self.reference, full=full)
+        self._contacts: dict[float, set[tuple]] = {}
+        self._interfaces: dict[float, dict[str, list[int]]] = {}
+        self._coords: dict[Optional[float], dict[tuple, NDFloat]] = {}
+
+    @classmethod
+    def load(cls, reference: PDBPath, full: bool = False) -> "ReferenceContext":
+        """
+        Give the context of a reference, creating it the first time.
+
+        Contexts are kept per process, and identified by the path,
+        modification time and size of the reference file.
+        """
+        if isinstance(reference, PDBFile):
+            reference = reference.rel_path
+        stat = os.stat(reference)
+        key = (str(Path(reference).resolve()), full, stat.st_mtime_ns, stat.st_size)
+        if key not in _reference_contexts:
+            _reference_contexts[key] = cls(reference, full=full)
+        return _reference_contexts[key]
+
+    def contacts(self, cutoff: float) -> set[tuple]:
+        """Give the contacts of the reference, see :py:func:`load_contacts`."""
+        if cutoff not in self._contacts:
+            self._contacts[cutoff] = load_contacts(self.reference, cutoff)
+        return self._contacts[cutoff]
+
+    def interface(self, cutoff: float) -> dict[str, list[int]]:
+        """Give the interface residues of the reference for a cutoff."""
+        if cutoff not in self._interfaces:
+            self._interfaces[cutoff] = interface_residues(self.contacts(cutoff))
+        return self._interfaces[cutoff]
+
+    def coords(self, cutoff: Optional[float] = None) -> dict[tuple, NDFloat]:
+        """
+        Give the coordinates of the reference atoms.
+
+        Parameters
+        ----------
+        cutoff : float, optional
+            If given, only the atoms of the interface residues for this
+            cutoff. Otherwise, all the atoms.
+
+        Returns
+        -------
+        coord_dic : dict
+            The coordinates of each `(chain, resnum, atom)`, see
+            :py:func:`haddock.libs.libalign.load_coords`.
+        """
+        if cutoff not in self._coords:
+            filter_resdic = None if cutoff is None else self.interface(cutoff)
+            self._coords[cutoff], _ = load_coords(
+                self.reference, self.atoms, filter_resdic
+            )
+        return self._coords[cutoff]
+
+    def prepare(self, params: ParamMap) -> "ReferenceContext":
+        """Compute beforehand the reference data of the enabled metrics."""
+        # reference errors are reported by each job
+        with suppress(ALIGNError):
+            if params["fnat"]:
+                self.contacts(params["fnat_cutoff"])
+            if params["irmsd"] or params["ilrmsd"]:
+                self.coords(params["irmsd_cutoff"])
+            if params["lrmsd"] or params["global_rmsd"]:
+                self.coords()
+        return self
 
 
 class CAPRI:
@@ -180,6 +323,7 @@ class CAPRI:
         reference: PDBPath,
         params: ParamMap,
         debug: Optional[bool] = False,
+        alignment_cache: Optional[FilePath] = None,
     ) -> None:
         """
         Initialize the class.
@@ -196,6 +340,9 @@ class CAPRI:
             The reference structure.
         params : dict
             The parameters for the CAPRI evaluation.
+        alignment_cache : str or pathlib.Path, optional
+            The database of the sequence alignments of the step, see
+            :py:class:`haddock.libs.libalign.AlignmentCache`.
         """
         self.reference = reference
         if not isinstance(model, PDBFile):
@@ -226,6 +373,12 @@ class CAPRI:
         self.identificator = identificator
         self.core_model_idx = identificator
         self.debug = debug
+        self.alignment_cache = alignment_cache
+
+    @property
+    def reference_context(self) -> ReferenceContext:
+        """Shared data of the reference structure."""
+        return ReferenceContext.load(self.reference, full=self.allatoms)
 
     def calc_irmsd(self, cutoff: float = 5.0) -> None:
         """Calculate the I-RMSD.
@@ -236,15 +389,13 @@ class CAPRI:
             The cutoff distance for the intermolecular contacts.
         """
         # Identify reference interface
-        ref_interface_resdic = self.identify_interface(self.reference, cutoff)
+        ref_interface_resdic = self.reference_context.interface(cutoff)
 
         if len(ref_interface_resdic) == 0:
             log.warning("No reference interface found")
         else:
             # Load interface coordinates
-            ref_coord_dic, _ = load_coords(
-                self.reference, self.atoms, ref_interface_resdic
-            )
+            ref_coord_dic = self.reference_context.coords(cutoff)
             try:
                 mod_coord_dic, _ = load_coords(
                     self.model,
@@ -270,23 +421,13 @@ class CAPRI:
                 Q.append(ref_xyz)
                 P.append(mod_xyz)
 
-            Q = np.asarray(Q)
-            P = np.asarray(P)
             # write_coords("model.pdb", P)
             # write_coords("ref.pdb", Q)
-
-            Q = Q - centroid(Q)
-            P = P - centroid(P)
-            U = kabsch(P, Q)
-            P = np.dot(P, U)
-
-            self.irmsd = calc_rmsd(P, Q)
-            # write_coords("model_aln.pdb", P)
-            # write_coords("ref_aln.pdb", Q)
+            self.irmsd = superpose_rmsd(P, Q)
 
     def calc_lrmsd(self) -> None:
         """Calculate the L-RMSD."""
-        ref_coord_dic, _ = load_coords(self.reference, self.atoms)
+        ref_coord_dic = self.reference_context.coords()
         try:
             mod_coord_dic, _ = load_coords(
                 self.model,
@@ -328,59 +469,17 @@ class CAPRI:
                 Q.append(ref_xyz)
                 P.append(mod_xyz)
 
-            Q = np.asarray(Q)
-            P = np.asarray(P)
-
-            # write_coords("ref_first.pdb", Q)
-            # write_coords("model_first.pdb", P)
-
-            # get receptor and ligand coordinates
-            Q_r_first = Q[r_start : r_end + 1]
-            P_r_first = P[r_start : r_end + 1]
-            # write_coords("ref_r_first.pdb", Q_r_first)
-            # write_coords("model_r_first.pdb", P_r_first)
-            # Q_l_first = Q[l_start: l_end + 1]
-            # P_l_first = P[l_start: l_end + 1]
-            # write_coords("ref_l_first.pdb", Q_l_first)
-            # write_coords("model_l_first.pdb", P_l_first)
-
-            # move to the origin of the receptor
-
-            Q = Q - centroid(Q_r_first)
-            P = P - centroid(P_r_first)
-
-            # get receptor coordinates
-            Q_r = Q[r_start : r_end + 1]
-            P_r = P[r_start : r_end + 1]
-            # Center receptors and get rotation matrix
-            # Q_r = Q_r - centroid(Q_r)
-            # P_r = P_r - centroid(P_r)
-            # write_coords("ref_r_centr.pdb", Q_r)
-            # write_coords("model_r_centr.pdb", P_r)
-
-            U_r = kabsch(P_r, Q_r)
-
-            # Apply rotation to complex
-            #  - complex are now aligned by the receptor
-            P = np.dot(P, U_r)
-
-            # write_coords("ref.pdb", Q)
-            # write_coords("model.pdb", P)
-
-            # Identify ligand coordinates concatenating all the ligand chains
-            Q_l = np.empty((0, 3))
-            P_l = np.empty((0, 3))
-            for l_start, l_end in zip(l_starts, l_ends):
-                Q_l = np.concatenate((Q_l, Q[l_start : l_end + 1]))
-                P_l = np.concatenate((P_l, P[l_start : l_end + 1]))
-            # Q_l = Q[l_start: l_end + 1]
-            # P_l = P[l_start: l_end + 1]
-
-            # write_coords("ref_l.pdb", Q_l)
-            # write_coords("model_l.pdb", P_l)
-
-            # Calculate the RMSD of the ligands
-            self.lrmsd = calc_rmsd(P_l, Q_l)
+            # superpose the receptors and calculate the RMSD of the
+            #  ligands, concatenating all the ligand chains
+            self.lrmsd = superpose_rmsd(
+                P,
+                Q,
+                fit=slice(r_start, r_end + 1),
+                measure=np.concatenate([
+                    np.arange(start, end + 1)
+                    for start, end in zip(l_starts, l_ends)
+                    ]),
+                )
 
     def calc_ilrmsd(self, cutoff: float = 10.0) -> None:
         """Calculate the Interface Ligand RMSD.
@@ -391,12 +490,10 @@ class CAPRI:
             The cutoff distance for the intermolecular contacts.
         """
         # Identify interface
-        ref_interface_resdic = self.identify_interface(self.reference, cutoff)
+        ref_interface_resdic = self.reference_context.interface(cutoff)
         # Load interface coordinates
 
-        ref_int_coord_dic, _ = load_coords(
-            self.reference, self.atoms, ref_interface_resdic
-        )
+        ref_int_coord_dic = self.reference_context.coords(cutoff)
         try:
             mod_int_coord_dic, _ = load_coords(
                 self.model,
@@ -446,43 +543,17 @@ class CAPRI:
             l_starts = [chain_ranges[l_chain][0] for l_chain in l_chains]
             l_ends = [chain_ranges[l_chain][1] for l_chain in l_chains]
 
-            # write_coords("ref.pdb", Q)
-            # write_coords("model.pdb", P)
-
-            # put system at origin of the receptor interface
-            Q_r_int = Q_int[r_start : r_end + 1]
-            P_r_int = P_int[r_start : r_end + 1]
-
-            Q_int = Q_int - centroid(Q_r_int)
-            P_int = P_int - centroid(P_r_int)
-            # put interfaces at the origin
-
-            # find the rotation that minimizes the receptor interface rmsd
-            Q_r_int = Q_int[r_start : r_end + 1]
-            P_r_int = P_int[r_start : r_end + 1]
-
-            U_int = kabsch(P_r_int, Q_r_int)
-            P_int = np.dot(P_int, U_int)
-            # just for checks.
-            # the interface rmsd for the rec interface should be almost zero
-            # Q_r_int = Q_int[r_start: r_end + 1]
-            # P_r_int = P_int[r_start: r_end + 1]
-            # r_rmsd = calc_rmsd(Q_r_int, P_int[r_start: r_end + 1])
-            # print(r_rmsd)
-            # Identify ligand coordinates concatenating all the ligand chains
-            Q_l_int = np.empty((0, 3))
-            P_l_int = np.empty((0, 3))
-            for l_start, l_end in zip(l_starts, l_ends):
-                Q_l_int = np.concatenate((Q_l_int, Q_int[l_start : l_end + 1]))
-                P_l_int = np.concatenate((P_l_int, P_int[l_start : l_end + 1]))
-            # prior to multibody:
-            # Q_l_int = Q_int[l_start: l_end + 1]
-            # P_l_int = P_int[l_start: l_end + 1]
-            # write_coords("ref_l_int_fin.pdb", Q_l_int)
-            # write_coords("mod_l_int_fin.pdb", P_l_int)
-
-            # # this will be the interface-ligand-rmsd
-            self.ilrmsd = calc_rmsd(P_l_int, Q_l_int)
+            # superpose the receptor interfaces and calculate the RMSD
+            #  of the ligand interfaces, concatenating all the ligand chains
+            self.ilrmsd = superpose_rmsd(
+                P_int,
+                Q_int,
+                fit=slice(r_start, r_end + 1),
+                measure=np.concatenate([
+                    np.arange(start, end + 1)
+                    for start, end in zip(l_starts, l_ends)
+                    ]),
+                )
 
     def calc_fnat(self, cutoff: float = 5.0) -> None:
         """Calculate the frequency of native contacts.
@@ -492,7 +563,7 @@ class CAPRI:
         cutoff : float
             The cutoff distance for the intermolecular contacts.
         """
-        ref_contacts = load_contacts(self.reference, cutoff)
+        ref_contacts = self.reference_context.contacts(cutoff)
         if len(ref_contacts) != 0:
             try:
                 model_contacts = load_contacts(
@@ -512,7 +583,7 @@ class CAPRI:
     def calc_global_rmsd(self) -> None:
         """Calculate the full structure RMSD."""
         # Load reference atomic coordinates
-        ref_coord_dic, _ = load_coords(self.reference, self.atoms)
+        ref_coord_dic = self.reference_context.coords()
         # Load model atomic coordinates
         try:
             model_coord_dic, _ = load_coords(
@@ -532,18 +603,8 @@ class CAPRI:
             mod_xyz = model_coord_dic[k]
             Q.append(ref_xyz)
             P.append(mod_xyz)
-        # Cast indo array
-        Q = np.asarray(Q)
-        P = np.asarray(P)
-        # Center to 0
-        Q = Q - centroid(Q)
-        P = P - centroid(P)
-        # Obtain rotation matrix
-        U = kabsch(P, Q)
-        # Rotate model (the actual superimposition)
-        P = np.dot(P, U)
-        # Compute full RMSD
-        self.rmsd = calc_rmsd(P, Q)
+        # Superpose the model and compute full RMSD
+        self.rmsd = superpose_rmsd(P, Q)
 
     def calc_dockq(self) -> None:
         """Calculate the DockQ metric."""
@@ -612,6 +673,7 @@ class CAPRI:
             align_func = get_align(
                 method=self.params["alignment_method"],
                 lovoalign_exec=self.params["lovoalign_exec"],
+                cache_file=self.alignment_cache,
             )
             self.model2ref_numbering, self.model2ref_chain_dict = align_func(
                 self.reference, self.model, self.path
@@ -685,7 +747,7 @@ class CAPRI:
             Dictionary containing atoms observed in model and reference
         """
         model_atoms = get_atoms(model, full=full)
-        reference_atoms = get_atoms(reference, full=full)
+        reference_atoms = ReferenceContext.load(reference, full=full).atoms
         atoms_dict: AtomsDict = {}
         atoms_dict.update(model_atoms)
         atoms_dict.update(reference_atoms)
@@ -713,23 +775,7 @@ class CAPRI:
         if isinstance(pdb_f, PDBFile):
             pdb_f = pdb_f.rel_path
 
-        interface_resdic: dict[str, list[int]] = {}
-        contacts = load_contacts(pdb_f, cutoff)
-
-        for contact in contacts:
-            first_chain, first_resid, sec_chain, sec_resid = contact
-
-            if first_chain not in interface_resdic:
-                interface_resdic[first_chain] = []
-            if sec_chain not in interface_resdic:
-                interface_resdic[sec_chain] = []
-
-            if first_resid not in interface_resdic[first_chain]:
-                interface_resdic[first_chain].append(first_resid)
-            if sec_resid not in interface_resdic[sec_chain]:
-                interface_resdic[sec_chain].append(sec_resid)
-
-        return interface_resdic
+        return interface_residues(load_contacts(pdb_f, cutoff))
 
     @staticmethod
     def add_chain_from_segid(pdb_path: PDBPath) -> Path:
@@ -6,13 +6,41 @@ from pathlib import Path
 from haddock import log
 from haddock import toppar_path as global_toppar
 from haddock.core.defaults import cns_exec as global_cns_exec
-from haddock.core.typing import Any, FilePath, Optional, Union
+from haddock.core.typing import (
+    Any,
+    FilePath,
+    Iterable,
+    Iterator,
+    Optional,
+    TypeVar,
+    Union,
+    )
 from haddock.gear.expandable_parameters import populate_mol_parameters_in_module
 from haddock.libs.libio import working_directory
 from haddock.libs.libutil import sort_numbered_paths
 from haddock.modules import BaseHaddockModule
 
 
+JobT = TypeVar("JobT")
+
+
+def is_complete_model(pdb_f: FilePath) -> bool:
+    """
+    Check whether CNS finished writing a model.
+
+    CNS ends the coordinates it writes with an `END` record, models
+    missing it were interrupted while being written.
+    """
+    try:
+        with open(pdb_f, "rb") as fin:
+            fin.seek(0, os.SEEK_END)
+            fin.seek(max(fin.tell() - 128, 0))
+            tail = fin.read().split()
+    except OSError:
+        return False
+    return bool(tail) and tail[-1] == b"END"
+
+
 class BaseCNSModule(BaseHaddockModule):
     """
     Operation module for CNS.
@@ -41,6 +69,15 @@ class BaseCNSModule(BaseHaddockModule):
         """Execute the module."""
         log.info(f'Running [{self.name}] module')
 
+        self.setup(**params)
+
+        with working_directory(self.path):
+            self._run()
+
+        log.info(f'Module [{self.name}] finished.')
+
+    def setup(self, **params: Any) -> None:
+        """Prepare the parameters and environment needed to run CNS."""
         self.update_params(**params)
 
         # the `mol_*` parameters exist only for CNS jobs.
@@ -57,11 +94,6 @@ class BaseCNSModule(BaseHaddockModule):
         if self.params['self_contained']:
             self.make_self_contained()
 
-        with working_directory(self.path):
-            self._run()
-
-        log.info(f'Module [{self.name}] finished.')
-
     def default_envvars(self) -> dict[str, str]:
         """Return default env vars updated to `envvars` (if given)."""
         default_envvars = {
@@ -113,6 +145,28 @@ class BaseCNSModule(BaseHaddockModule):
             shutil.copystat(_cns_exec, new_cns)
             self.params["cns_exec"] = Path("..", Path(_cns_exec).name)
 
+    def skip_generated(self, jobs: Iterable[JobT]) -> Iterator[JobT]:
+        """
+        Skip the jobs of the models generated before the step was resumed.
+
+        The job at position `i` of `jobs` must generate the model at
+        position `i` of `self.output_models`. `jobs` can be lazy, as long
+        as the model of each job is added to `self.output_models` before
+        the job is given. If the step is not resumed, all the jobs are
+        given.
+        """
+        if not self.resume:
+            yield from jobs
+            return
+
+        skipped = 0
+        for i, job in enumerate(jobs):
+            if is_complete_model(self.output_models[i].rel_path):
+                skipped += 1
+            else:
+                yield job
+        self.log(f"Resumed step, {skipped} models were already generated")
+
     def get_ambig_fnames(
             self, prev_ambig_fnames: list[Union[None, FilePath]]
             ) -> Union[list[FilePath], None]:
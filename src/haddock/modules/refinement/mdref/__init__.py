@@ -20,12 +20,13 @@ Number of MD steps can be modified using the ``waterheatsteps``, ``watersteps``
 and ``watercoolsteps``.
 """
 
+from functools import partial
 from pathlib import Path
 
 from haddock.core.defaults import MODULE_DEFAULT_YAML
-from haddock.core.typing import FilePath
-from haddock.gear.haddockmodel import HaddockModel
-from haddock.libs.libcns import prepare_cns_input, prepare_expected_pdb
+from haddock.core.typing import FilePath, Optional
+from haddock.gear.haddockmodel import score_models
+from haddock.libs.libcns import deferred_cns_job, prepare_expected_pdb
 from haddock.libs.libontology import PDBFile
 from haddock.libs.libsubprocess import CNSJob
 from haddock.modules import get_engine
@@ -55,16 +56,46 @@ class HaddockModule(BaseCNSModule):
     def _run(self) -> None:
         """Execute module."""
         # Pool of jobs to be executed by the CNS engine
-        jobs: list[CNSJob] = []
+        jobs: list[CNSJob] = [
+            make_job() for make_job in self.skip_generated(self.plan_cns_jobs())
+            ]
 
+        # Run CNS Jobs
+        self.log(f"Running CNS Jobs n={len(jobs)}")
+        Engine = get_engine(self.params["mode"], self.params)
+        engine = Engine(jobs)
+        engine.run()
+        self.log("CNS jobs have finished")
+
+        self.collect_output()
+
+    def plan_cns_jobs(
+        self,
+        models_to_refine: Optional[list[PDBFile]] = None,
+    ) -> list[partial[CNSJob]]:
+        """
+        Define the expected output models and the CNS jobs creating them.
+
+        Parameters
+        ----------
+        models_to_refine : list, optional
+            The models to refine. If `None`, uses the models generated in
+            the previous step.
+
+        Returns
+        -------
+        list of callables
+            One callable per element of `self.output_models`, creating
+            the CNS job that generates it.
+        """
         # Get the models generated in previous step
-        try:
-            models_to_refine = self.previous_io.retrieve_models()
-        except Exception as e:
-            self.finish_with_error(e)
+        if models_to_refine is None:
+            try:
+                models_to_refine = self.previous_io.retrieve_models()
+            except Exception as e:
+                self.finish_with_error(e)
 
         self.output_models: list[PDBFile] = []
-
         sampling_factor = self.params["sampling_factor"]
         if sampling_factor > 1:
             self.log(f"sampling_factor={sampling_factor}")
@@ -92,6 +123,7 @@ class HaddockModule(BaseCNSModule):
 
         ambig_fnames = self.get_ambig_fnames(prev_ambig_fnames)
 
+        job_factories: list[partial[CNSJob]] = []
         model_idx = 0
         idx = 1
         for model in models_to_refine:
@@ -103,20 +135,20 @@ class HaddockModule(BaseCNSModule):
             model_idx += 1
 
             for _ in range(self.params["sampling_factor"]):
-                mdref_input = prepare_cns_input(
+                # prepare cns input when the job is created
+                make_job = deferred_cns_job(
                     idx,
                     model,
                     self.path,
                     self.recipe_str,
                     self.params,
                     "mdref",
+                    envvars=self.envvars,
                     ambig_fname=ambig_fname,
                     native_segid=True,
                     debug=self.params["debug"],
                     seed=model.seed if isinstance(model, PDBFile) else None,
                 )
-                out_file = f"mdref_{idx}.out"
-                err_fname = f"mdref_{idx}.cnserr"
 
                 # create the expected PDBobject
                 expected_pdb = prepare_expected_pdb(model, idx, ".", "mdref")
@@ -127,30 +159,19 @@ class HaddockModule(BaseCNSModule):
                     expected_pdb.ori_name = None
                 self.output_models.append(expected_pdb)
 
-                job = CNSJob(mdref_input, out_file, err_fname, envvars=self.envvars)
-
-                jobs.append(job)
+                job_factories.append(make_job)
 
                 idx += 1
 
-        # Run CNS Jobs
-        self.log(f"Running CNS Jobs n={len(jobs)}")
-        Engine = get_engine(self.params["mode"], self.params)
-        engine = Engine(jobs)
-        engine.run()
-        self.log("CNS jobs have finished")
+        return job_factories
 
+    def collect_output(self) -> None:
+        """Score the generated models and save the module information."""
         # Get the weights from the defaults
         _weight_keys = ("w_vdw", "w_elec", "w_desolv", "w_air", "w_bsa")
         weights = {e: self.params[e] for e in _weight_keys}
 
-        for pdb in self.output_models:
-            if pdb.is_present():
-                haddock_model = HaddockModel(pdb.file_name)
-                pdb.unw_energies = haddock_model.energies
-
-                haddock_score = haddock_model.calc_haddock_score(**weights)
-                pdb.score = haddock_score
+        score_models(self.output_models, **weights)
 
         # Save module information
         self.export_io_models(faulty_tolerance=self.params["tolerance"])
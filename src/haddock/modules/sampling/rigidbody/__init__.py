@@ -29,16 +29,15 @@ diverse solutions will be obtained and the sampling should be increased to make
 sure to sample enough the possible interaction space.
 """
 
-from datetime import datetime
+from functools import partial
 from pathlib import Path
 
 from haddock.core.defaults import MODULE_DEFAULT_YAML
-from haddock.core.typing import FilePath, Sequence, Union
-from haddock.gear.haddockmodel import HaddockModel
+from haddock.core.typing import Any, FilePath, Iterator, Union
+from haddock.gear.haddockmodel import HaddockModel, score_models
 from haddock.libs.libcns import prepare_cns_input
 from haddock.libs.libontology import PDBFile
-from haddock.libs.libparallel import GenericTask, Scheduler
-from haddock.libs.libsubprocess import CNSJob
+from haddock.libs.libsubprocess import DeferredCNSJob
 from haddock.modules import get_engine
 from haddock.modules.base_cns_module import BaseCNSModule
 
@@ -64,36 +63,18 @@ class HaddockModule(BaseCNSModule):
         return
 
     def make_cns_jobs(
-        self,
-        inp_list: Sequence[
-            tuple[list[PDBFile], Union[Path, str], Union[str, None], int]
-        ],
-    ) -> list[CNSJob]:
-        jobs = []
-        for idx, e in enumerate(inp_list, start=1):
-            combination, inp_input, ambig_fname, seed = e
-
-            log_fname = f"rigidbody_{idx}.out"
-            err_fname = f"rigidbody_{idx}.cnserr"
-            output_pdb_fname = f"rigidbody_{idx}.pdb"
-
-            # Create a model for the expected output
-            model = PDBFile(output_pdb_fname, path=".", restr_fname=ambig_fname)
-            model.topology = [e.topology for e in combination]
-            model.seed = seed  # type: ignore
-            self.output_models.append(model)
-
-            job = CNSJob(inp_input, log_fname, err_fname, envvars=self.envvars)
-            jobs.append(job)
-        return jobs
-
-    def prepare_cns_input_sequential(
         self,
         models_to_dock: list[list[PDBFile]],
         sampling_factor: int,
         ambig_fnames: Union[list, None],
-    ) -> list[tuple[list[PDBFile], Union[Path, str], Union[str, None], int]]:
-        _l = []
+    ) -> Iterator[DeferredCNSJob]:
+        """
+        Create the CNS jobs and their expected models one at a time.
+
+        The CNS input of each job is rendered by the process running
+        the job. The expected model of each job is added to
+        `self.output_models` when the job is created.
+        """
         idx = 1
         for combination in models_to_dock:
             for _ in range(sampling_factor):
@@ -102,9 +83,20 @@ class HaddockModule(BaseCNSModule):
                     ambig_fname = ambig_fnames[idx - 1]
                 else:
                     ambig_fname = self.params["ambig_fname"]
-                # prepare cns input
                 seed = self.params["iniseed"] + idx
-                rigidbody_input = prepare_cns_input(
+
+                # Create a model for the expected output
+                model = PDBFile(
+                    f"rigidbody_{idx}.pdb",
+                    path=".",
+                    restr_fname=ambig_fname,
+                )
+                model.topology = [e.topology for e in combination]
+                model.seed = seed  # type: ignore
+                self.output_models.append(model)
+
+                make_input = partial(
+                    prepare_cns_input,
                     idx,
                     combination,
                     self.path,
@@ -117,62 +109,37 @@ class HaddockModule(BaseCNSModule):
                     debug=self.params["debug"],
                     seed=seed,
                 )
-                _l.append((combination, rigidbody_input, ambig_fname, seed))
+                yield DeferredCNSJob(
+                    make_input,
+                    f"rigidbody_{idx}.out",
+                    f"rigidbody_{idx}.cnserr",
+                    envvars=self.envvars,
+                )
 
                 idx += 1
-        return _l
 
-    def prepare_cns_input_parallel(
+    def score_model(
         self,
-        models_to_dock: list[list[PDBFile]],
-        sampling_factor: int,
-        ambig_fnames: Union[list, None],
-    ) -> list[tuple[list[PDBFile], Union[Path, str], Union[str, None], int]]:
-        prepare_tasks = []
-        _l = []
-        idx = 1
-        for combination in models_to_dock:
-            for _ in range(sampling_factor):
-                ambig_fname = (
-                    ambig_fnames[idx - 1]
-                    if ambig_fnames
-                    else self.params["ambig_fname"]
-                )
-                seed = self.params["iniseed"] + idx
-                task = GenericTask(
-                    function=prepare_cns_input,
-                    model_number=idx,
-                    input_element=combination,
-                    step_path=self.path,
-                    recipe_str=self.recipe_str,
-                    defaults=self.params,
-                    identifier="rigidbody",
-                    ambig_fname=ambig_fname,
-                    native_segid=True,
-                    default_params_path=self.toppar_path,
-                    debug=self.params["debug"],
-                    seed=seed,
-                )
-
-                prepare_tasks.append(task)
-                _l.append((combination, task, ambig_fname, seed))
-                idx += 1
-        Engine = get_engine(self.params["mode"], self.params)
-        prepare_engine = Engine(prepare_tasks)
-        prepare_engine.run()
+        idx: int,
+        result: Any = None,
+        weights: Union[dict[str, float], None] = None,
+    ) -> None:
+        """
+        Score the model of the job `idx`, if it was generated.
 
-        # Replace the task with the result of the task
-        l = []
-        for element, task_result in zip(_l, prepare_engine.results):
-            l.append((element[0], task_result, element[2], element[3]))
+        Has the signature of the engines' `callback`, so models can be
+        scored while the other jobs run.
+        """
+        model = self.output_models[idx]
+        if model.is_present():
+            haddock_model = HaddockModel(model.file_name)
+            model.unw_energies = haddock_model.energies
 
-        return l
+            haddock_score = haddock_model.calc_haddock_score(**(weights or {}))
+            model.score = haddock_score
 
     def _run(self) -> None:
         """Execute module."""
-        # Pool of jobs to be executed by the CNS engine
-        jobs: list[CNSJob] = []
-
         # Get the models generated in previous step
         try:
             if self.params["crossdock"]:
@@ -206,43 +173,34 @@ class HaddockModule(BaseCNSModule):
         else:
             ambig_fnames = None
 
-        start = datetime.now()
+        # Jobs are created lazily, as the engine consumes them, and their
+        #  inputs are rendered by the workers
         self.output_models: list[PDBFile] = []
-        self.log("Preparing jobs...")
-        if self.params["mode"] != "local":
-            # Note: `batch` and (pseudo)-`mpi` mode uses files to communicate and cannot extract the information from the task object.
-            cns_input = self.prepare_cns_input_sequential(
-                models_to_dock, sampling_factor, ambig_fnames  # type: ignore
-            )
-
-        else:
-            cns_input = self.prepare_cns_input_parallel(
+        jobs = self.skip_generated(
+            self.make_cns_jobs(
                 models_to_dock, sampling_factor, ambig_fnames  # type: ignore
             )
-        end = datetime.now()
-
-        self.log(f"Preparation took {(end - start).total_seconds()} seconds")
-
-        jobs = self.make_cns_jobs(cns_input)
-
-        # Run CNS Jobs
-        self.log(f"Running CNS Jobs n={len(jobs)}")
-        Engine = get_engine(self.params["mode"], self.params)
-        engine = Engine(jobs)
-        engine.run()
-        self.log("CNS jobs have finished")
+        )
 
         # Get the weights according to CNS parameters
         _weight_keys = ("w_vdw", "w_elec", "w_desolv", "w_air", "w_bsa")
         weights = {e: self.params[e] for e in _weight_keys}
+        score_model = partial(self.score_model, weights=weights)
 
-        for model in self.output_models:
-            if model.is_present():
-                # Score the model
-                haddock_model = HaddockModel(model.file_name)
-                model.unw_energies = haddock_model.energies
-
-                haddock_score = haddock_model.calc_haddock_score(**weights)
-                model.score = haddock_score
+        # Run CNS Jobs
+        self.log(f"Running CNS Jobs n={sampling_factor * len(models_to_dock)}")
+        Engine = get_engine(self.params["mode"], self.params)
+        # the callback finds the model of a job by the job position, which
+        #  does not hold when resuming the step
+        callback_modes = ("async", "cluster", "local", "warm")
+        if self.params["mode"] in callback_modes and not self.resume:
+            # score the models while the next jobs run
+            engine = Engine(jobs, callback=score_model)
+            engine.run()
+        else:
+            engine = Engine(jobs)
+            engine.run()
+            score_models(self.output_models, **weights)
+        self.log("CNS jobs have finished")
 
         self.export_io_models(faulty_tolerance=self.params["tolerance"])
@@ -1,7 +1,8 @@
 """HADDOCK3 modules to score models."""
 import pandas as pd
 
-from haddock.core.typing import FilePath, Path, Any
+from haddock.core.typing import FilePath, Path, Any, Optional
+from haddock.gear.haddockmodel import parse_interface_scores, read_remarks
 from haddock.modules.base_cns_module import BaseCNSModule
 from haddock.modules import BaseHaddockModule, PDBFile
 
@@ -49,6 +50,9 @@ class CNSScoringModule(BaseCNSModule, ScoringModule):
             output_fname: FilePath,
             sep: str = "\t",
             ascending_sort: bool = True,
+            interface_scores: Optional[
+                dict[str, dict[str, dict[str, float]]]
+                ] = None,
             ) -> None:
         r"""Generate per interface scoring tsv output files.
 
@@ -60,13 +64,21 @@ class CNSScoringModule(BaseCNSModule, ScoringModule):
             Character used as separator in file, by default "\t"
         ascending_sort : bool, optional
             Should the data be sorted in ascending order, by default True
+        interface_scores : dict, optional
+            The per interface scores of the models keyed by file name, as
+            returned by :py:func:`haddock.gear.haddockmodel.score_models`.
+            Models not found in it are read from disk.
         """
+        interface_scores = interface_scores or {}
         # Retrieve all interfaces data for all pdb
         set_interfaces: list[str] = []
         pdb_interfaces_scores: dict[tuple[Any, Any, Any], dict[str, dict[str, float]]] = {}  # noqa : E501
         # Loop over models to recover interfaces
         for pdb in self.output_models:
-            interfaces_scores = self.read_per_intreface_scores(pdb)
+            if pdb.file_name in interface_scores:
+                interfaces_scores = dict(interface_scores[pdb.file_name])
+            else:
+                interfaces_scores = self.read_per_intreface_scores(pdb)
             reversed_interfaces_scores = {}
 
             # Hold list of interfaces
@@ -135,32 +147,4 @@ class CNSScoringModule(BaseCNSModule, ScoringModule):
         interfaces_scores : dict[str, dict[str, float]]
             Dictionary holding per interfaces scores.
         """
-        header = None
-        interfaces_scores: dict[str, dict[str, float]] = {}
-        with open(pdb.file_name, 'r') as filin:
-            for _ in filin:
-                if _.startswith('REMARK Interface'):
-                    s_ = _.strip().split()[2:]
-                    # Extract header
-                    if not header:
-                        header = s_
-                    # Extract data
-                    else:
-                        chain1 = s_[header.index('Chain1')]
-                        chain2 = s_[header.index('Chain2')]
-                        haddockscore = float(s_[header.index('HADDOCKscore')])
-                        evdw = float(s_[header.index('Evdw')])
-                        eelec = float(s_[header.index('Eelec')])
-                        edesol = float(s_[header.index('Edesol')])
-                        bsa = float(s_[header.index('BSA')])
-                        # Combine chains together
-                        chains_key = f"{chain1}_{chain2}"
-                        # Hold data
-                        interfaces_scores[chains_key] = {
-                            'HADDOCKscore': haddockscore,
-                            'Evdw': evdw,
-                            'Eelec': eelec,
-                            'Edesol': edesol,
-                            'BSA': bsa,
-                            }
-        return interfaces_scores
+        return parse_interface_scores(read_remarks(pdb.file_name))
@@ -4,12 +4,13 @@ This module performs energy minimization and scoring of the models generated in
 the previous step of the workflow. No restraints are applied during this step.
 """
 
+from functools import partial
 from pathlib import Path
 
 from haddock.core.defaults import MODULE_DEFAULT_YAML
-from haddock.core.typing import FilePath
-from haddock.gear.haddockmodel import HaddockModel
-from haddock.libs.libcns import prepare_cns_input, prepare_expected_pdb
+from haddock.core.typing import FilePath, Optional
+from haddock.gear.haddockmodel import score_models
+from haddock.libs.libcns import deferred_cns_job, prepare_expected_pdb
 from haddock.libs.libontology import PDBFile
 from haddock.libs.libsubprocess import CNSJob
 from haddock.modules import get_engine
@@ -39,30 +40,62 @@ class HaddockModule(CNSScoringModule):
     def _run(self) -> None:
         """Execute module."""
         # Pool of jobs to be executed by the CNS engine
-        jobs: list[CNSJob] = []
+        jobs: list[CNSJob] = [
+            make_job() for make_job in self.skip_generated(self.plan_cns_jobs())
+            ]
 
-        try:
-            models_to_score = self.previous_io.retrieve_models(individualize=True)
-        except Exception as e:
-            self.finish_with_error(e)
+        # Run CNS Jobs
+        self.log(f"Running CNS Jobs n={len(jobs)}")
+        Engine = get_engine(self.params["mode"], self.params)
+        engine = Engine(jobs)
+        engine.run()
+        self.log("CNS jobs have finished")
+
+        self.collect_output()
+
+    def plan_cns_jobs(
+        self,
+        models_to_score: Optional[list[PDBFile]] = None,
+    ) -> list[partial[CNSJob]]:
+        """
+        Define the expected output models and the CNS jobs creating them.
+
+        Parameters
+        ----------
+        models_to_score : list, optional
+            The models to score. If `None`, uses the models generated in
+            the previous step.
+
+        Returns
+        -------
+        list of callables
+            One callable per element of `self.output_models`, creating
+            the CNS job that generates it.
+        """
+        if models_to_score is None:
+            try:
+                models_to_score = self.previous_io.retrieve_models(
+                    individualize=True
+                )
+            except Exception as e:
+                self.finish_with_error(e)
 
         self.output_models = []
+        job_factories: list[partial[CNSJob]] = []
         for model_num, model in enumerate(models_to_score, start=1):
-            scoring_input = prepare_cns_input(
+            make_job = deferred_cns_job(
                 model_num,
                 model,
                 self.path,
                 self.recipe_str,
                 self.params,
                 "emscoring",
+                envvars=self.envvars,
                 native_segid=True,
                 debug=self.params["debug"],
                 seed=model.seed if isinstance(model, PDBFile) else None,
             )
 
-            scoring_out = f"emscoring_{model_num}.out"
-            err_fname = f"emscoring_{model_num}.cnserr"
-
             # create the expected PDBobject
             expected_pdb = prepare_expected_pdb(model, model_num, ".", "emscoring")
             # fill the ori_name field of expected_pdb
@@ -72,34 +105,26 @@ class HaddockModule(CNSScoringModule):
 
             self.output_models.append(expected_pdb)
 
-            job = CNSJob(scoring_input, scoring_out, err_fname, envvars=self.envvars)
+            job_factories.append(make_job)
 
-            jobs.append(job)
-
-        # Run CNS Jobs
-        self.log(f"Running CNS Jobs n={len(jobs)}")
-        Engine = get_engine(self.params["mode"], self.params)
-        engine = Engine(jobs)
-        engine.run()
-        self.log("CNS jobs have finished")
+        return job_factories
 
+    def collect_output(self) -> None:
+        """Score the generated models and save the module information."""
         # Get the weights from the defaults
         _weight_keys = ("w_vdw", "w_elec", "w_desolv", "w_air", "w_bsa")
         weights = {e: self.params[e] for e in _weight_keys}
 
-        # Check for generated output, fail it not all expected files are found
-        for pdb in self.output_models:
-            if pdb.is_present():
-                haddock_model = HaddockModel(pdb.file_name)
-                pdb.unw_energies = haddock_model.energies
-
-                haddock_score = haddock_model.calc_haddock_score(**weights)
-                pdb.score = haddock_score
+        # Score the generated models
+        interface_scores = score_models(self.output_models, **weights)
 
         output_fname = "emscoring.tsv"
         self.log(f"Saving output to {output_fname}")
         self.output(output_fname)
         if self.params["per_interface_scoring"]:
-            self.per_interface_output(output_fname)
+            self.per_interface_output(
+                output_fname,
+                interface_scores=interface_scores,
+                )
 
         self.export_io_models(faulty_tolerance=self.params["tolerance"])
@@ -8,7 +8,7 @@ from pathlib import Path
 
 from haddock.core.defaults import MODULE_DEFAULT_YAML
 from haddock.core.typing import FilePath
-from haddock.gear.haddockmodel import HaddockModel
+from haddock.gear.haddockmodel import score_models
 from haddock.libs.libcns import prepare_cns_input, prepare_expected_pdb
 from haddock.libs.libontology import PDBFile
 from haddock.libs.libsubprocess import CNSJob
@@ -87,19 +87,16 @@ class HaddockModule(CNSScoringModule):
         _weight_keys = ("w_vdw", "w_elec", "w_desolv", "w_air", "w_bsa")
         weights = {e: self.params[e] for e in _weight_keys}
 
-        # Check for generated output, fail it not all expected files are found
-        for pdb in self.output_models:
-            if pdb.is_present():
-                haddock_model = HaddockModel(pdb.file_name)
-                pdb.unw_energies = haddock_model.energies
-
-                haddock_score = haddock_model.calc_haddock_score(**weights)
-                pdb.score = haddock_score
+        # Score the generated models
+        interface_scores = score_models(self.output_models, **weights)
 
         output_fname = "mdscoring.tsv"
         self.log(f"Saving output to {output_fname}")
         self.output(output_fname)
         if self.params["per_interface_scoring"]:
-            self.per_interface_output(output_fname)
+            self.per_interface_output(
+                output_fname,
+                interface_scores=interface_scores,
+                )
 
         self.export_io_models(faulty_tolerance=self.params["tolerance"])
@@ -1,4 +1,6 @@
+import os
 import shutil
+import sys
 import tempfile
 from pathlib import Path
 from typing import Any, Generator
@@ -10,6 +12,65 @@ from haddock.libs.libontology import PDBFile
 from . import golden_data
 
 
+FAKE_CNS = """#!{python}
+import sys
+import time
+if {calls_file!r}:
+    with open({calls_file!r}, "a") as fout:
+        fout.write("call\\n")
+molecules = []
+toppar_loaded = None
+for line in sys.stdin:
+    line = line.strip()
+    if line.lower() == "stop":
+        sys.exit(0)
+    if line.startswith("structure @@"):
+        molecules.append(line.split()[1][2:-4])
+    if line == "delete selection=( all ) end":
+        molecules.clear()
+    if line == "eval ($haddock3_toppar_loaded=false)":
+        toppar_loaded = False
+    if line == "@MODULE:read_param.cns" and toppar_loaded is False:
+        print("reading parameters", flush=True)
+        toppar_loaded = True
+    if line == "write coordinates end":
+        print("molecules:", *molecules, flush=True)
+    if line.startswith("copy "):
+        source, dest = (name.strip('"') for name in line.split()[1:])
+        with open(source) as fin, open(dest, "w") as fout:
+            fout.write(fin.read() + "done\\n")
+    if line == "crash":
+        sys.exit(3)
+    if line.startswith("display "):
+        print(line[len("display "):], flush=True)
+    if line.startswith("sleep "):
+        time.sleep(float(line.split()[1]))
+"""
+
+
+@pytest.fixture(name="fake_cns_exec")
+def fixture_fake_cns_exec(request, tmp_path):
+    """
+    Create an executable mimicking the CNS statements used in the tests.
+
+    Besides `display` and `stop`, it understands `sleep <seconds>`,
+    `crash`, `copy "<source>" "<dest>"`, and the statements loading
+    molecules and parameters that warm CNS processes reset. Parametrize
+    it indirectly with `{"calls_file": <name>}` to append a line to that
+    file of the working directory each time it starts.
+    """
+    options = getattr(request, "param", {})
+    fake_cns = Path(tmp_path, "cns")
+    fake_cns.write_text(
+        FAKE_CNS.format(
+            python=sys.executable,
+            calls_file=options.get("calls_file", ""),
+            )
+        )
+    os.chmod(fake_cns, 0o755)
+    yield fake_cns
+
+
 @pytest.fixture(name="protprot_input_list")
 def fixture_protprot_input_list():
     """Prot-prot input."""
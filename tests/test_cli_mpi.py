@@ -3,7 +3,61 @@ from unittest import mock
 import pytest
 
 from haddock.clis import cli_mpi
-from haddock.clis.cli_mpi import get_mpi, split_tasks
+from haddock.clis.cli_mpi import (
+    RESULT_TAG,
+    TASK_TAG,
+    dispatch_tasks,
+    get_mpi,
+    run_tasks_on_demand,
+    )
+from haddock.libs.libtelemetry import TaskStats
+
+
+class Task:
+    def __init__(self, input):
+        self.input = input
+
+    def run(self):
+        if self.input is None:
+            raise ValueError("Test error")
+        return self.input + 1
+
+
+class FakeStatus:
+    def __init__(self):
+        self.source = None
+
+    def Get_source(self):
+        return self.source
+
+
+class FakeDispatcherComm:
+    """Communicator where worker ranks run tasks as soon as they receive them."""
+
+    def __init__(self, size):
+        self.size = size
+        self.rank = 0
+        self.pending = []
+        self.tasks_per_rank = {r: 0 for r in range(1, size)}
+        self.stopped = set()
+
+    def send(self, item, dest, tag):
+        assert tag == TASK_TAG
+        if item is None:
+            self.stopped.add(dest)
+            return
+        idx, task = item
+        self.tasks_per_rank[dest] += 1
+        try:
+            self.pending.append((dest, (idx, task.run(), None, TaskStats(idx))))
+        except Exception as err:
+            self.pending.append((dest, (idx, None, str(err), TaskStats(idx))))
+
+    def recv(self, source, tag, status):
+        assert tag == RESULT_TAG
+        dest, message = self.pending.pop(0)
+        status.source = dest
+        return message
 
 
 def test_cli_has_maincli():
@@ -24,13 +78,6 @@ def test_cli_has_comm():
     assert cli_mpi.COMM is None
 
 
-def test_split_tasks():
-
-    t = split_tasks([1, 2, 3, 4, 5, 6, 7, 8, 9], 3)
-
-    assert t == [[1, 4, 7], [2, 5, 8], [3, 6, 9]]
-
-
 def test_get_mpi_success():
     # Mock the import of mpi4py.MPI
     with mock.patch.dict(
@@ -51,6 +98,62 @@ def test_get_mpi_import_error():
             mock_exit.assert_called_once()
 
 
+@pytest.fixture
+def mock_mpi(mocker):
+    mpi = mock.Mock()
+    mpi.Status = FakeStatus
+    mocker.patch("haddock.clis.cli_mpi.get_mpi", return_value=(mpi, None))
+    yield mpi
+
+
+def test_dispatch_tasks(mock_mpi):
+    comm = FakeDispatcherComm(size=3)
+    tasks = [Task(1), Task(None), Task(3), Task(4), Task(5)]
+
+    results, failures, stats = dispatch_tasks(tasks, comm)
+
+    assert results == [2, None, 4, 5, 6]
+    assert list(failures) == [1]
+    assert sorted(s.task_id for s in stats) == list(range(len(tasks)))
+    assert sum(comm.tasks_per_rank.values()) == len(tasks)
+    assert comm.stopped == {1, 2}
+
+
+def test_dispatch_tasks_more_ranks_than_tasks(mock_mpi):
+    comm = FakeDispatcherComm(size=4)
+
+    results, failures, _ = dispatch_tasks([Task(1)], comm)
+
+    assert results == [2]
+    assert failures == {}
+    assert comm.stopped == {1, 2, 3}
+
+
+def test_dispatch_tasks_single_rank(mock_mpi):
+    comm = FakeDispatcherComm(size=1)
+
+    results, failures, stats = dispatch_tasks([Task(1), Task(None)], comm)
+
+    assert results == [2, None]
+    assert list(failures) == [1]
+    assert [s.status for s in stats] == ["ok", "failed"]
+
+
+def test_run_tasks_on_demand():
+    comm = mock.Mock()
+    comm.recv.side_effect = [(0, Task(1)), (3, Task(None)), None]
+
+    run_tasks_on_demand(comm)
+
+    sent = [c.args[0] for c in comm.send.call_args_list]
+    assert sent[0][:3] == (0, 2, None)
+    assert sent[0][3].task_id == 0
+    assert sent[1][0] == 3
+    assert sent[1][1] is None
+    assert "Test error" in sent[1][2]
+    assert sent[1][3].status == "failed"
+
+
 # Cleanup fixture to reset global state after each test
 @pytest.fixture(autouse=True)
 def cleanup():
@@ -1,10 +1,16 @@
 """Test HaddockModel gear."""
 
+import math
 from pathlib import Path
 
 import pytest
 
-from haddock.gear.haddockmodel import HaddockModel
+from haddock.gear.haddockmodel import (
+    HaddockModel,
+    parse_interface_scores,
+    read_remarks,
+    score_models,
+    )
 from haddock.libs.libontology import PDBFile
 
 from . import golden_data
@@ -84,3 +90,50 @@ def test_haddockmodel_score(protprot_input_list):
     weights["w_bsa"] = -0.01
 
     assert haddock_mod.calc_haddock_score(**weights) == -13.38146
+
+
+def test_read_remarks(protprot_input_list):
+    """Test only the header of the model is read."""
+    remarks = read_remarks(protprot_input_list[0].rel_path)
+    assert remarks[0] == 'REMARK FILENAME="rigidbody_1.pdb"'
+    assert all(line.startswith("REMARK") for line in remarks)
+    assert any(line.startswith("REMARK energies") for line in remarks)
+
+
+def test_parse_interface_scores():
+    remarks = [
+        "REMARK Interface Chain1 Chain2 HADDOCKscore Evdw Eelec Edesol BSA",
+        "REMARK Interface: A B -10.5 -20.1 -30.2 1.5 800.0",
+        ]
+    assert parse_interface_scores(remarks) == {
+        "A_B": {
+            "HADDOCKscore": -10.5,
+            "Evdw": -20.1,
+            "Eelec": -30.2,
+            "Edesol": 1.5,
+            "BSA": 800.0,
+            },
+        }
+
+
+def test_score_models(protprot_input_list, monkeypatch):
+    """Test the scores equal those of each HaddockModel."""
+    monkeypatch.chdir(golden_data)
+    weights = {
+        "w_vdw": 1.0,
+        "w_elec": 1.0,
+        "w_desolv": 1.0,
+        "w_air": 0.1,
+        "w_bsa": -0.01,
+        }
+    missing = PDBFile(Path(golden_data, "missing.pdb"), path=golden_data)
+    interface_scores = score_models(protprot_input_list + [missing], **weights)
+
+    for model in protprot_input_list:
+        haddock_mod = HaddockModel(model.rel_path)
+        assert model.score == haddock_mod.calc_haddock_score(**weights)
+        assert model.unw_energies == haddock_mod.energies
+    assert protprot_input_list[1].score == -13.38146
+    assert math.isnan(missing.score)
+    assert missing.unw_energies is None
+    assert set(interface_scores) == {m.file_name for m in protprot_input_list}
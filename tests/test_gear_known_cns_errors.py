@@ -11,6 +11,7 @@ from string import ascii_letters
 
 from haddock.gear.known_cns_errors import (
     KNOWN_ERRORS,
+    KNOWN_ERRORS_REGEX,
     find_cns_errors,
     find_all_cns_errors,
     )
@@ -78,3 +79,13 @@ def test_find_all_cns_errors(gen_fake_cns_errors):
         assert len(error["files"]) == 4  # 2 * 2
         # Check that error hint is well reported
         assert KNOWN_ERRORS[cns_error] in str(error["error"])
+
+
+def test_known_errors_regex(gen_random_text):
+    """Test the regex matches every known error and nothing else."""
+    assert KNOWN_ERRORS_REGEX.search(gen_random_text.encode()) is None
+    for error in KNOWN_ERRORS.keys():
+        text = f"{gen_random_text}{error}{gen_random_text}".encode()
+        match = KNOWN_ERRORS_REGEX.search(text)
+        assert match is not None
+        assert match.group().decode() == error
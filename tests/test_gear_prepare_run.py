@@ -15,6 +15,7 @@ from haddock.gear.prepare_run import (
     get_expandable_parameters,
     populate_mol_parameters,
     populate_topology_molecule_params,
+    setup_run,
     update_step_contents_to_step_names,
     validate_module_names_are_not_misspelled,
     validate_ncs_params,
@@ -503,3 +504,9 @@ def test_validate_ncs_params_wrong_suffix_value(proper_ncs_params):
     # Except error as _3 != (nncs = 2)
     with pytest.raises(ConfigurationError):
         assert validate_ncs_params(proper_ncs_params) is None
+
+
+def test_setup_run_resume_requires_restart():
+    """Test `--resume` is refused without `--restart`."""
+    with pytest.raises(ConfigurationError):
+        setup_run("run.cfg", resume=True)
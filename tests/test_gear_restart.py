@@ -65,3 +65,12 @@ def test_restart_cli_error(n):
         ap.parse_args(f'--restart {n}'.split())
     assert exit.type == SystemExit
     assert exit.value.code == 2
+
+
+def test_resume_cli():
+    """Test --resume flag."""
+    ap = argparse.ArgumentParser()
+    restart_run.add_restart_arg(ap)
+    restart_run.add_resume_arg(ap)
+    assert ap.parse_args('--restart 2 --resume'.split()).resume is True
+    assert ap.parse_args('--restart 2'.split()).resume is False
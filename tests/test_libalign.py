@@ -9,6 +9,7 @@ import pytest
 
 from haddock.libs.libalign import (
     ALIGNError,
+    AlignmentCache,
     align_seq,
     calc_rmsd,
     centroid,
@@ -22,6 +23,7 @@ from haddock.libs.libalign import (
     make_range,
     pdb2fastadic,
     rearrange_xyz_files,
+    superpose_rmsd,
     )
 
 from . import golden_data
@@ -122,6 +124,34 @@ def test_centroid():
     assert observed_centroid == expected_centroid
 
 
+def test_superpose_rmsd():
+    """Test the superposition of stacked models."""
+    rng = np.random.default_rng(42)
+    Q = rng.normal(scale=10, size=(20, 3))
+    # rotated and translated copies of the reference, with noise
+    rotations = [np.linalg.qr(rng.normal(size=(3, 3)))[0] for _ in range(4)]
+    rotations = [R * np.sign(np.linalg.det(R)) for R in rotations]
+    P = np.stack([
+        Q @ R + rng.normal(size=3) + rng.normal(scale=0.5, size=Q.shape)
+        for R in rotations
+        ])
+
+    fit = slice(0, 12)
+    measure = np.arange(12, 20)
+    observed = superpose_rmsd(P, Q, fit=fit, measure=measure)
+    assert observed.shape == (4,)
+    for model, rmsd in zip(P, observed):
+        # same as superposing each model one by one
+        model = model - centroid(model[fit])
+        ref = Q - centroid(Q[fit])
+        model = np.dot(model, kabsch(model[fit], ref[fit]))
+        assert np.isclose(rmsd, calc_rmsd(model[measure], ref[measure]))
+        assert np.isclose(rmsd, superpose_rmsd(model, Q, fit, measure))
+
+    # a model is superposed exactly on its rotated copy
+    assert np.allclose(superpose_rmsd(np.stack([Q @ R for R in rotations]), Q), 0)
+
+
 def test_load_coords():
     """Test the loading of coordinates."""
     # pdb_f = protprot_input_list[0]
@@ -417,6 +447,29 @@ def test_align_seq():
         assert observed_aln == expected_aln
 
 
+def test_align_seq_cache(mocker, tmp_path):
+    """Test sequence alignments are reused for the same sequences."""
+    ref = Path(golden_data, "protein.pdb")
+    mod = Path(golden_data, "protein_renumb.pdb")
+    cache_file = Path(tmp_path, "alignments.db")
+    key = AlignmentCache.key(pdb2fastadic(ref), pdb2fastadic(mod))
+    expected = align_seq(ref, mod, tmp_path, cache_file=cache_file)
+    assert AlignmentCache(cache_file).get(key)[:2] == expected
+
+    # another process reads the alignments database
+    mocker.patch.dict("haddock.libs.libalign._alignments", clear=True)
+    aligner = mocker.patch("haddock.libs.libalign.sequence_alignment")
+    other_path = Path(tmp_path, "other")
+    other_path.mkdir()
+    assert align_seq(ref, mod, other_path, cache_file=cache_file) == expected
+    aligner.assert_not_called()
+    # the alignment files are written as without cache
+    assert Path(other_path, "blosum62_B.aln").read_text() == Path(
+        tmp_path, "blosum62_B.aln"
+        ).read_text()
+    assert Path(other_path, "blosum62.izone").exists()
+
+
 def test_align_seq_chm():
     """Test the sequence alignment with chain matching."""
     ref = Path(golden_data, "protein.pdb")
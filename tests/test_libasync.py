@@ -0,0 +1,131 @@
+"""Test the asyncio subprocess engine."""
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from haddock.core.exceptions import SetupError
+from haddock.libs.libasync import AsyncScheduler
+from haddock.libs.libsubprocess import CNSJob, Job
+
+
+class SleepTask:
+    """Dummy task sleeping for a given time before returning its input."""
+
+    def __init__(self, input, sleep):
+        self.input = input
+        self.sleep = sleep
+
+    def run(self):
+        time.sleep(self.sleep)
+        return self.input
+
+
+class TaskWithException:
+
+    def run(self):
+        raise ValueError("Test error")
+
+
+def test_async_scheduler_keeps_task_order():
+    tasks = [SleepTask(i, 0.1 * (4 - i)) for i in range(5)]
+    scheduler = AsyncScheduler(tasks, ncores=5)
+    scheduler.run()
+    assert scheduler.results == list(range(5))
+
+
+def test_async_scheduler_concurrency():
+    assert AsyncScheduler([], ncores="64").concurrency == 64
+    with pytest.raises(SetupError):
+        AsyncScheduler([], ncores=0)
+    with pytest.raises(SetupError):
+        AsyncScheduler([], ncores="many")
+
+
+def test_async_scheduler_with_exception():
+    scheduler = AsyncScheduler([TaskWithException(), SleepTask(1, 0)], ncores=2)
+    scheduler.run()
+    assert scheduler.results == [None, 1]
+
+
+def test_async_scheduler_generator():
+    created = []
+
+    def tasks():
+        for i in range(10):
+            created.append(i)
+            yield SleepTask(i, 0.01)
+
+    received = {}
+
+    def callback(idx, result):
+        # the next task is created when one finishes
+        assert len(created) <= len(received) + 2
+        received[idx] = result
+
+    scheduler = AsyncScheduler(tasks(), ncores=2, callback=callback)
+    scheduler.run()
+    assert received == {i: i for i in range(10)}
+    assert scheduler.results == []
+    assert scheduler.num_tasks == 10
+
+
+def test_async_scheduler_cns_jobs(fake_cns_exec, tmp_path):
+    jobs = []
+    for i in range(3):
+        inp = Path(tmp_path, f"job_{i}.inp")
+        inp.write_text(f"display job {i}{os.linesep}stop{os.linesep}")
+        jobs.append(
+            CNSJob(
+                input_file=inp,
+                output_file=Path(tmp_path, f"job_{i}.out"),
+                error_file=Path(tmp_path, f"job_{i}.cnserr"),
+                cns_exec=fake_cns_exec,
+            )
+        )
+    # an input given as a string is passed through stdin
+    jobs.append(
+        CNSJob(
+            input_file=f"display in memory{os.linesep}stop",
+            output_file=None,
+            cns_exec=fake_cns_exec,
+        )
+    )
+
+    scheduler = AsyncScheduler(jobs, ncores=2)
+    scheduler.run()
+
+    assert [r.strip() for r in scheduler.results] == [
+        b"job 0",
+        b"job 1",
+        b"job 2",
+        b"in memory",
+    ]
+    for i in range(3):
+        assert Path(tmp_path, f"job_{i}.out.gz").exists()
+
+
+def test_async_scheduler_jobs(tmp_path):
+    inp = Path(tmp_path, "input.txt")
+    inp.write_text("content")
+    out = Path(tmp_path, "output.txt")
+    job = Job(input_=inp, output=out, executable=Path("/bin/cat"))
+
+    scheduler = AsyncScheduler([job], ncores=1)
+    scheduler.run()
+
+    assert out.read_text() == "content"
+
+
+def test_async_scheduler_stats(tmp_path):
+    stats_file = Path(tmp_path, "tasks.tsv")
+    tasks = [SleepTask(0, 0.1), TaskWithException()]
+    scheduler = AsyncScheduler(tasks, ncores=2, stats_file=stats_file)
+    scheduler.run()
+
+    stats = sorted(scheduler.stats, key=lambda s: s.task_id)
+    assert [s.status for s in stats] == ["ok", "failed"]
+    assert stats[0].wall_time >= 0.1
+    assert len(stats_file.read_text().splitlines()) == 3
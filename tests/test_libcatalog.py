@@ -0,0 +1,138 @@
+"""Test the run catalog."""
+
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import pytest
+
+from haddock.libs.libcatalog import CATALOG_VERSION, RunCatalog, flatten_models
+from haddock.libs.libontology import ModuleIO, PDBFile
+from haddock.modules.analysis.clustfcc import DEFAULT_CONFIG as clustfcc_pars
+from haddock.modules.analysis.clustfcc import HaddockModule as ClustFCCModule
+
+
+def make_model(step, name, score, ori_name=None, clt_id=None, clt_model_rank=None):
+    model = PDBFile(name, path=step, score=score)
+    model.ori_name = ori_name
+    model.clt_id = clt_id
+    model.clt_rank = clt_id
+    model.clt_model_rank = clt_model_rank
+    model.unw_energies = {"vdw": score}
+    return model
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    """Catalog of a rigidbody, flexref and clustering workflow."""
+    rigid = [make_model("1_rigidbody", f"rigidbody_{i}.pdb", -i) for i in range(1, 5)]
+    flex = [
+        make_model("2_flexref", f"flexref_{i}.pdb", -10 * i, ori_name=r.file_name)
+        for i, r in enumerate(rigid, start=1)
+        ]
+    # clustering keeps the same files
+    clustered = []
+    for i, model in enumerate(flex, start=1):
+        model = make_model(
+            "2_flexref",
+            model.file_name,
+            model.score,
+            ori_name=model.file_name,
+            clt_id=1 + i % 2,
+            clt_model_rank=(4 - i) // 2 + 1,
+            )
+        clustered.append(model)
+
+    run_catalog = RunCatalog(Path(tmp_path, "catalog.db"))
+    assert run_catalog.add_step(1, "1_rigidbody", "rigidbody", rigid) == 4
+    assert run_catalog.add_step(2, "2_flexref", "flexref", flex, rigid) == 4
+    run_catalog.add_step(3, "3_clustfcc", "clustfcc", clustered, flex)
+    return run_catalog
+
+
+def test_flatten_models():
+    model = PDBFile("model.pdb")
+    assert flatten_models([model, {0: model, 1: "topology"}, "other"]) == [
+        model,
+        model,
+        ]
+
+
+def test_catalog_steps(catalog):
+    assert [(s["step"], s["models"]) for s in catalog.steps()] == [
+        ("1_rigidbody", 4),
+        ("2_flexref", 4),
+        ("3_clustfcc", 4),
+        ]
+
+    # recording a step again replaces it
+    catalog.add_step(1, "1_rigidbody", "rigidbody", [PDBFile("single.pdb")])
+    assert catalog.steps()[0]["models"] == 1
+
+    catalog.remove_steps(2)
+    assert [s["step"] for s in catalog.steps()] == ["1_rigidbody"]
+
+
+def test_catalog_models(catalog):
+    models = catalog.models(step_index=2)
+    assert [m["file_name"] for m in models] == [
+        "flexref_4.pdb",
+        "flexref_3.pdb",
+        "flexref_2.pdb",
+        "flexref_1.pdb",
+        ]
+    assert [m["step_rank"] for m in models] == [1, 2, 3, 4]
+    assert models[0]["energies"] == {"vdw": -40}
+    assert models[0]["parent"] == str(Path("..", "1_rigidbody", "rigidbody_4.pdb"))
+    assert len(catalog.models()) == 12
+
+
+def test_catalog_top_models_per_cluster(catalog):
+    top = catalog.top_models_per_cluster(top=1)
+    assert [(m["clt_id"], m["file_name"]) for m in top] == [
+        (1, "flexref_4.pdb"),
+        (2, "flexref_3.pdb"),
+        ]
+
+    top = catalog.top_models_per_cluster(top=10, step_index=3)
+    assert [m["rank_in_cluster"] for m in top] == [1, 2, 1, 2]
+    assert catalog.top_models_per_cluster(step_index=2) == []
+
+
+def test_catalog_traceback(catalog):
+    path = str(Path("..", "2_flexref", "flexref_2.pdb"))
+    trace = catalog.traceback(3, path)
+    assert [(m["step"], m["file_name"], m["step_rank"]) for m in trace] == [
+        ("3_clustfcc", "flexref_2.pdb", 3),
+        ("2_flexref", "flexref_2.pdb", 3),
+        ("1_rigidbody", "rigidbody_2.pdb", 3),
+        ]
+    assert catalog.traceback(3, "missing.pdb") == []
+
+
+def test_catalog_newer_version(catalog):
+    with closing(sqlite3.connect(catalog.path)) as db:
+        db.execute(f"PRAGMA user_version = {CATALOG_VERSION + 1}")
+
+    with pytest.raises(ValueError):
+        catalog.steps()
+
+
+def test_module_add_to_catalog(tmp_path, monkeypatch):
+    step_dir = Path(tmp_path, "1_clustfcc")
+    step_dir.mkdir()
+    monkeypatch.chdir(step_dir)
+    module = ClustFCCModule(order=1, path=Path("."), initial_params=clustfcc_pars)
+    io = ModuleIO()
+    io.add([PDBFile("model_1.pdb", path=step_dir, score=-1)], "o")
+
+    # without a data folder, nothing is recorded
+    module.add_to_catalog(io)
+    assert not Path(tmp_path, "data", "catalog.db").exists()
+
+    Path(tmp_path, "data").mkdir()
+    module.add_to_catalog(io)
+    catalog = RunCatalog(Path(tmp_path, "data", "catalog.db"))
+    assert catalog.steps() == [
+        {"step_index": 1, "step": "1_clustfcc", "module": "clustfcc", "models": 1},
+        ]
@@ -0,0 +1,194 @@
+"""Test the TCP cluster engine."""
+
+import os
+import socket
+import time
+from multiprocessing import Process
+from pathlib import Path
+
+import pytest
+
+from haddock.clis.cli_worker import parse_address
+from haddock.core.exceptions import JobRunningError, SetupError
+from haddock.libs.libcluster import (
+    AUTHKEY_ENV,
+    ClusterScheduler,
+    run_task,
+    run_worker,
+    )
+
+
+class SleepTask:
+    """Dummy task sleeping for a given time before returning its input."""
+
+    def __init__(self, input, sleep=0.0):
+        self.input = input
+        self.sleep = sleep
+
+    def run(self):
+        time.sleep(self.sleep)
+        return self.input
+
+
+class TaskWithException:
+
+    def run(self):
+        raise ValueError("Test error")
+
+
+class ExitTask:
+    """Dummy task killing the worker running it."""
+
+    def run(self):
+        os._exit(1)
+
+
+class WriteTask:
+    """Dummy task writing a file relative to the working directory."""
+
+    def __init__(self, fname):
+        self.fname = fname
+
+    def run(self):
+        Path(self.fname).write_text(str(os.getpid()))
+        return self.fname
+
+
+@pytest.fixture
+def unused_tcp_port():
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def test_run_task():
+    assert run_task(SleepTask(1)) == (1, None)
+    assert run_task(TaskWithException()) == (None, "ValueError: Test error")
+
+
+def test_cluster_scheduler_keeps_task_order():
+    tasks = [SleepTask(i, 0.05 * (i % 3)) for i in range(12)]
+    scheduler = ClusterScheduler(tasks, port=0, local_workers=3)
+    scheduler.run()
+    assert scheduler.results == list(range(12))
+
+
+def test_cluster_scheduler_failures():
+    tasks = [SleepTask(0), TaskWithException(), SleepTask(2)]
+    scheduler = ClusterScheduler(tasks, port=0, local_workers=2)
+    scheduler.run()
+    assert scheduler.results == [0, None, 2]
+
+
+def test_cluster_scheduler_callback():
+    received = {}
+    tasks = [SleepTask(i) for i in range(5)]
+    scheduler = ClusterScheduler(
+        tasks,
+        port=0,
+        local_workers=2,
+        callback=received.__setitem__,
+    )
+    scheduler.run()
+    assert received == {i: i for i in range(5)}
+    assert scheduler.results == [None] * 5
+
+
+def test_cluster_scheduler_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    tasks = [WriteTask(f"task_{i}.txt") for i in range(4)]
+    scheduler = ClusterScheduler(tasks, port=0, local_workers=2)
+    scheduler.run()
+    for i in range(4):
+        pid = int(Path(tmp_path, f"task_{i}.txt").read_text())
+        assert pid != os.getpid()
+
+
+def test_cluster_scheduler_external_workers(unused_tcp_port):
+    """Test workers started independently from the coordinator."""
+    address = ("localhost", unused_tcp_port)
+    workers = [
+        Process(
+            target=run_worker,
+            args=(address, b"secret"),
+            kwargs={"once": True, "retry_interval": 0.1, "max_idle": 30},
+        )
+        for _ in range(2)
+    ]
+    for w in workers:
+        w.start()
+
+    tasks = [SleepTask(i, 0.05) for i in range(6)]
+    scheduler = ClusterScheduler(tasks, port=unused_tcp_port, authkey="secret")
+    scheduler.run()
+
+    for w in workers:
+        w.join(timeout=30)
+        assert w.exitcode == 0
+    assert scheduler.results == list(range(6))
+
+
+def test_cluster_scheduler_authkey(monkeypatch):
+    monkeypatch.delenv(AUTHKEY_ENV, raising=False)
+    with pytest.raises(SetupError):
+        ClusterScheduler([SleepTask(1)])
+
+    monkeypatch.setenv(AUTHKEY_ENV, "from_env")
+    assert ClusterScheduler([SleepTask(1)]).authkey == b"from_env"
+    assert ClusterScheduler([SleepTask(1)], authkey="key").authkey == b"key"
+
+
+def test_cluster_scheduler_no_worker():
+    scheduler = ClusterScheduler(
+        [SleepTask(1)],
+        port=0,
+        authkey="secret",
+        max_idle=0.5,
+    )
+    with pytest.raises(JobRunningError, match="1 of 1 tasks were not executed"):
+        scheduler.run()
+
+
+def test_cluster_scheduler_all_workers_lost():
+    """Test the run fails once the last worker disconnected."""
+    tasks = [SleepTask(0), ExitTask()]
+    scheduler = ClusterScheduler(tasks, port=0, local_workers=1, max_idle=0.5)
+    with pytest.raises(JobRunningError, match="No worker connected"):
+        scheduler.run()
+
+
+def test_cluster_scheduler_no_tasks():
+    scheduler = ClusterScheduler([], port=0, local_workers=2)
+    scheduler.run()
+    assert scheduler.results == []
+
+
+@pytest.mark.parametrize(
+    "address,expected",
+    [
+        ("node01:5000", ("node01", 5000)),
+        ("node01", ("node01", 37700)),
+        ("10.0.0.1:80", ("10.0.0.1", 80)),
+    ],
+)
+def test_parse_address(address, expected):
+    assert parse_address(address) == expected
+
+
+def test_cluster_scheduler_stats(tmp_path):
+    stats_file = Path(tmp_path, "tasks.tsv")
+    tasks = [SleepTask(0), TaskWithException()]
+    scheduler = ClusterScheduler(
+        tasks,
+        port=0,
+        local_workers=1,
+        stats_file=stats_file,
+    )
+    scheduler.run()
+
+    stats = sorted(scheduler.stats, key=lambda s: s.task_id)
+    assert [s.task_id for s in stats] == [0, 1]
+    assert [s.status for s in stats] == ["ok", "failed"]
+    assert [s.retries for s in stats] == [0, 0]
+    assert ":" in stats[0].worker
+    assert len(stats_file.read_text().splitlines()) == 3
@@ -112,6 +112,17 @@ def test_load_workflow_params():
     assert result == expected
 
 
+def test_load_step_params():
+    """Test the step header is rendered as the workflow params."""
+    params = {"var1": 1, "var2": "some string", "var3": None, "var4": EmptyPath()}
+    assert libcns.load_step_params(params) == libcns.load_workflow_params(**params)
+    assert libcns.load_step_params(params) is libcns.load_step_params(dict(params))
+
+    # equal values of different types render differently
+    assert libcns.load_step_params({"var": True}).endswith(f"=true){os.linesep}")
+    assert libcns.load_step_params({"var": 1}).endswith(f"=1){os.linesep}")
+
+
 def test_prepare_cns_input(pdbfile):
 
     # TODO: Improve this test to increase coverage AND refactor `prepare_cns_input`
@@ -134,6 +145,7 @@ def test_prepare_cns_input(pdbfile):
     expected_cns_input = f"""
 ! Parameters
 eval ($ambig_fname="")
+eval ($haddock3_toppar_loaded=false)
 
 ! Input structure
 structure
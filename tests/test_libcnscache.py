@@ -0,0 +1,136 @@
+"""Test the CNS job cache."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from haddock.libs.libcnscache import (
+    CNSJobCache,
+    file_digest,
+    logical_files,
+    produced_files,
+    quoted_files,
+    )
+from haddock.libs.libsubprocess import CNSJob
+
+
+@pytest.fixture
+def step(tmp_path, monkeypatch):
+    """Step folder with an input molecule."""
+    step_dir = Path(tmp_path, "1_step")
+    step_dir.mkdir()
+    monkeypatch.chdir(step_dir)
+    Path(tmp_path, "mol.pdb").write_text("ATOM\n")
+    yield step_dir
+
+
+def make_job(fake_cns_exec, cache_dir):
+    mol = Path("..", "mol.pdb")
+    job = CNSJob(
+        f'display start{os.linesep}copy "{mol}" "model_1.pdb"{os.linesep}stop',
+        output_file=Path("model_1.out"),
+        error_file=Path("model_1.cnserr"),
+        cns_exec=fake_cns_exec,
+    )
+    job.cache_dir = cache_dir
+    return job
+
+
+def num_calls():
+    calls = Path("calls.txt")
+    return len(calls.read_text().splitlines()) if calls.exists() else 0
+
+
+def test_quoted_files(step):
+    script = 'copy "../mol.pdb" "model_1.pdb"\n@@"missing.cns"'
+    assert quoted_files(script) == {"../mol.pdb"}
+
+    Path("model_1.pdb").write_text("")
+    assert produced_files(script, {"../mol.pdb"}, ["model_1.out"]) == [
+        Path("model_1.pdb"),
+        ]
+
+
+def test_file_digest(step):
+    digest = file_digest("../mol.pdb")
+    assert digest == file_digest(Path(step.parent, "mol.pdb"))
+    Path("../mol.pdb").write_text("HETATM\n")
+    assert file_digest("../mol.pdb") != digest
+
+
+@pytest.mark.parametrize(
+    "fake_cns_exec",
+    [{"calls_file": "calls.txt"}],
+    indirect=True,
+    )
+def test_cnsjob_cache(step, fake_cns_exec, tmp_path):
+    cache_dir = Path(tmp_path, "cache")
+    assert make_job(fake_cns_exec, cache_dir).run().strip() == b"start"
+    assert num_calls() == 1
+    assert Path("model_1.pdb").read_text() == "ATOM\ndone\n"
+
+    # the same job in another step is restored from the cache
+    other_step = Path(tmp_path, "2_step")
+    other_step.mkdir()
+    os.chdir(other_step)
+    assert make_job(fake_cns_exec, cache_dir).run().strip() == b"start"
+    assert num_calls() == 0
+    assert Path("model_1.pdb").read_text() == "ATOM\ndone\n"
+    (cached,) = cache_dir.glob("*/*/model_1.pdb")
+    assert Path("model_1.pdb").stat().st_ino == cached.stat().st_ino
+    assert Path("model_1.out").exists() is False
+    # cached files are read-only, the files of the first step are not
+    assert Path("model_1.pdb").stat().st_mode & 0o222 == 0
+    assert Path(step, "model_1.pdb").stat().st_mode & 0o200
+
+    # a different input molecule is a different job
+    Path("../mol.pdb").write_text("HETATM\n")
+    make_job(fake_cns_exec, cache_dir).run()
+    assert num_calls() == 1
+    assert Path("model_1.pdb").read_text() == "HETATM\ndone\n"
+    # the new model replaced the link instead of writing to the cache
+    assert cached.read_text() == "ATOM\ndone\n"
+
+
+def test_cnsjob_cache_key(step, fake_cns_exec, tmp_path):
+    cache = CNSJobCache(Path(tmp_path, "cache"))
+    script = 'copy "../mol.pdb" "model_1.pdb"'
+    key = cache.key(script, fake_cns_exec, False, True)
+    assert key == cache.key(script, fake_cns_exec, False, True)
+    assert key != cache.key(script, fake_cns_exec, True, True)
+    assert key != cache.key(script.replace("model_1", "model_2"), fake_cns_exec)
+    # the path of the input does not matter, only its content
+    Path("mol_copy.pdb").write_text("ATOM\n")
+    assert key == cache.key(script.replace("../mol.pdb", "mol_copy.pdb"), fake_cns_exec, False, True)  # noqa: E501
+    assert cache.restore(key) is None
+
+
+def test_cnsjob_cache_key_logical_names(step, fake_cns_exec, tmp_path):
+    module = Path(tmp_path, "module")
+    toppar = Path(tmp_path, "toppar")
+    Path(toppar, "positions").mkdir(parents=True)
+    module.mkdir()
+    Path(module, "read.cns").write_text('@@"TOPPAR:protein.param"\n')
+    Path(toppar, "protein.param").write_text("BOND\n")
+    Path(toppar, "positions", "vector_0").write_text("0\n")
+    Path(toppar, "positions", "vector_1").write_text("1\n")
+    envvars = {"MODULE": str(module), "TOPPAR": str(toppar)}
+    script = '@MODULE:read.cns\nevaluate ($f="TOPPAR:positions/vector_")'
+
+    assert logical_files(script, envvars) == {
+        "MODULE:read.cns": str(Path(module, "read.cns")),
+        "TOPPAR:protein.param": str(Path(toppar, "protein.param")),
+        "TOPPAR:positions/vector_0": str(Path(toppar, "positions", "vector_0")),  # noqa: E501
+        "TOPPAR:positions/vector_1": str(Path(toppar, "positions", "vector_1")),  # noqa: E501
+        }
+
+    cache = CNSJobCache(Path(tmp_path, "cache"))
+    key = cache.key(script, fake_cns_exec, envvars=envvars)
+    assert key != cache.key(script, fake_cns_exec)
+    # parameters included by a module and files found by prefix count
+    Path(toppar, "protein.param").write_text("ANGLE\n")
+    param_key = cache.key(script, fake_cns_exec, envvars=envvars)
+    assert param_key != key
+    Path(toppar, "positions", "vector_1").write_text("10\n")
+    assert param_key != cache.key(script, fake_cns_exec, envvars=envvars)
@@ -1,16 +1,25 @@
 """Test libhpc."""
 import os
+import shutil
+import subprocess
+import time
 import pytest
 import pytest_mock  # noqa : F401
 
 from pathlib import Path
 from subprocess import CompletedProcess
 
+from haddock.core.exceptions import JobRunningError
 from haddock.libs.libhpc import (
+    AdaptivePoller,
+    HPCArrayWorker,
+    HPCScheduler,
     HPCWorker,
     extract_slurm_status,
+    get_slurm_jobs_status,
     JOB_STATUS_DIC,
     to_torque_time,
+    update_workers_status,
     )
 
 from haddock.libs.libsubprocess import CNSJob
@@ -120,6 +129,50 @@ def test_hpcworker_run(hpcworker, mocker):
     assert hpcworker.job_status == 'submitted'
 
 
+def test_hpcworker_job_commands_stats(hpcworker):
+    """Test the job script records the stats of each task."""
+    cmds = hpcworker.job_commands()
+    assert "start=$(date +%s.%N)" in cmds
+    assert f">> {hpcworker.stats_fname.resolve()}" in cmds
+    assert cmds.index("< rigidbody.inp > rigidbody.out") < cmds.index("echo")
+
+
+def test_hpcworker_job_commands_exit_status(tmp_path, monkeypatch):
+    """Test the stats record the exit status of the CNS command."""
+    monkeypatch.chdir(tmp_path)
+    Path('rigidbody.inp').write_text('')
+    tasks = [
+        CNSJob(
+            Path('rigidbody.inp'),
+            Path(f'rigidbody_{i}.out'),
+            envvars={'MODDIR': '.', 'TOPPAR': '', 'MODULE': ''},
+            cns_exec=shutil.which(cmd),
+            )
+        for i, cmd in enumerate(('false', 'true'))
+        ]
+    worker = HPCWorker(tasks=tasks, num=1)
+    subprocess.run(['bash', '-c', worker.job_commands()], check=True)
+
+    stats = worker.read_task_stats()
+    assert [s.status for s in stats] == ['failed', 'ok']
+    assert worker.is_done()
+
+
+def test_hpcworker_read_task_stats(hpcworker):
+    hpcworker.stats_fname.write_text(
+        "0 rigidbody.inp 100.0 102.5 0\n"
+        "1 rigidbody.inp 102.5 103.0 1\n"
+        "truncated line\n"
+        )
+    stats = hpcworker.read_task_stats()
+    hpcworker.stats_fname.unlink()
+
+    assert [s.task_id for s in stats] == [0, 1]
+    assert [s.wall_time for s in stats] == [2.5, 0.5]
+    assert [s.status for s in stats] == ["ok", "failed"]
+    assert stats[0].worker == hpcworker.job_fname.stem
+
+
 def test_hpcworker_update_status(
     hpcworker,
     slurm_scontrol_terminated_jobid,
@@ -138,3 +191,223 @@ def test_hpcworker_update_status(
     status = hpcworker.update_status()
     assert status == hpcworker.job_status
     assert status == 'running'
+
+
+@pytest.fixture
+def hpcarrayworker(hpcworker):
+    """Instanciate a HPCArrayWorker object with two elements."""
+    second = HPCWorker(tasks=hpcworker.tasks, num=2)
+    return HPCArrayWorker([hpcworker, second], queue_limit=1)
+
+
+def test_hpcarrayworker_prepare_job_file(hpcarrayworker):
+    hpcarrayworker.prepare_job_file()
+    content = hpcarrayworker.job_fname.read_text()
+    os.remove(hpcarrayworker.job_fname)
+    assert "#SBATCH --array=1-2%1" in content
+    assert "case $SLURM_ARRAY_TASK_ID in" in content
+    assert "1)" in content
+    assert "2)" in content
+    assert content.count("< rigidbody.inp > rigidbody.out") == 2
+
+
+def test_hpcarrayworker_run(hpcarrayworker, mocker):
+    mocker.patch(
+        "subprocess.run",
+        return_value=CompletedProcess(
+            args=['sbatch', str(hpcarrayworker.job_fname)],
+            returncode=0,
+            stdout=b'Submitted batch job 42914957',
+            stderr=b'',
+            )
+        )
+    hpcarrayworker.run()
+    os.remove(hpcarrayworker.job_fname)
+    assert hpcarrayworker.job_id == 42914957
+    assert hpcarrayworker.job_status == 'submitted'
+
+
+def test_hpcarrayworker_run_fails(hpcarrayworker, mocker):
+    mocker.patch(
+        "subprocess.run",
+        return_value=CompletedProcess(
+            args=['sbatch', str(hpcarrayworker.job_fname)],
+            returncode=1,
+            stdout=b'',
+            stderr=b'sbatch: error: Invalid partition name specified',
+            )
+        )
+    with pytest.raises(JobRunningError, match="Invalid partition"):
+        hpcarrayworker.run()
+    os.remove(hpcarrayworker.job_fname)
+    assert hpcarrayworker.job_id is None
+
+
+@pytest.mark.parametrize(
+    "squeue_out,done,status,finished",
+    [
+        (b"RUNNING\nPENDING\n", 0, "running", 0),
+        (b"PENDING\n", 1, "submitted", 1),
+        (b"COMPLETED\nPENDING\n", 1, "submitted", 1),
+        (b"", 2, "finished", 2),
+        (b"FAILED\n", 1, "failed", 2),
+        ],
+    )
+def test_hpcarrayworker_update_status(
+        hpcarrayworker,
+        mocker,
+        squeue_out,
+        done,
+        status,
+        finished,
+        ):
+    mocker.patch.object(
+        HPCWorker,
+        "is_done",
+        side_effect=[True] * done + [False] * (2 - done),
+        )
+    mocker.patch(
+        "subprocess.run",
+        return_value=CompletedProcess(
+            args=['squeue'],
+            returncode=0,
+            stdout=squeue_out,
+            stderr=b'',
+            )
+        )
+    assert hpcarrayworker.update_status() == status
+    assert hpcarrayworker.finished_elements == finished
+
+
+def test_hpcarrayworker_update_status_squeue_fails(hpcarrayworker, mocker):
+    """Test a failing `squeue` does not finish the array."""
+    hpcarrayworker.job_status = "running"
+    mocker.patch(
+        "subprocess.run",
+        return_value=CompletedProcess(
+            args=['squeue'],
+            returncode=1,
+            stdout=b'',
+            stderr=b'slurm_load_jobs error: Socket timed out',
+            )
+        )
+    assert hpcarrayworker.update_status() == "running"
+    assert hpcarrayworker.finished_elements == 0
+
+    # give up once squeue failed for longer than `squeue_timeout`
+    hpcarrayworker.squeue_timeout = 60
+    mocker.patch("time.time", return_value=time.time() + 61)
+    with pytest.raises(JobRunningError, match="Socket timed out"):
+        hpcarrayworker.update_status()
+
+
+@pytest.mark.parametrize("done,status", [(True, "finished"), (False, "failed")])
+def test_hpcarrayworker_update_status_purged(
+        hpcarrayworker,
+        mocker,
+        done,
+        status,
+        ):
+    """Test an array Slurm does not know anymore is terminated."""
+    hpcarrayworker.job_status = "running"
+    mocker.patch.object(HPCWorker, "is_done", return_value=done)
+    mocker.patch(
+        "subprocess.run",
+        return_value=CompletedProcess(
+            args=['squeue'],
+            returncode=1,
+            stdout=b'',
+            stderr=b'slurm_load_jobs error: Invalid job id specified',
+            )
+        )
+    assert hpcarrayworker.update_status() == status
+    assert hpcarrayworker.finished_elements == 2
+
+
+@pytest.mark.parametrize(
+    "batch_type,job_array",
+    [("slurm", True), ("torque", False)],
+    )
+def test_hpcscheduler_job_array_slurm_only(hpcworker, batch_type, job_array):
+    scheduler = HPCScheduler(
+        hpcworker.tasks,
+        job_array=True,
+        batch_type=batch_type,
+        )
+    assert (scheduler.array_worker is not None) is job_array
+
+
+def test_adaptive_poller():
+    poller = AdaptivePoller(min_interval=2, max_interval=10)
+    assert poller.next_interval() == 4
+    assert poller.next_interval() == 8
+    assert poller.next_interval() == 10
+    assert poller.next_interval(changed=True) == 2
+
+
+def test_get_slurm_jobs_status(mocker):
+    mock_run = mocker.patch(
+        "subprocess.run",
+        return_value=CompletedProcess(
+            args=['squeue'],
+            returncode=0,
+            stdout=b'11 RUNNING\n12 PENDING\n',
+            stderr=b'',
+            )
+        )
+    statuses = get_slurm_jobs_status([11, 12, 13])
+    assert statuses == {11: 'running', 12: 'submitted', 13: 'finished'}
+    # only the submitted jobs are queried
+    assert "11,12,13" in mock_run.call_args.args[0]
+
+
+def test_get_slurm_jobs_status_squeue_fails(mocker):
+    """Test the previous statuses are kept if `squeue` fails."""
+    mocker.patch(
+        "subprocess.run",
+        return_value=CompletedProcess(
+            args=['squeue'],
+            returncode=1,
+            stdout=b'',
+            stderr=b'slurm_load_jobs error: Socket timed out',
+            )
+        )
+    statuses = get_slurm_jobs_status([11, 12], previous={11: 'running'})
+    assert statuses == {11: 'running', 12: 'unknown'}
+
+
+def test_get_slurm_jobs_status_purged_job(mocker):
+    """Test a job unknown to the controller does not hide the others."""
+    def squeue(cmd, **kwargs):
+        ids = cmd[cmd.index("-j") + 1].split(",")
+        if "12" in ids:
+            return CompletedProcess(
+                cmd, 1, b'', b'slurm_load_jobs error: Invalid job id specified'
+                )
+        return CompletedProcess(cmd, 0, b'11 RUNNING\n', b'')
+
+    mocker.patch("subprocess.run", side_effect=squeue)
+    statuses = get_slurm_jobs_status([11, 12], previous={11: 'submitted'})
+    assert statuses == {11: 'running', 12: 'finished'}
+
+
+def test_update_workers_status(hpcworker, mocker):
+    """Test workers are updated with sentinel files and a single query."""
+    done = HPCWorker(tasks=hpcworker.tasks, num=2, job_id=2)
+    done.done_fname.touch()
+    mock_run = mocker.patch(
+        "subprocess.run",
+        return_value=CompletedProcess(
+            args=['squeue'],
+            returncode=0,
+            stdout=b'123456789 RUNNING\n',
+            stderr=b'',
+            )
+        )
+    newly_terminated = update_workers_status([hpcworker, done])
+    done.done_fname.unlink()
+
+    assert newly_terminated == [done]
+    assert done.job_status == 'finished'
+    assert hpcworker.job_status == 'running'
+    mock_run.assert_called_once()
@@ -8,6 +8,7 @@ from unittest.mock import MagicMock
 import pytest
 
 from haddock.libs.libmpi import MPIScheduler
+from haddock.libs.libtelemetry import TaskStats
 
 
 @pytest.fixture
@@ -56,11 +57,15 @@ def test_mpischduler_run(mocker, mpischeduler):
             str(mpischeduler.ncores),
             "haddock3-mpitask",
             "mocked_pkl_tasks",
+            "--output",
+            str(Path(mpischeduler.cwd, "mpi_results.pkl")),
         ],
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
     )
     mock_sys_exit.assert_not_called()
+    # no results were written by the mocked runner
+    assert mpischeduler.results == [None, None, None]
 
     # Test error case
     mock_process.stderr.decode.return_value = "Error occurred"
@@ -80,3 +85,18 @@ def test__pickle_tasks(mpischeduler):
     with open(expected_path, "rb") as f:
         unpickled_tasks = pickle.load(f)
     assert unpickled_tasks == mpischeduler.tasks
+
+
+def test_load_results(mpischeduler):
+    fpath = Path(mpischeduler.cwd, "mpi_results.pkl")
+    with open(fpath, "wb") as f:
+        pickle.dump(
+            ([2, None, 4], {1: "ValueError: Test error"}, [TaskStats(0)]),
+            f,
+        )
+
+    results = mpischeduler._load_results(fpath)
+
+    assert results == [2, None, 4]
+    assert [s.task_id for s in mpischeduler.stats] == [0]
+    assert not fpath.exists()
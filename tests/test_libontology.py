@@ -1,18 +1,24 @@
 import json
+import os
 import math
+import sqlite3
 import tempfile
+from contextlib import closing
 from pathlib import Path
 
 import pytest
 
 from haddock.core.typing import Generator
 from haddock.libs.libontology import (
+    MODULE_IO_VERSION,
     Format,
     ModuleIO,
     PDBFile,
     Persistent,
     RMSDFile,
     TopologyFile,
+    find_io_file,
+    find_present,
 )
 
 
@@ -235,7 +241,7 @@ def test_moduleio_add_list():
 
 def test_moduleio_save(mocker, moduleio_with_pdbfile_list):
 
-    with tempfile.NamedTemporaryFile() as temp_module_io_f:
+    with tempfile.NamedTemporaryFile(suffix=".json") as temp_module_io_f:
         mocker.patch("haddock.core.defaults", temp_module_io_f.name)
 
         observed_io_filename = moduleio_with_pdbfile_list.save(
@@ -264,6 +270,55 @@ def test_moduleio_load(io_json_file, io_data):
     assert moduleio.output == io_data["output"]
 
 
+def test_moduleio_save_load_db(tmp_path, moduleio_with_pdbfile_dict):
+    moduleio_with_pdbfile_dict.input = ["input", {}]
+    io_path = moduleio_with_pdbfile_dict.save(tmp_path)
+
+    assert io_path == Path(tmp_path, "io.db")
+    with open(io_path, "rb") as fin:
+        assert fin.read(6) == b"SQLite"
+
+    moduleio = ModuleIO()
+    moduleio.load(io_path)
+    # the files are unpickled when first accessed
+    assert moduleio._output_rows
+    assert moduleio.output[0].keys() == {0, 1}
+    assert moduleio.output[1][1].file_name == (
+        moduleio_with_pdbfile_dict.output[1][1].file_name
+        )
+    assert moduleio._output_rows is None
+    assert moduleio.input == ["input", {}]
+
+    models = moduleio.retrieve_models()
+    assert len(models) == 2
+    assert isinstance(models[0][0], PDBFile)
+
+
+def test_moduleio_load_legacy(tmp_path, moduleio_with_pdbfile_list):
+    moduleio_with_pdbfile_list.save(tmp_path, "io.json")
+
+    # the legacy file is found from the default name
+    assert find_io_file(Path(tmp_path, "io.db")) == Path(tmp_path, "io.json")
+    moduleio = ModuleIO()
+    moduleio.load(Path(tmp_path, "io.db"))
+    assert [m.file_name for m in moduleio.output] == [
+        m.file_name for m in moduleio_with_pdbfile_list.output
+        ]
+
+    assert find_io_file(Path(tmp_path, "missing.db")) is None
+    with pytest.raises(FileNotFoundError):
+        moduleio.load(Path(tmp_path, "missing.db"))
+
+
+def test_moduleio_load_newer_version(tmp_path, moduleio_with_pdbfile_list):
+    io_path = moduleio_with_pdbfile_list.save(tmp_path)
+    with closing(sqlite3.connect(io_path)) as db:
+        db.execute(f"PRAGMA user_version = {MODULE_IO_VERSION + 1}")
+
+    with pytest.raises(ValueError):
+        ModuleIO().load(io_path)
+
+
 def test_moduleio_retrieve_models_list(moduleio_with_pdbfile_list):
 
     result = moduleio_with_pdbfile_list.retrieve_models()
@@ -339,3 +394,41 @@ def test_moduleio_remove_missing(module_io_with_persistent):
 
     # Make sure the first file is not in the list anymore
     assert first_file not in [p.rel_path for p in module_io_with_persistent.output]
+
+
+def test_find_present(mocker, tmp_path, monkeypatch):
+    step = Path(tmp_path, "1_step")
+    step.mkdir()
+    monkeypatch.chdir(step)
+    models = [PDBFile(f"model_{i}.pdb", path=step) for i in range(4)]
+    for model in models[:3]:
+        Path(step, model.file_name).write_text("")
+    # a broken link is not present, as in `is_present`
+    Path(step, "model_2.pdb").unlink()
+    os.symlink(Path(step, "missing.pdb"), Path(step, "model_2.pdb"))
+    other = PDBFile("model.pdb", path=Path(tmp_path, "2_missing"))
+
+    scandir = mocker.spy(os, "scandir")
+    present = find_present(models + [other])
+    assert present == {id(models[0]), id(models[1])}
+    # one scan per folder
+    assert scandir.call_count == 2
+    assert {id(m) for m in models + [other] if m.is_present()} == present
+
+
+def test_moduleio_remove_missing_dict(tmp_path, monkeypatch):
+    step = Path(tmp_path, "1_step")
+    step.mkdir()
+    monkeypatch.chdir(step)
+    Path("topology.psf").write_text("")
+    Path("model_1.pdb").write_text("")
+    m = ModuleIO()
+    m.output = [
+        {0: TopologyFile("topology.psf", path=step), 1: PDBFile("gone.pdb", path=step)},
+        PDBFile("model_1.pdb", path=step),
+        PDBFile("model_2.pdb", path=step),
+        ]
+
+    assert m.check_faulty() == pytest.approx(50.0)
+    assert list(m.output[0]) == [0]
+    assert [p.file_name for p in m.output[1:]] == ["model_1.pdb"]
@@ -1,3 +1,4 @@
+import time
 import uuid
 from multiprocessing import Queue
 from pathlib import Path
@@ -5,11 +6,11 @@ from pathlib import Path
 import pytest
 
 from haddock.libs.libparallel import (
+    CNSProcessScheduler,
     GenericTask,
+    QueueWorker,
     Scheduler,
-    Worker,
     get_index_list,
-    split_tasks,
 )
 
 
@@ -44,6 +45,18 @@ class FileTask:
     def run(self):
         Path(self.input_file).touch()
 
+class SleepTask:
+    """Dummy task sleeping for a given time before returning its input."""
+
+    def __init__(self, input, sleep):
+        self.input = input
+        self.sleep = sleep
+
+    def run(self):
+        time.sleep(self.sleep)
+        return self.input
+
+
 class TaskWithException:
 
     def __init__(self):
@@ -53,12 +66,6 @@ class TaskWithException:
         raise ValueError("Test error")
 
 
-@pytest.fixture
-def worker():
-    """Return a worker with 3 tasks."""
-    yield Worker(tasks=[Task(1), Task(2), Task(3)], results=Queue())
-
-
 @pytest.fixture
 def scheduler():
     """Return a scheduler with 3 tasks."""
@@ -106,19 +113,6 @@ def scheduler_with_exception():
     )
 
 
-def test_split_tasks():
-
-    lst = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
-
-    n = 3
-    result = list(split_tasks(lst, n))
-    assert result == [[1, 2, 3, 4], [5, 6, 7, 8], [9, 10]]
-
-    n = 4
-    result = list(split_tasks(lst, n))
-    assert result == [[1, 2, 3], [4, 5, 6], [7, 8, 9], [10]]
-
-
 def test_get_index_list():
 
     nmodels = 10
@@ -132,22 +126,32 @@ def test_get_index_list():
     assert result == [0, 3, 6, 8, 10]
 
 
-def test_worker_run(worker):
+def test_queue_worker_run():
+    tasks = Queue()
+    results = Queue()
+    for idx_task in enumerate([Task(1), TaskWithException(), Task(3)]):
+        tasks.put(idx_task)
+    tasks.put(None)
 
-    _ = worker.run()
+    worker = QueueWorker(tasks, results)
+    worker.run()
 
-    assert worker.tasks[0].output == 2
-    assert worker.tasks[1].output == 3
-    assert worker.tasks[2].output == 4
+    for idx, expected, status in ((0, 2, "ok"), (1, None, "failed"), (2, 4, "ok")):
+        task_idx, result, stats = results.get()
+        assert (task_idx, result) == (idx, expected)
+        assert stats.task_id == idx
+        assert stats.status == status
+        assert stats.wall_time >= 0
+    assert results.get() == f"{worker.name}_done"
 
 
 def test_scheduler_files(scheduler_files):
 
     _ = scheduler_files.run()
 
-    assert Path(scheduler_files.worker_list[0].tasks[0].input_file).exists()
-    assert Path(scheduler_files.worker_list[0].tasks[1].input_file).exists()
-    assert Path(scheduler_files.worker_list[0].tasks[2].input_file).exists()
+    assert Path(scheduler_files.tasks[0].input_file).exists()
+    assert Path(scheduler_files.tasks[1].input_file).exists()
+    assert Path(scheduler_files.tasks[2].input_file).exists()
 
 
 def test_scheduler(scheduler):
@@ -159,6 +163,85 @@ def test_scheduler(scheduler):
     assert scheduler.results[2] == 4
 
 
+def test_scheduler_keeps_task_order():
+    """Test results come back in task order regardless of runtimes."""
+    sleeps = [0.3, 0.0, 0.2, 0.0, 0.1, 0.0]
+    tasks = [SleepTask(i, s) for i, s in enumerate(sleeps)]
+    scheduler = Scheduler(tasks=tasks, ncores=3, max_cpus=True)
+    scheduler.run()
+
+    assert scheduler.results == list(range(len(sleeps)))
+
+
+def test_scheduler_callback():
+    received = {}
+
+    def callback(idx, result):
+        received[idx] = result
+
+    scheduler = Scheduler(
+        tasks=[Task(1), Task(2), Task(3)],
+        ncores=2,
+        callback=callback,
+    )
+    scheduler.run()
+
+    assert received == {0: 2, 1: 3, 2: 4}
+    assert scheduler.results == []
+
+
+def test_scheduler_generator():
+    """Test tasks are created only as the workers consume them."""
+    created = []
+
+    def tasks():
+        for i in range(20):
+            created.append(i)
+            yield SleepTask(i, 0.01)
+
+    received = {}
+
+    def callback(idx, result):
+        # besides the running tasks, at most two tasks per worker wait
+        #  in the queue and one more waits to be put in it
+        assert len(created) <= len(received) + 1 + 2 + 2 * 2 + 1
+        received[idx] = result
+
+    scheduler = Scheduler(tasks=tasks(), ncores=2, callback=callback)
+    scheduler.run()
+
+    assert received == {i: i for i in range(20)}
+    assert scheduler.num_tasks == 20
+
+    scheduler = Scheduler(tasks=(SleepTask(i, 0) for i in range(5)), ncores=2)
+    scheduler.run()
+    assert scheduler.results == list(range(5))
+
+
+def test_scheduler_generator_error():
+    def tasks():
+        yield Task(1)
+        raise ValueError("Cannot create task")
+
+    scheduler = Scheduler(tasks=tasks(), ncores=2)
+    with pytest.raises(ValueError, match="Cannot create task"):
+        scheduler.run()
+
+
+def test_scheduler_stats(tmp_path):
+    stats_file = Path(tmp_path, "tasks.tsv")
+    tasks = [SleepTask(i, 0.05) for i in range(4)] + [TaskWithException()]
+    scheduler = Scheduler(tasks=tasks, ncores=2, stats_file=stats_file)
+    scheduler.run()
+
+    assert sorted(s.task_id for s in scheduler.stats) == list(range(5))
+    assert [s.status for s in sorted(scheduler.stats, key=lambda s: s.task_id)] == [
+        "ok", "ok", "ok", "ok", "failed"]
+    lines = stats_file.read_text().splitlines()
+    assert lines[0].startswith("task_id\tinput\tworker")
+    assert [line.split("\t")[0] for line in lines[1:]] == ["0", "1", "2", "3", "4"]
+
+
 def test_scheduler_with_exception(scheduler_with_exception):
 
     _ = scheduler_with_exception.run()
@@ -309,3 +392,13 @@ def test_generic_task_run_with_complex_args():
 @pytest.mark.skip("WIP")
 def test_scheduler_terminate(scheduler_files):
     pass
+
+
+def test_cnsprocess_scheduler_runs_generic_tasks():
+    scheduler = CNSProcessScheduler(
+        tasks=[GenericTask(sum, [1, 2]), Task(3)],
+        ncores=2,
+    )
+    scheduler.run()
+
+    assert scheduler.results == [3, 4]
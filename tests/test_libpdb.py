@@ -1,4 +1,5 @@
 """Test lib PDB."""
+import numpy as np
 import pytest
 
 from haddock.libs import libpdb
@@ -31,3 +32,58 @@ def test_read_chain_ids(lines, expected):
 def test_read_seg_ids(lines, expected):
     result = libpdb.read_segids(lines)
     assert result == expected
+
+
+def test_identify_chainseg(tmp_path):
+    pdb = tmp_path / "model.pdb"
+    pdb.write_text("\n".join(chainC) + "\n")
+    assert libpdb.identify_chainseg(pdb) == (["C"], ["C"])
+
+    # the cached scan is not used once the file changes
+    chainA = [line[:21] + "A" + line[22:72] + "A   " + line[76:] for line in chainC]
+    pdb.write_text("\n".join(chainC + chainA) + "\n")
+    assert libpdb.identify_chainseg(pdb) == (["A", "C"], ["A", "C"])
+    segids, chains = libpdb.identify_chainseg(pdb, sort=False)
+    assert sorted(segids) == ["A", "C"]
+    assert sorted(chains) == ["A", "C"]
+
+
+def test_identify_chainseg_hybrid36(tmp_path):
+    pdb = tmp_path / "model.pdb"
+    pdb.write_text(
+        "ATOM  A0000  CA  ALA AA000      37.080  43.455  -3.421  1.00  0.00"
+        "\nATOM      1  CA  ALA A   1\n"
+        )
+    assert libpdb.identify_chainseg(pdb) == ([], ["A"])
+    structure = libpdb.read_structure(pdb)
+    assert structure.atoms["resseq"].tolist() == ["A000", "1"]
+    assert structure.xyz[0].tolist() == [37.080, 43.455, -3.421]
+    assert np.isnan(structure.xyz[1]).all()
+
+
+def test_read_structure(tmp_path):
+    pdb = tmp_path / "model.pdb"
+    pdb.write_text(
+        "REMARK energies: 1.0\n"
+        + "\n".join(chainC)
+        + "\nHETATM    4  O   WAT W   1       1.000   2.000   3.000\nEND\n"
+        )
+    structure = libpdb.read_structure(pdb)
+    assert structure.remarks == ("REMARK energies: 1.0",)
+    atoms = structure.atoms
+    assert atoms["record"].tolist() == ["ATOM", "ATOM", "ATOM", "HETATM"]
+    assert atoms["name"].tolist() == ["CA", "CA", "CA", "O"]
+    assert atoms["resname"].tolist() == ["ARG", "GLU", "ALA", "WAT"]
+    assert atoms["chain"].tolist() == ["C", "C", "C", "W"]
+    assert atoms["resseq"].tolist() == ["4", "6", "7", "1"]
+    assert atoms["segid"].tolist() == ["C", "C", "C", ""]
+    assert atoms["element"].tolist() == ["C", "C", "C", ""]
+    assert structure.xyz.shape == (4, 3)
+    assert structure.xyz[0].tolist() == [37.080, 43.455, -3.421]
+    with pytest.raises(ValueError):
+        structure.xyz[0] = 0
+
+    # the structure is cached until the file changes
+    assert libpdb.read_structure(pdb) is structure
+    pdb.write_text("\n".join(chainC[:1]) + "\n")
+    assert len(libpdb.read_structure(pdb).atoms) == 1
@@ -1,11 +1,24 @@
 import pytest
+import gzip
 import itertools
 import os
 from pathlib import Path
 import tempfile
 import shlex
+import time
 from unittest.mock import MagicMock
-from haddock.libs.libsubprocess import BaseJob, Job, CNSJob
+import pickle
+from functools import partial
+
+from haddock.gear.known_cns_errors import KNOWN_ERRORS
+from haddock.libs.libsubprocess import (
+    CNS_OUTPUT_TAIL,
+    BaseJob,
+    Job,
+    CNSJob,
+    CNSProcess,
+    DeferredCNSJob,
+)
 
 
 @pytest.fixture
@@ -117,23 +130,210 @@ def test_cnsjob_cns_exec_setter(cnsjob, mocker):
         cnsjob.cns_exec = "wrong"
 
 
-def test_cnsjob_run(cnsjob, mocker):
-
-    mock_popen = mocker.patch("subprocess.Popen")
-    mock_popen_instance = MagicMock()
-    mock_popen.return_value = mock_popen_instance
-    mock_popen_instance.communicate.return_value = (b"output", None)
-
-    mocker.patch("builtins.open", mocker.mock_open())
-    mocker.patch("haddock.libs.libsubprocess.gzip_files", return_value=None)
+def test_cnsjob_run(fake_cns_exec, tmp_path):
+    inp = Path(tmp_path, "job.inp")
+    inp.write_text(f"display done{os.linesep}stop{os.linesep}")
+    out = Path(tmp_path, "job.out")
+    err = Path(tmp_path, "job.cnserr")
 
     # Try all possible combinations of compress flags
-    for comb in itertools.product([True, False], repeat=3):
-        compress_inp, compress_out, compress_seed = comb
-        result = cnsjob.run(
-            compress_inp=compress_inp,
-            compress_out=compress_out,
-            compress_seed=compress_seed,
+    for compress_out, compress_err in itertools.product([True, False], repeat=2):
+        cnsjob = CNSJob(
+            input_file=inp,
+            output_file=out,
+            error_file=err,
+            cns_exec=fake_cns_exec,
         )
+        result = cnsjob.run(compress_out=compress_out, compress_err=compress_err)
+        assert result.strip() == b"done"
+
+        if compress_out:
+            with gzip.open(f"{out}.gz") as fin:
+                assert fin.read().strip() == b"done"
+        else:
+            assert out.read_bytes().strip() == b"done"
+        assert not err.exists()
+        assert not Path(f"{err}.gz").exists()
+
+    cnsjob.run(compress_inp=True)
+    assert not inp.exists()
+    assert Path(f"{inp}.gz").exists()
+
+
+def test_cnsjob_run_string_input(fake_cns_exec, tmp_path):
+    cnsjob = CNSJob(
+        input_file=f"display done{os.linesep}stop{os.linesep}",
+        output_file=Path(tmp_path, "job.out"),
+        error_file=Path(tmp_path, "job.cnserr"),
+        cns_exec=fake_cns_exec,
+    )
+
+    assert cnsjob.run().strip() == b"done"
+    # the output of string inputs is only saved on errors
+    assert list(tmp_path.iterdir()) == [fake_cns_exec]
+
+
+def test_cnsjob_run_stops_on_known_error(fake_cns_exec, tmp_path):
+    known_error = next(iter(KNOWN_ERRORS))
+    cnsjob = CNSJob(
+        input_file=(
+            f"display starting{os.linesep}"
+            f"display {known_error}{os.linesep}"
+            f"sleep 30{os.linesep}"
+            f"display never{os.linesep}"
+            f"stop{os.linesep}"
+        ),
+        error_file=Path(tmp_path, "job.cnserr"),
+        cns_exec=fake_cns_exec,
+    )
+
+    start = time.perf_counter()
+    result = cnsjob.run(compress_err=False)
+    assert time.perf_counter() - start < 20
+
+    assert known_error.encode() in result
+    assert b"never" not in result
+    saved = Path(tmp_path, "job.cnserr").read_bytes()
+    assert saved.startswith(b"starting")
+    assert known_error.encode() in saved
+
+
+def test_cnsjob_contains_cns_stdout_error():
+    known_error = next(iter(KNOWN_ERRORS))
+    assert not CNSJob.contains_cns_stdout_error(b"all good\nstop\n")
+    assert CNSJob.contains_cns_stdout_error(b"  ^^^^^\n")
+    assert CNSJob.contains_cns_stdout_error(f"x\n{known_error}\n".encode())
+    # only the end of the output is searched
+    late = f"{known_error}\n".encode() + b"x" * CNS_OUTPUT_TAIL
+    assert not CNSJob.contains_cns_stdout_error(late)
+
+
+def test_cnsprocess_run_successive_jobs(fake_cns_exec):
+    cns_process = CNSProcess(cns_exec=fake_cns_exec)
+
+    out1, err1 = cns_process.run(b"display job one" + os.linesep.encode() + b"stop")
+    pid = cns_process.process.pid
+    out2, err2 = cns_process.run(b"display job two" + os.linesep.encode() + b"stop")
+
+    assert out1.strip() == b"job one"
+    assert out2.strip() == b"job two"
+    assert err1 == err2 == b""
+    # the same process executed both jobs
+    assert cns_process.process.pid == pid
+    assert cns_process.njobs == 2
+
+    cns_process.close()
+    assert not cns_process.is_alive()
+
+
+def test_cnsprocess_resets_state(fake_cns_exec):
+    def job_script(molecule):
+        return os.linesep.join(
+            (
+                "eval ($haddock3_toppar_loaded=false)",
+                f"structure @@{molecule}.psf end",
+                "@MODULE:read_param.cns",
+                "write coordinates end",
+                "stop",
+                )
+            ).encode()
+
+    cns_process = CNSProcess(cns_exec=fake_cns_exec)
+    out1, _ = cns_process.run(job_script("protein"))
+    out2, _ = cns_process.run(job_script("ligand"))
+    cns_process.close()
+
+    assert out1.splitlines() == [b"reading parameters", b"molecules: protein"]
+    # the protein is gone and the parameters are not read again
+    assert out2.strip() == b"molecules: ligand"
+
+
+def test_cnsprocess_restarts(fake_cns_exec):
+    cns_process = CNSProcess(cns_exec=fake_cns_exec, max_jobs=1)
+
+    _, err = cns_process.run(b"crash")
+    assert err == b"CNS process exited with code 3"
+    assert not cns_process.is_alive()
+
+    out, err = cns_process.run(b"display recovered")
+    pid = cns_process.process.pid
+    assert out.strip() == b"recovered"
+    assert err == b""
+
+    # max_jobs reached, a new process is started
+    cns_process.run(b"display again")
+    assert cns_process.process.pid != pid
+    cns_process.close()
+
+
+def test_cnsprocess_restarts_on_other_symbols(fake_cns_exec):
+    def job_script(*symbols):
+        lines = [f"eval (${symbol}=true)" for symbol in symbols]
+        return os.linesep.join(lines + ["display job", "stop"]).encode()
+
+    cns_process = CNSProcess(cns_exec=fake_cns_exec)
+    cns_process.run(job_script("ncs_on", "kncs"))
+    pid = cns_process.process.pid
+    cns_process.run(job_script("kncs", "ncs_on"))
+    assert cns_process.process.pid == pid
+
+    # `$ncs_on` would keep the value of the previous job
+    cns_process.run(job_script("kncs"))
+    assert cns_process.process.pid != pid
+    assert cns_process.njobs == 1
+    cns_process.close()
+
+
+def test_cnsjob_run_in_cns_process(fake_cns_exec, tmp_path):
+    inp = Path(tmp_path, "job.inp")
+    inp.write_text(f"display done{os.linesep}stop{os.linesep}")
+    out = Path(tmp_path, "job.out")
+    cnsjob = CNSJob(
+        input_file=inp,
+        output_file=out,
+        error_file=Path(tmp_path, "job.cnserr"),
+        cns_exec=fake_cns_exec,
+    )
+    cns_process = CNSProcess(cns_exec=fake_cns_exec)
 
-        assert result == b"output"
+    result = cnsjob.run(cns_process=cns_process, compress_out=False)
+    cns_process.close()
+
+    assert result.strip() == b"done"
+    assert out.read_bytes().strip() == b"done"
+
+
+def test_deferred_cnsjob(fake_cns_exec, tmp_path):
+    calls = []
+
+    def make_input(text):
+        calls.append(text)
+        return f"display {text}{os.linesep}stop{os.linesep}"
+
+    job = DeferredCNSJob(
+        partial(make_input, "deferred"),
+        output_file=Path(tmp_path, "job.out"),
+        error_file=Path(tmp_path, "job.cnserr"),
+        cns_exec=fake_cns_exec,
+    )
+    assert "DeferredCNSJob" in repr(job)
+    assert calls == []
+
+    result = job.run()
+    assert result.strip() == b"deferred"
+    assert calls == ["deferred"]
+
+    job.input_file
+    assert calls == ["deferred"]
+
+
+def test_deferred_cnsjob_pickle(fake_cns_exec):
+    job = DeferredCNSJob(
+        partial(str.upper, "inp"),
+        output_file="job.out",
+        cns_exec=fake_cns_exec,
+    )
+    unpickled = pickle.loads(pickle.dumps(job))
+    assert unpickled._input_file is None
+    assert unpickled.input_file == "INP"
+    assert isinstance(unpickled, CNSJob)
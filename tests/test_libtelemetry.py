@@ -0,0 +1,108 @@
+"""Test the per-task telemetry of the engines."""
+
+import math
+from pathlib import Path
+
+from haddock.libs.libsubprocess import CNSJob
+from haddock.libs.libtelemetry import (
+    TASK_FIELDS,
+    TaskStats,
+    report_tasks,
+    run_measured,
+    summarize_tasks,
+    task_input,
+    write_tasks_file,
+    )
+
+
+class Task:
+
+    def __init__(self, input):
+        self.input = input
+
+    def run(self):
+        if self.input is None:
+            raise ValueError("Test error")
+        return self.input + 1
+
+
+def test_run_measured():
+    result, stats = run_measured(Task(1), 3)
+    assert result == 2
+    assert stats.task_id == 3
+    assert stats.status == "ok"
+    assert stats.wall_time >= 0
+    assert stats.cpu_time >= 0
+    assert stats.peak_rss_mb > 0
+
+
+def test_run_measured_failure():
+    result, stats = run_measured(Task(None), 0)
+    assert result is None
+    assert stats.status == "failed"
+
+
+def test_run_measured_custom_run():
+    result, _ = run_measured(Task(1), 0, run=lambda: "custom")
+    assert result == "custom"
+
+
+def test_task_input(mocker):
+    mocker.patch(
+        "haddock.libs.libsubprocess.CNSJob.cns_exec",
+        return_value=None,
+        )
+    assert task_input(CNSJob(Path("job.inp"), Path("job.out"))) == "job.inp"
+    assert task_input(CNSJob("input stream", "job_1.out")) == "job_1.out"
+    assert task_input(Task(Path("model.pdb"))) == "model.pdb"
+    assert task_input(object()) == ""
+
+
+def test_write_tasks_file(tmp_path):
+    fpath = Path(tmp_path, "tasks.tsv")
+    write_tasks_file([TaskStats(1, "b.inp"), TaskStats(0, "a.inp")], fpath)
+    write_tasks_file([TaskStats(0, "c.inp", status="failed")], fpath)
+
+    lines = [line.split("\t") for line in fpath.read_text().splitlines()]
+    assert lines[0] == list(TASK_FIELDS)
+    assert [line[1] for line in lines[1:]] == ["a.inp", "b.inp", "c.inp"]
+    assert lines[3][6] == "failed"
+
+
+def test_summarize_tasks():
+    stats = [
+        TaskStats(0, worker="w1", wall_time=1.0, cpu_time=1.0, peak_rss_mb=10),
+        TaskStats(1, worker="w1", wall_time=3.0, cpu_time=2.0, peak_rss_mb=20),
+        TaskStats(2, worker="w2", wall_time=2.0, cpu_time=1.5, peak_rss_mb=15),
+        TaskStats(3, worker="w2", wall_time=2.0, status="failed"),
+        ]
+    summary = summarize_tasks(stats)
+
+    assert summary["tasks"] == 4
+    assert summary["failed"] == 1
+    assert summary["workers"] == 2
+    assert summary["wall_p50"] == 2.0
+    assert summary["wall_max"] == 3.0
+    assert summary["cpu_total"] == 4.5
+    assert summary["peak_rss_mb"] == 20
+    assert summary["imbalance"] == 1.0
+
+
+def test_summarize_tasks_unknown_values():
+    """Test engines measuring only the wall time are summarized."""
+    stats = [TaskStats(0, worker="w1", wall_time=1.0), TaskStats(1, worker="w2")]
+    summary = summarize_tasks(stats)
+
+    assert summary["wall_max"] == 1.0
+    assert summary["cpu_total"] == 0
+    assert math.isnan(summary["peak_rss_mb"])
+
+
+def test_report_tasks(tmp_path, caplog):
+    fpath = Path(tmp_path, "tasks.tsv")
+    report_tasks([TaskStats(0, worker="w1", wall_time=1.0)], fpath)
+    assert fpath.exists()
+    assert "load imbalance 1.00" in caplog.text
+
+    report_tasks([], Path(tmp_path, "empty.tsv"))
+    assert not Path(tmp_path, "empty.tsv").exists()
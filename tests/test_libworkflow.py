@@ -1,9 +1,26 @@
 """Uni-test functions for the Workflow Manager."""
 
+import os
+import shutil
+import sys
 import tempfile
-from haddock.libs.libworkflow import WorkflowManager
+from functools import partial
+from pathlib import Path
+
+import pytest
+
+from haddock.libs.libio import working_directory
+from haddock.libs.libontology import ModuleIO, PDBFile, TopologyFile
+from haddock.libs.libparallel import Scheduler
+from haddock.libs.libworkflow import (
+    FusedModelTask,
+    FusedSteps,
+    WorkflowManager,
+    )
 from haddock.core.typing import Any
 
+from . import golden_data
+
 
 def test_WorkflowManager(caplog):
     """Test WorkflowManager."""
@@ -29,3 +46,210 @@ def test_WorkflowManager(caplog):
         second_log_line = str(caplog.records[1].message)
         assert first_log_line == "Reading instructions step 0_topoaa"
         assert second_log_line == "Running haddock3-analyse on ./, modules [], with top_cluster = 10"  # noqa : E501
+
+
+def test_WorkflowManager_fusable_chain():
+    """Test the detection of the steps that can be fused."""
+    fused = {"fuse_refinement": True, "mode": "local"}
+    ParamDict = {
+        "topoaa.1": {"mode": "local"},
+        "flexref.1": {**fused, "sampling_factor": 2},
+        "emref.1": fused,
+        "emscoring.1": fused,
+        "caprieval.1": fused,
+        "mdref.1": fused,
+        "emscoring.2": {"fuse_refinement": True, "mode": "batch"},
+        }
+    workflow = WorkflowManager(ParamDict, start=0)
+
+    chain = workflow.fusable_chain(1)
+    assert [step.module_name for step in chain] == [
+        "flexref", "emref", "emscoring",
+        ]
+    assert workflow.fusable_chain(0) == []
+    assert len(workflow.fusable_chain(5)) == 1
+    assert workflow.fusable_chain(6) == []
+
+    # the step being resumed runs on its own
+    workflow = WorkflowManager(ParamDict, start=2, resume=True)
+    assert workflow.recipe.steps[2].resume
+    assert workflow.fusable_chain(2) == []
+    assert len(workflow.fusable_chain(3)) == 1
+
+
+class FakeJob:
+    """Dummy CNS job writing the expected model."""
+
+    def __init__(self, model, fail=False):
+        self.model = model
+        self.fail = fail
+
+    def run(self):
+        if not self.fail:
+            Path(self.model).write_text("model")
+        return b"done"
+
+
+def test_FusedModelTask(tmp_path):
+    """Test a model goes through the fused steps until one fails."""
+    links = []
+    for i, fail in enumerate((False, True, False)):
+        step_path = Path(tmp_path, f"{i}_step")
+        step_path.mkdir()
+        expected = PDBFile(f"model_{i}.pdb", path=step_path)
+        links.append((step_path, partial(FakeJob, expected.file_name, fail), expected))
+
+    task = FusedModelTask(links)
+    with working_directory(tmp_path):
+        assert task.run() is None
+
+    assert Path(tmp_path, "0_step", "model_0.pdb").exists()
+    assert not Path(tmp_path, "1_step", "model_1.pdb").exists()
+    assert not Path(tmp_path, "2_step", "model_2.pdb").exists()
+
+
+FAKE_REFINEMENT_CNS = """#!{python}
+import re
+import sys
+
+script = sys.stdin.read()
+input_pdb = re.search(r"^coor @@(\\S+)", script, re.MULTILINE).group(1)
+output_pdb = re.search(r'output_pdb_filename="(.+?)"', script).group(1)
+if "failing" in input_pdb:
+    sys.exit(1)
+
+with open(input_pdb) as fin:
+    atoms = [line for line in fin if line.startswith("ATOM")]
+with open(output_pdb, "w") as fout:
+    fout.write("REMARK energies: " + ", ".join(["-1.5"] * 15) + "\\n")
+    fout.write("REMARK buried surface area: 800.0\\n")
+    fout.write("REMARK Desolvation energy: -5.0\\n")
+    fout.writelines(atoms)
+"""
+
+
+@pytest.fixture
+def fake_refinement_cns(tmp_path, mocker):
+    """Use a fake CNS copying the input model with some energies."""
+    fake_cns = Path(tmp_path, "cns")
+    fake_cns.write_text(FAKE_REFINEMENT_CNS.format(python=sys.executable))
+    os.chmod(fake_cns, 0o755)
+    mocker.patch("haddock.libs.libsubprocess.global_cns_exec", fake_cns)
+    yield fake_cns
+
+
+def run_refinement_steps(run_dir, fused, mocker):
+    """Run emref, emscoring and mdref on two models, one failing."""
+    step_params = {
+        "mode": "local",
+        "ncores": 1,
+        "fuse_refinement": fused,
+        "tolerance": 50,
+        }
+    workflow_params = {
+        "topoaa.1": {},
+        "emref.1": step_params,
+        "emscoring.1": step_params,
+        "mdref.1": step_params,
+        }
+
+    topoaa_dir = Path(run_dir, "0_topoaa")
+    topoaa_dir.mkdir(parents=True)
+    models = []
+    for name in ("passing", "failing"):
+        for suffix in ("pdb", "psf"):
+            shutil.copy(
+                Path(golden_data, f"e2aP_1F3G_haddock.{suffix}"),
+                Path(topoaa_dir, f"{name}.{suffix}"),
+                )
+        with working_directory(topoaa_dir):
+            model = PDBFile(
+                f"{name}.pdb",
+                topology=TopologyFile(f"{name}.psf", path="."),
+                path=".",
+                score=0.0,
+                )
+        model.seed = 42
+        models.append(model)
+    io = ModuleIO()
+    io.add(models, "o")
+    io.save(topoaa_dir)
+
+    with working_directory(run_dir):
+        workflow = WorkflowManager(workflow_params, start=0)
+        steps = workflow.recipe.steps[1:]
+        if fused:
+            assert workflow.fusable_chain(1) == steps
+            scheduler_run = Scheduler.run
+
+            def run_when_ready(engine):
+                # all the steps are ready before the first job runs
+                for step in steps:
+                    assert Path(step.working_path, "params.cfg").exists()
+                    assert step.module is not None
+                scheduler_run(engine)
+
+            mocker.patch.object(Scheduler, "run", run_when_ready)
+            FusedSteps(steps).execute()
+        else:
+            assert workflow.fusable_chain(1) == []
+            for step in steps:
+                step.execute()
+        return [step.working_path for step in steps]
+
+
+def describe_models(models):
+    """Describe models with the attributes not depending on the run."""
+    return [
+        (
+            model.file_name,
+            str(model.rel_path),
+            model.score,
+            model.unw_energies,
+            model.ori_name,
+            model.seed,
+            )
+        for model in models
+        ]
+
+
+def test_FusedSteps_execute(tmp_path, fake_refinement_cns, mocker):
+    """Test fused steps produce the same outputs as unfused ones."""
+    step_folders = run_refinement_steps(
+        Path(tmp_path, "unfused"), False, mocker
+        )
+    assert step_folders == run_refinement_steps(
+        Path(tmp_path, "fused"), True, mocker
+        )
+
+    for step_folder in step_folders:
+        unfused_dir = Path(tmp_path, "unfused", step_folder)
+        fused_dir = Path(tmp_path, "fused", step_folder)
+        assert Path(fused_dir, "params.cfg").exists()
+
+        unfused_io = ModuleIO()
+        unfused_io.load(Path(unfused_dir, "io.db"))
+        fused_io = ModuleIO()
+        fused_io.load(Path(fused_dir, "io.db"))
+        # the previous io.db was reloaded before collecting the output,
+        # without the model that failed
+        first_step = step_folder == step_folders[0]
+        assert len(fused_io.input) == (2 if first_step else 1)
+        assert len(fused_io.output) == 1
+        for attribute in ("input", "output"):
+            assert describe_models(getattr(fused_io, attribute)) == \
+                describe_models(getattr(unfused_io, attribute))
+
+        for model in fused_io.output:
+            assert Path(fused_dir, model.file_name).read_bytes() == \
+                Path(unfused_dir, model.file_name).read_bytes()
+
+    # the model derived from the failing one is missing in every step
+    fused_pdbs = sorted(
+        p.name for p in Path(tmp_path, "fused").glob("[1-3]_*/*.pdb*")
+        )
+    unfused_pdbs = sorted(
+        p.name for p in Path(tmp_path, "unfused").glob("[1-3]_*/*.pdb*")
+        )
+    assert fused_pdbs == unfused_pdbs
+    assert fused_pdbs == ["emref_1.pdb", "emscoring_1.pdb", "mdref_1.pdb"]
@@ -10,9 +10,11 @@ from pathlib import Path
 import numpy as np
 import pytest
 
+from haddock.libs.libalign import get_atoms, load_coords
 from haddock.libs.libontology import PDBFile
 from haddock.modules.analysis.caprieval.capri import (
     CAPRI,
+    ReferenceContext,
     calc_stats,
     capri_cluster_analysis,
     extract_data_from_capri_class,
@@ -564,6 +566,52 @@ def test_identify_protliginterface(protlig_caprimodule, protlig_input_list):
         assert sorted(observed_interface[ch]) == sorted(expected_interface[ch])
 
 
+def test_reference_context(protprot_input_list, tmp_path):
+    """Test the reference data is computed once and shared."""
+    reference = Path(tmp_path, "reference.pdb")
+    shutil.copy(protprot_input_list[0].rel_path, reference)
+    context = ReferenceContext.load(reference, full=True)
+    assert ReferenceContext.load(reference, full=True) is context
+    assert ReferenceContext.load(reference, full=False) is not context
+    assert context.atoms == get_atoms(reference, full=True)
+
+    assert context.contacts(5.0) == load_contacts(reference, cutoff=5.0)
+    assert context.contacts(5.0) is context.contacts(5.0)
+    assert context.interface(5.0) == CAPRI.identify_interface(reference, 5.0)
+    expected, _ = load_coords(reference, context.atoms, context.interface(5.0))
+    assert context.coords(5.0).keys() == expected.keys()
+    assert len(context.coords()) > len(context.coords(5.0))
+
+    params = {
+        "fnat": True,
+        "fnat_cutoff": 4.0,
+        "irmsd": False,
+        "ilrmsd": False,
+        "lrmsd": False,
+        "global_rmsd": False,
+        }
+    context.prepare(params)
+    assert 4.0 in context._contacts
+
+    # a modified reference is read again
+    with open(reference, "a") as fout:
+        fout.write("END\n")
+    assert ReferenceContext.load(reference, full=True) is not context
+
+
+def test_load_contacts_cutoff(tmp_path):
+    """Test atoms exactly at the cutoff distance are not in contact."""
+    pdb = Path(tmp_path, "two_chains.pdb")
+    pdb.write_text(
+        "ATOM      1  CA  ALA A   1       0.000   0.000   0.000  1.00  0.00\n"
+        "ATOM      2  CA  ALA B   7       3.000   4.000   0.000  1.00  0.00\n"
+        "ATOM      3  CA  ALA B   8      30.000   0.000   0.000  1.00  0.00\n"
+        "END\n"
+        )
+    assert load_contacts(pdb, cutoff=5.0) == set()
+    assert load_contacts(pdb, cutoff=5.01) == {("A", 1, "B", 7)}
+
+
 def test_load_contacts(protprot_input_list):
     """Test loading contacts."""
     protprot_complex = protprot_input_list[0]
@@ -20,18 +20,18 @@ def fixture_fcc_module():
 
 
 def test_io_json(fcc_module, protprot_input_list):
-    """Test the correct creation of the io.json file."""
+    """Test the correct creation of the io.db file."""
     # set the input and output models
     fcc_module.previous_io.output = protprot_input_list
     fcc_module.output_models = protprot_input_list
 
     # export models
     fcc_module.export_io_models()
-    expected_io = Path(f"{fcc_module.path}/io.json")
+    expected_io = Path(f"{fcc_module.path}/io.db")
 
     assert expected_io.exists()
 
-    # check the content of io.json
+    # check the content of io.db
     io = ModuleIO()
     io.load(expected_io)
     assert io.input[0].file_name == protprot_input_list[0].file_name
@@ -33,7 +33,7 @@ def fixture_output_list():
         "cluster.out",
         "clustrmsd.txt",
         "clustrmsd.tsv",
-        "io.json",
+        "io.db",
     ]
 
 
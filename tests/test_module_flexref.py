@@ -6,6 +6,8 @@ from pathlib import Path
 
 import pytest
 
+from haddock.libs.libontology import PDBFile
+from haddock.modules.base_cns_module import is_complete_model
 from haddock.modules.refinement.flexref import \
     DEFAULT_CONFIG as DEFAULT_FLEXREF_PARAMS
 from haddock.modules.refinement.flexref import HaddockModule as Flexref
@@ -45,3 +47,21 @@ def test_prev_fnames(flexref, protdna_input_list):
     # FIXME: this should be a more specific exception
     with pytest.raises(Exception):  # noqa: B017
         obs_ambig_fnames = flexref.get_ambig_fnames(prev_ambig_fnames)
+
+
+def test_skip_generated(flexref):
+    """Test only the jobs of missing models run when resuming a step."""
+    Path("flexref_1.pdb").write_text("ATOM\nEND\n")
+    # interrupted while writing the model
+    Path("flexref_2.pdb").write_text("ATOM\nATO")
+    flexref.output_models = [
+        PDBFile(f"flexref_{i}.pdb", path=".") for i in range(1, 4)
+        ]
+    assert is_complete_model("flexref_1.pdb")
+    assert not is_complete_model("flexref_2.pdb")
+    assert not is_complete_model("flexref_3.pdb")
+
+    jobs = ["job_1", "job_2", "job_3"]
+    assert list(flexref.skip_generated(jobs)) == jobs
+    flexref.resume = True
+    assert list(flexref.skip_generated(jobs)) == ["job_2", "job_3"]
@@ -1,7 +1,6 @@
 """Test the rigidbody module."""
 
 import os
-import random
 import tempfile
 from pathlib import Path
 
@@ -41,54 +40,14 @@ def test_prev_fnames():
         assert diff_ambig_fnames is None
 
 
-def test_rigidbody_make_cns_jobs(rigidbody_module):
-    "???"
-
-    rigidbody_module.output_models = []
-    rigidbody_module.envvars = {}
-
-    cns_input_file = Path("rigidbody.inp")
-    cns_output_file = "rigidbody_1.out"
-    output_pdb_name = "rigidbody_1.pdb"
-    ambig_fname = "ambig.tbl"
-    seed = random.randint(0, 1000)
-    topology = Persistent(file_name="topology.psf", path=".", file_type=Format.TOPOLOGY)
-    input_pdb_1 = PDBFile(
-        Path("model1.pdb"), path=".", restr_fname="ambig1.tbl", topology=topology
-    )
-    input_pdb_2 = PDBFile(
-        Path("model2.pdb"), path=".", restr_fname="ambig2.tbl", topology=topology
-    )
-    inp_list = [
-        (
-            [
-                input_pdb_1,
-                input_pdb_2,
-            ],
-            cns_input_file,
-            ambig_fname,
-            seed,
-        )
-    ]
-
-    observed_jobs = rigidbody_module.make_cns_jobs(inp_list)
-
-    assert isinstance(observed_jobs[0], CNSJob)
-    assert observed_jobs[0].input_file == cns_input_file
-    assert observed_jobs[0].output_file == str(cns_output_file)
-    assert rigidbody_module.output_models[0].restr_fname == ambig_fname
-    assert rigidbody_module.output_models[0].file_name == output_pdb_name
-    assert rigidbody_module.output_models[0].topology == [topology, topology]
-    assert rigidbody_module.output_models[0].seed == seed
-
-
-def test_prepare_cns_input_sequential(mocker, rigidbody_module):
-    """???"""
-
-    mocker.patch(
+def test_rigidbody_make_cns_jobs(mocker, rigidbody_module):
+    """Test the CNS jobs and their expected models."""
+    mock_prepare = mocker.patch(
         "haddock.modules.sampling.rigidbody.prepare_cns_input",
         return_value="cns_input",
     )
+    rigidbody_module.output_models = []
+    rigidbody_module.envvars = {}
 
     topology = Persistent(file_name="topology.psf", path=".", file_type=Format.TOPOLOGY)
     input_pdb_1 = PDBFile(
@@ -97,53 +56,61 @@ def test_prepare_cns_input_sequential(mocker, rigidbody_module):
     input_pdb_2 = PDBFile(
         Path("model2.pdb"), path=".", restr_fname="ambig2.tbl", topology=topology
     )
-    observed_cns_input_list = rigidbody_module.prepare_cns_input_sequential(
-        models_to_dock=[
-            [
-                input_pdb_1,
-                input_pdb_2,
-            ]
-        ],
-        sampling_factor=1,
-        ambig_fnames=["ambig1.tbl"],
-    )
+    observed_jobs = list(rigidbody_module.make_cns_jobs(
+        models_to_dock=[[input_pdb_1, input_pdb_2]],
+        sampling_factor=3,
+        ambig_fnames=["ambig1.tbl", "ambig2.tbl", "ambig3.tbl"],
+    ))
 
-    assert observed_cns_input_list[0][0] == [input_pdb_1, input_pdb_2]
-    assert observed_cns_input_list[0][1] == "cns_input"
-    assert observed_cns_input_list[0][2] == "ambig1.tbl"
+    assert isinstance(observed_jobs[0], CNSJob)
+    assert observed_jobs[0].output_file == "rigidbody_1.out"
+    assert observed_jobs[0].input_file == "cns_input"
+    args, kwargs = mock_prepare.call_args
+    assert args[0] == 1
+    assert args[1] == [input_pdb_1, input_pdb_2]
+    assert kwargs["ambig_fname"] == "ambig1.tbl"
+    assert kwargs["seed"] == rigidbody_module.params["iniseed"] + 1
+
+    output_models = rigidbody_module.output_models
+    assert [m.restr_fname for m in output_models] == [
+        "ambig1.tbl",
+        "ambig2.tbl",
+        "ambig3.tbl",
+    ]
+    assert output_models[0].file_name == "rigidbody_1.pdb"
+    assert output_models[0].topology == [topology, topology]
+    assert output_models[2].seed == rigidbody_module.params["iniseed"] + 3
 
 
-def test_prepare_cns_input_parallel(mocker, rigidbody_module):
-    """???"""
-    mock_engine_cls = mocker.Mock()
-    mocker.patch(
-        "haddock.modules.sampling.rigidbody.get_engine", return_value=mock_engine_cls
-    )
-    mock_prepare_engine = mock_engine_cls.return_value
-    mock_prepare_engine.run.return_value = None
-    mocker.patch(
+def test_prepare_cns_input_lazy(mocker, rigidbody_module):
+    """Test the CNS inputs are only prepared when consumed."""
+    mock_prepare = mocker.patch(
         "haddock.modules.sampling.rigidbody.prepare_cns_input",
         return_value="cns_input",
     )
+    rigidbody_module.output_models = []
+    rigidbody_module.envvars = {}
 
     topology = Persistent(file_name="topology.psf", path=".", file_type=Format.TOPOLOGY)
-    input_pdb_1 = PDBFile(
-        Path("model1.pdb"), path=".", restr_fname="ambig1.tbl", topology=topology
+    input_pdb_1 = PDBFile(Path("model1.pdb"), path=".", topology=topology)
+    input_pdb_2 = PDBFile(Path("model2.pdb"), path=".", topology=topology)
+    jobs = rigidbody_module.make_cns_jobs(
+        models_to_dock=[[input_pdb_1, input_pdb_2]],
+        sampling_factor=3,
+        ambig_fnames=None,
     )
-    input_pdb_2 = PDBFile(
-        Path("model2.pdb"), path=".", restr_fname="ambig2.tbl", topology=topology
-    )
-    observed_cns_input_list = rigidbody_module.prepare_cns_input_sequential(
-        models_to_dock=[
-            [
-                input_pdb_1,
-                input_pdb_2,
-            ]
-        ],
-        sampling_factor=1,
-        ambig_fnames=["ambig1.tbl"],
-    )
-
-    assert observed_cns_input_list[0][0] == [input_pdb_1, input_pdb_2]
-    assert observed_cns_input_list[0][1] == "cns_input"
-    assert observed_cns_input_list[0][2] == "ambig1.tbl"
+    assert mock_prepare.call_count == 0
+
+    first_job = next(jobs)
+    assert mock_prepare.call_count == 0
+    assert first_job.input_file == "cns_input"
+    assert mock_prepare.call_count == 1
+    assert len(rigidbody_module.output_models) == 1
+
+    assert [job.input_file for job in jobs] == ["cns_input"] * 2
+    assert mock_prepare.call_count == 3
+    assert [m.file_name for m in rigidbody_module.output_models] == [
+        "rigidbody_1.pdb",
+        "rigidbody_2.pdb",
+        "rigidbody_3.pdb",
+    ]